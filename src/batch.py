@@ -0,0 +1,246 @@
+'''
+Offline batch processing of recordings.
+
+Replays raw recordings (.tcraw, see recording.rawRecording) and raw dumps (see sources.frameSource.FileFrameSource)
+through the same temperature statistics and rendering code as ThermalCameraController/GuiController, without a window.
+Files are spread over a pool of worker processes. For every file it writes a per-frame statistics CSV and optionally
+a re-rendered video, and for the whole batch a summary report (CSV + JSON).
+
+Example:
+    python src/batch.py output/ --out batch/
+    python src/batch.py output/ --recursive --video --colormap JET --scale 2 --render-mode linear
+'''
+
+import csv
+import json
+import os
+import time
+import zlib
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+
+from defaults.values import *
+from enums.ColormapEnum import Colormap
+from enums.RenderModeEnum import RenderMode
+from controllers.thermalcameracontroller import ThermalCameraController
+from processing.regions import RegionOfInterest, loadRegions
+from sources.frameSource import FrameSource, FileFrameSource, RecordingFrameSource
+
+STATS_FIELDS: list[str] = ["frame", "timestamp", "center", "minimum", "maximum", "mean", "std", "minX", "minY", "maxX", "maxY"]
+REGION_STATS_FIELDS: list[str] = ["Min", "Max", "Mean"]
+SUMMARY_FIELDS: list[str] = ["file", "frames", "duration", "minimum", "minimumTime", "maximum", "maximumTime", "mean", "renderMode", "seconds", "fps", "statsPath", "videoPath", "error"]
+
+def findRecordings(paths: list[str], recursive: bool = False) -> dict[str, str]:
+    """
+    Returns the recordings among the given files and directories and the names of their outputs
+    (their path relative to the given directory). Largest first, so the pool stays busy until the end.
+    """
+    extensions = tuple(f".{ext}" for ext in [RAW_RECORDING_EXTENSION] + BATCH_RAW_DUMP_EXTENSIONS)
+    found = {}
+    for path in paths:
+        if os.path.isfile(path):
+            found.setdefault(path, os.path.splitext(os.path.basename(path))[0])
+            continue
+        for root, dirs, files in os.walk(path):
+            for name in sorted(files):
+                if name.lower().endswith(extensions):
+                    recording = os.path.join(root, name)
+                    found.setdefault(recording, os.path.splitext(os.path.relpath(recording, path))[0].replace(os.sep, "_"))
+            if recursive == False:
+                break
+    return {recording: found[recording] for recording in sorted(found, key=os.path.getsize, reverse=True)}
+
+def openRecording(path: str) -> FrameSource:
+    """
+    Returns the frame source replaying a recording: every frame in order, as fast as it can be read.
+    """
+    if path.lower().endswith(f".{RAW_RECORDING_EXTENSION}"):
+        return RecordingFrameSource(path, loop=False, realtime=False)
+    return FileFrameSource(path, loop=False, realtime=False)
+
+def readRecording(source: FrameSource, controller: ThermalCameraController):
+    """
+    Yields the (thermal, image, timestamp) of every frame of a recording. image is None if the recording has no image plane.
+    """
+    isRecording = isinstance(source, RecordingFrameSource)
+    hasImage = source.hasImage if isRecording == True else True
+    source.open()
+    index = 0
+    while source.isOpened():
+        ret, frame = source.read()
+        if ret == False:
+            break
+        yuv_pic, thm_pic = controller.decodeFrame(frame)
+        # Raw dumps have no timestamps, assume the source framerate
+        timestamp = source.position if isRecording == True else index/source.fps
+        yield thm_pic, (yuv_pic if hasImage == True else None), timestamp
+        index += 1
+
+def processRecording(path: str,
+                     outputPath: str,
+                     name: str,
+                     video: bool = False,
+                     colormap: Colormap = COLORMAP,
+                     scale: int = SCALE,
+                     renderMode: RenderMode = RENDER_MODE,
+                     isHudVisible: bool = HUD_VISIBLE,
+                     regions: list[RegionOfInterest] = None) -> dict:
+    """
+    Replays one recording: writes its per-frame statistics CSV (and re-rendered video) and returns its summary row.
+    Runs in a worker process.
+    """
+    start = time.perf_counter()
+    summary = {"file": path, "frames": 0, "renderMode": renderMode.name.lower(), "error": ""}
+    controller = None
+
+    statsPath = os.path.join(outputPath, f"{name}.csv")
+    videoPath = os.path.join(outputPath, f"{name}.avi") if video == True else None
+    writer = None
+    minimum, minimumTime = float("inf"), 0
+    maximum, maximumTime = float("-inf"), 0
+    meanSum = 0.0
+    timestamp = 0.0
+
+    try:
+        source = openRecording(path)
+        controller = ThermalCameraController(
+            width=source.width,
+            height=source.height,
+            fps=source.fps,
+            frameSource=source,
+            headless=True,
+            mediaOutputPath=outputPath,
+            renderMode=renderMode,
+            regions=regions)
+        gui = controller.gui
+        gui.colormap = colormap
+        gui.setScale(scale)
+        gui.isHudVisible = isHudVisible
+
+        with open(statsPath, "w", newline="") as f:
+            rows = csv.writer(f)
+            rows.writerow(STATS_FIELDS + [f"{region.name}{field}" for region in regions or [] for field in REGION_STATS_FIELDS])
+            for thm_pic, yuv_pic, timestamp in readRecording(source, controller):
+                stats = controller.calculateStats(thm_pic, withStd=True)
+                rows.writerow([summary["frames"], round(timestamp, 4), stats.center, stats.minimum, stats.maximum, stats.mean, round(stats.std, 3),
+                               stats.minLoc[0], stats.minLoc[1], stats.maxLoc[0], stats.maxLoc[1]]
+                              + [value for region in stats.regions for value in (region.minimum, region.maximum, region.mean)])
+                summary["frames"] += 1
+                meanSum += stats.mean
+                if stats.minimum < minimum:
+                    minimum, minimumTime = stats.minimum, timestamp
+                if stats.maximum > maximum:
+                    maximum, maximumTime = stats.maximum, timestamp
+
+                if video == True:
+                    # Recordings without the image plane can only be rendered from the thermal data
+                    if yuv_pic is None and gui.renderMode == RenderMode.IMAGE:
+                        gui.renderMode = RenderMode.LINEAR
+                        summary["renderMode"] = gui.renderMode.name.lower()
+                    heatmap = controller.renderFrame(yuv_pic, thm_pic, stats)
+                    if writer is None:
+                        writer = cv2.VideoWriter(videoPath, cv2.VideoWriter_fourcc(*'XVID'), source.fps, (heatmap.shape[1], heatmap.shape[0]))
+                    writer.write(heatmap)
+    except (OSError, ValueError, zlib.error) as e:
+        summary["error"] = str(e)
+    finally:
+        if writer is not None:
+            writer.release()
+        if controller is not None:
+            controller.stop()
+
+    seconds = time.perf_counter() - start
+    frames = summary["frames"]
+    summary.update({
+        "duration": round(timestamp, 3),
+        "minimum": minimum if frames > 0 else None,
+        "minimumTime": round(minimumTime, 3),
+        "maximum": maximum if frames > 0 else None,
+        "maximumTime": round(maximumTime, 3),
+        "mean": round(meanSum/frames, 2) if frames > 0 else None,
+        "seconds": round(seconds, 3),
+        "fps": round(frames/seconds, 1) if seconds > 0 else 0,
+        "statsPath": statsPath,
+        "videoPath": videoPath if writer is not None else None})
+    return summary
+
+def initializeWorker():
+    """
+    One OpenCV thread per worker process, the pool already uses every core.
+    """
+    cv2.setNumThreads(1)
+
+def runBatch(paths: list[str],
+             outputPath: str = BATCH_OUTPUT_PATH,
+             workers: int = BATCH_WORKERS,
+             recursive: bool = False,
+             **options) -> list[dict]:
+    """
+    Processes every recording found in paths on a pool of worker processes (see processRecording() for the options).
+    Writes the summary report and returns the summary rows.
+    """
+    start = time.perf_counter()
+    recordings = findRecordings(paths, recursive)
+    os.makedirs(outputPath, exist_ok=True)
+    workers = workers if workers > 0 else (os.cpu_count() or 1)
+
+    results = []
+    with ProcessPoolExecutor(max_workers=min(workers, max(1, len(recordings))), initializer=initializeWorker) as pool:
+        jobs = [pool.submit(processRecording, path, outputPath, name, **options) for path, name in recordings.items()]
+        for i, job in enumerate(as_completed(jobs)):
+            summary = job.result()
+            results.append(summary)
+            print(f"[{i + 1}/{len(recordings)}] {summary['file']}: {summary['frames']} frames in {summary['seconds']} s ({summary['fps']} fps){' ERROR ' + summary['error'] if summary['error'] else ''}")
+
+    # Summary report, in input order
+    order = {path: i for i, path in enumerate(recordings)}
+    results.sort(key=lambda row: order[row["file"]])
+    seconds = time.perf_counter() - start
+    totals = {
+        "files": len(results),
+        "frames": sum(row["frames"] for row in results),
+        "footageSeconds": round(sum(row["duration"] or 0 for row in results), 3),
+        "seconds": round(seconds, 3),
+        "workers": workers}
+    totals["fps"] = round(totals["frames"]/seconds, 1) if seconds > 0 else 0
+
+    with open(os.path.join(outputPath, f"{BATCH_SUMMARY_NAME}.csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+    with open(os.path.join(outputPath, f"{BATCH_SUMMARY_NAME}.json"), "w") as f:
+        json.dump({"totals": totals, "files": results}, f, indent=2)
+
+    print(f"\n{totals['files']} files, {totals['frames']} frames ({totals['footageSeconds']} s of footage) in {totals['seconds']} s on {workers} workers ({totals['fps']} fps)")
+    return results
+
+def main():
+    parser = ArgumentParser(description="Batch process thermal recordings (.tcraw raw recordings and raw dumps) without a window.")
+    parser.add_argument("paths", type=str, nargs="+", help="Recordings, or directories of recordings.")
+    parser.add_argument("--out", type=str, default=BATCH_OUTPUT_PATH, help=f"Output directory. Default is {BATCH_OUTPUT_PATH}.")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help="Worker processes. Default is one per CPU core.")
+    parser.add_argument("--recursive", action="store_true", help="Also look for recordings in sub-directories.")
+    parser.add_argument("--video", action="store_true", help="Also re-render every recording to an AVI video.")
+    parser.add_argument("--colormap", type=str, default=COLORMAP.name, choices=[c.name for c in Colormap], help=f"Colormap of the re-rendered videos. Default is {COLORMAP.name}.")
+    parser.add_argument("--scale", type=int, default=SCALE, choices=range(SCALE_MIN, SCALE_MAX + 1), help=f"Scale of the re-rendered videos. Default is {SCALE}.")
+    parser.add_argument("--render-mode", type=str, default=RENDER_MODE.name.lower(), choices=[m.name.lower() for m in RenderMode], help=f"What the re-rendered videos are rendered from. Default is {RENDER_MODE.name.lower()} (linear for recordings without the image plane).")
+    parser.add_argument("--no-hud", action="store_true", help="Leave the HUD out of the re-rendered videos.")
+    parser.add_argument("--roi", type=str, default=ROI_PATH, help="JSON file with regions of interest, measured into per-region columns of the statistics CSVs (and drawn in the videos).")
+    args = parser.parse_args()
+
+    runBatch(
+        paths=args.paths,
+        outputPath=args.out,
+        workers=args.workers,
+        recursive=args.recursive,
+        video=args.video,
+        colormap=Colormap[args.colormap],
+        scale=args.scale,
+        renderMode=RenderMode[args.render_mode.upper()],
+        isHudVisible=not args.no_hud,
+        regions=loadRegions(args.roi) if args.roi is not None else None)
+
+if __name__ == '__main__':
+    main()
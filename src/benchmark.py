@@ -0,0 +1,212 @@
+'''
+Headless benchmark of the frame pipeline.
+
+Feeds synthetic 256x192 frames through every stage of ThermalCameraController/GuiController
+(decode, temperature statistics, temporal filtering, colormap, effects, overlays, recording and the whole frame end to end)
+across scales, blur radii and colormaps, and reports per-stage throughput and latency percentiles.
+
+Example:
+    python src/benchmark.py --frames 100 --json bench.json
+    python src/benchmark.py --baseline bench.json --tolerance 0.25
+'''
+
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+import cv2
+import numpy as np
+
+from defaults.values import *
+from enums.ColormapEnum import Colormap
+from enums.RenderModeEnum import RenderMode
+from enums.FilterModeEnum import FilterMode
+from controllers.thermalcameracontroller import ThermalCameraController
+from sources.frameSource import SyntheticFrameSource
+from recording.rawRecording import RawRecorder
+from recording.mediaWriter import VideoFileWriter
+from processing.temporalFilter import TemporalFilter
+
+# Distinct synthetic frames cycled through, so generating them is not part of the measurement
+BENCHMARK_FRAME_POOL: int = 25
+BENCHMARK_FRAMES: int = 50
+BENCHMARK_WARMUP: int = 5
+BENCHMARK_PERCENTILES: tuple = (50, 90, 99)
+
+def measure(fn, frames: int, warmup: int = BENCHMARK_WARMUP):
+    """
+    Calls fn(i) for i in range(frames) after a few warmup calls. Returns the per-call durations in ms.
+    """
+    for i in range(warmup):
+        fn(i)
+    durations = np.empty(frames, dtype=np.float64)
+    for i in range(frames):
+        start = time.perf_counter_ns()
+        fn(i)
+        durations[i] = time.perf_counter_ns() - start
+    return durations/1e6
+
+def summarize(durations, **labels) -> dict:
+    """
+    Summarizes per-call durations (ms) into a result row.
+    """
+    row = dict(labels)
+    row["frames"] = len(durations)
+    row["mean_ms"] = round(float(durations.mean()), 4)
+    for p, v in zip(BENCHMARK_PERCENTILES, np.percentile(durations, BENCHMARK_PERCENTILES)):
+        row[f"p{p}_ms"] = round(float(v), 4)
+    row["fps"] = round(1000/float(durations.mean()), 1) if durations.mean() > 0 else 0
+    return row
+
+def runBenchmark(frames: int = BENCHMARK_FRAMES,
+                 scales: list[int] = None,
+                 blurRadii: list[int] = None,
+                 colormaps: list[Colormap] = None,
+                 renderModes: list[RenderMode] = None) -> list[dict]:
+    """
+    Runs the benchmark and returns one result row per (stage, configuration).
+    """
+    scales = scales if scales is not None else list(range(SCALE_MIN, SCALE_MAX + 1))
+    blurRadii = blurRadii if blurRadii is not None else list(range(BLUR_RADIUS_MIN, BLUR_RADIUS_MAX + 1))
+    colormaps = colormaps if colormaps is not None else list(Colormap)
+    renderModes = renderModes if renderModes is not None else [RENDER_MODE]
+    results = []
+
+    outputPath = tempfile.mkdtemp(prefix="thermal-benchmark-")
+    source = SyntheticFrameSource()
+    pool = [source.generateFrame(i) for i in range(BENCHMARK_FRAME_POOL)]
+    controller = ThermalCameraController(frameSource=source, headless=True, mediaOutputPath=outputPath)
+    gui = controller.gui
+    frame = lambda i: pool[i % len(pool)]
+
+    # Configuration independent stages
+    decoded = [controller.decodeFrame(f) for f in pool]
+    results.append(summarize(measure(lambda i: controller.decodeFrame(frame(i)), frames), stage="decode"))
+    results.append(summarize(measure(lambda i: controller.calculateStats(decoded[i % len(pool)][1]), frames), stage="stats"))
+    temperatures = np.empty((SENSOR_HEIGHT, SENSOR_WIDTH), dtype=np.float32)
+    results.append(summarize(measure(lambda i: controller.temperatureMap.lut.lookup(decoded[i % len(pool)][1], out=temperatures), frames), stage="tempmap"))
+    stats = [controller.calculateStats(thm) for _, thm in decoded]
+    for filterMode in (FilterMode.EMA, FilterMode.BOX):
+        temporalFilter = TemporalFilter()
+        results.append(summarize(measure(lambda i: temporalFilter.apply(decoded[i % len(pool)][1], filterMode), frames), stage="filter", filter=filterMode.name))
+
+    # Measures what recording costs the frame loop; blocks instead of dropping frames once the writer falls behind
+    recorder = RawRecorder(os.path.join(outputPath, f"benchmark.{RAW_RECORDING_EXTENSION}"), dropPolicy=DROP_BLOCK)
+    results.append(summarize(measure(lambda i: recorder.write(decoded[i % len(pool)][1], decoded[i % len(pool)][0]), frames), stage="record_raw"))
+    recorder.release()
+
+    for renderMode in renderModes:
+        gui.renderMode = renderMode
+        if renderMode == RenderMode.IMAGE:
+            images = [yuv for yuv, _ in decoded]
+        else:
+            images = [controller.agc.apply(thm, renderMode).copy() for _, thm in decoded]
+            results.append(summarize(measure(lambda i: controller.agc.apply(decoded[i % len(pool)][1], renderMode), frames), stage="agc", render=renderMode.name))
+        image = lambda i: images[i % len(pool)]
+
+        for colormap in colormaps:
+            gui.colormap = colormap
+            labels = {"render": renderMode.name, "colormap": colormap.name}
+            results.append(summarize(measure(lambda i: gui.applyColormap(image(i)), frames), stage="applyColormap", **labels))
+            colored = gui.applyColormap(image(0)).copy()
+
+            for scale in scales:
+                gui.setScale(scale)
+
+                for blurRadius in blurRadii:
+                    gui.blurRadius = blurRadius
+                    labels = {"render": renderMode.name, "colormap": colormap.name, "scale": scale, "blur": blurRadius}
+                    results.append(summarize(measure(lambda i: gui.applyEffects(colored), frames), stage="applyEffects", **labels))
+                    results.append(summarize(measure(lambda i: gui.drawGUI(image(i), stats[i % len(pool)], False), frames), stage="drawGUI", **labels))
+                    results.append(summarize(measure(lambda i: controller.processFrame(frame(i)), frames), stage="end_to_end", **labels))
+
+                # Overlays only depend on the scale
+                labels = {"render": renderMode.name, "colormap": colormap.name, "scale": scale}
+                canvas = gui.applyEffects(colored)
+                s = stats[0]
+                results.append(summarize(measure(lambda i: gui.drawHUD(canvas, s.mean, False), frames), stage="drawHUD", **labels))
+                results.append(summarize(measure(lambda i: gui.drawMaxTemp(canvas, s.maxLoc[0], s.maxLoc[1], s.maximum), frames), stage="drawMaxTemp", **labels))
+                results.append(summarize(measure(lambda i: gui.drawMinTemp(canvas, s.minLoc[0], s.minLoc[1], s.minimum), frames), stage="drawMinTemp", **labels))
+
+    # Video recording at every scale (the rendered frame size depends on it), through the background writer the
+    # controller records with; blocks instead of dropping frames once the writer falls behind, like record_raw
+    for scale in scales:
+        size = (gui.width*scale, gui.height*scale)
+        canvas = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+        writer = VideoFileWriter(os.path.join(outputPath, f"benchmark-{scale}.avi"), fps=DEVICE_FPS, dropPolicy=DROP_BLOCK)
+        results.append(summarize(measure(lambda i: writer.submit(canvas), frames), stage="record_video", scale=scale))
+        writer.close()
+
+    controller.stop()
+    for name in os.listdir(outputPath):
+        os.remove(os.path.join(outputPath, name))
+    os.rmdir(outputPath)
+    return results
+
+def resultKey(row: dict) -> tuple:
+    """
+    Identifies a result row (stage + configuration) for baseline comparisons.
+    """
+    return tuple((k, row[k]) for k in ("stage", "filter", "render", "colormap", "scale", "blur") if k in row)
+
+def compareToBaseline(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    """
+    Returns a description of every stage whose median latency regressed by more than tolerance (e.g. 0.2 = 20%).
+    """
+    baselineRows = {resultKey(row): row for row in baseline}
+    regressions = []
+    for row in results:
+        old = baselineRows.get(resultKey(row))
+        if old is not None and row["p50_ms"] > old["p50_ms"]*(1 + tolerance):
+            regressions.append(f"{dict(resultKey(row))}: p50 {old['p50_ms']} ms -> {row['p50_ms']} ms")
+    return regressions
+
+def main():
+    parser = ArgumentParser(description="Headless benchmark of the thermal camera frame pipeline.")
+    parser.add_argument("--frames", type=int, default=BENCHMARK_FRAMES, help=f"Measured frames per stage and configuration. Default is {BENCHMARK_FRAMES}.")
+    parser.add_argument("--scales", type=int, nargs="+", default=None, help="Scales to benchmark. Default is all.")
+    parser.add_argument("--blur", type=int, nargs="+", default=None, help="Blur radii to benchmark. Default is all.")
+    parser.add_argument("--colormaps", type=str, nargs="+", default=None, choices=[c.name for c in Colormap], help="Colormaps to benchmark. Default is all.")
+    parser.add_argument("--render-modes", type=str, nargs="+", default=None, choices=[m.name for m in RenderMode], help=f"Render modes to benchmark. Default is {RENDER_MODE.name}.")
+    parser.add_argument("--json", type=str, default=None, help="Write the results as JSON to this file.")
+    parser.add_argument("--csv", type=str, default=None, help="Write the results as CSV to this file.")
+    parser.add_argument("--baseline", type=str, default=None, help="JSON results of an earlier run to compare against. Exits with 1 on regressions.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed median latency increase over the baseline. Default is 0.2 (20%%).")
+    args = parser.parse_args()
+
+    results = runBenchmark(
+        frames=args.frames,
+        scales=args.scales,
+        blurRadii=args.blur,
+        colormaps=[Colormap[c] for c in args.colormaps] if args.colormaps else None,
+        renderModes=[RenderMode[m] for m in args.render_modes] if args.render_modes else None)
+
+    # Human readable summary
+    for row in results:
+        labels = " ".join(f"{k}={row[k]}" for k in ("filter", "render", "colormap", "scale", "blur") if k in row)
+        print(f"{row['stage']:<14} {labels:<48} mean {row['mean_ms']:>8.3f} ms  p50 {row['p50_ms']:>8.3f}  p99 {row['p99_ms']:>8.3f}  {row['fps']:>8.1f} fps")
+
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump({"opencv": cv2.__version__, "numpy": np.__version__, "results": results}, f, indent=2)
+    if args.csv is not None:
+        fields = ["stage", "filter", "render", "colormap", "scale", "blur", "frames", "mean_ms"] + [f"p{p}_ms" for p in BENCHMARK_PERCENTILES] + ["fps"]
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(results)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            regressions = compareToBaseline(results, json.load(f)["results"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if len(regressions) > 0:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+import math, os, queue, threading
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+import numpy as np
+import cv2
+
+from defaults.values import *
+from defaults.keybinds import *
+
+from enums.RenderModeEnum import RenderMode
+from enums.FilterModeEnum import FilterMode
+from controllers.thermalcameracontroller import ThermalCameraController
+from sources.frameSource import FrameSource
+from sinks.displaySink import DisplaySink, WindowDisplaySink, HeadlessDisplaySink
+from processing.regions import RegionOfInterest
+from processing.hotspots import HotspotDetector
+from recording.statsStore import StatsStore
+from processing.radiometry import RadiometricCorrection
+from helpers.qualityGovernor import QualityGovernor
+from helpers.metrics import FrameMetrics
+from server.streamServer import StreamServer
+
+class CameraSupervisor:
+    """
+    Runs several cameras from one process, sharing a single copy of OpenCV/NumPy.
+
+    Every camera gets its own ThermalCameraController (GUI settings, statistics, recordings, media sub-directory)
+    and its own capture thread. Decoding, statistics and rendering run on a worker pool shared by all cameras;
+    OpenCV and NumPy release the GIL while they work, so throughput grows with the number of cores.
+    A camera never has more than one frame on the pool, so its controller is only ever used by one worker at a time.
+    Cameras are driven through the controllers' stage API: startCapture(), process(), present() and handleKey().
+
+    Presentation stays on the calling thread (HighGUI needs it): one window per camera, or every camera tiled
+    into a single mosaic window. Key presses apply to all cameras.
+    """
+    def __init__(self,
+                 frameSources: list[FrameSource],
+                 names: list[str] = None,
+                 layout: str = CAMERA_LAYOUT,
+                 workers: int = CAMERA_WORKERS,
+                 headless: bool = HEADLESS,
+                 maxFrames: int = MAX_FRAMES,
+                 lowLatency: bool = LOW_LATENCY,
+                 mediaOutputPath: str = MEDIA_OUTPUT_PATH,
+                 recordingMode: str = RECORDING_MODE,
+                 recordImage: bool = RAW_RECORDING_INCLUDE_IMAGE,
+                 recordDropPolicy: str = VIDEO_WRITER_DROP_POLICY,
+                 scaleChangePolicy: str = VIDEO_SCALE_CHANGE_POLICY,
+                 renderMode: RenderMode = RENDER_MODE,
+                 filterMode: FilterMode = TEMPORAL_FILTER,
+                 filterAlpha: float = TEMPORAL_FILTER_ALPHA,
+                 filterFrames: int = TEMPORAL_FILTER_FRAMES,
+                 metrics: list[FrameMetrics] = None,
+                 streamServers: list[StreamServer] = None,
+                 regions: list[RegionOfInterest] = None,
+                 hotspotDetectors: list[HotspotDetector] = None,
+                 statsStores: list[StatsStore] = None,
+                 correction: RadiometricCorrection = None,
+                 qualityGovernors: list[QualityGovernor] = None,
+                 snapshotBurst: int = SNAPSHOT_BURST_FRAMES):
+        if layout not in CAMERA_LAYOUTS:
+            raise ValueError(f"Unknown camera layout '{layout}'. Expected one of {CAMERA_LAYOUTS}.")
+        self.names: list[str] = names if names is not None else [f"camera{i}" for i in range(len(frameSources))]
+        self.layout: str = layout
+        self.workers: int = workers if workers > 0 else min(len(frameSources), os.cpu_count() or 1)
+        self._headless: bool = headless
+        self._lowLatency: bool = lowLatency
+
+        # One controller per camera, each recording into its own sub-directory (and tracking its own hotspots, render times and stream)
+        self.controllers: list[ThermalCameraController] = []
+        detectors = hotspotDetectors if hotspotDetectors is not None else [None]*len(frameSources)
+        stores = statsStores if statsStores is not None else [None]*len(frameSources)
+        governors = qualityGovernors if qualityGovernors is not None else [None]*len(frameSources)
+        cameraMetrics = metrics if metrics is not None else [None]*len(frameSources)
+        servers = streamServers if streamServers is not None else [None]*len(frameSources)
+        for name, source, detector, store, governor, frameMetrics, server in zip(self.names, frameSources, detectors, stores, governors, cameraMetrics, servers):
+            title = f"{WINDOW_TITLE} - {name}"
+            if self.layout == CAMERA_LAYOUT_WINDOWS and self._headless == False:
+                sink = WindowDisplaySink(title)
+            else:
+                # Mosaic tiles are shown by the supervisor
+                sink = HeadlessDisplaySink(title, keepLastFrame=self.layout == CAMERA_LAYOUT_WINDOWS)
+            self.controllers.append(ThermalCameraController(
+                deviceName=f"{DEVICE_NAME}-{name}",
+                maxFrames=maxFrames,
+                mediaOutputPath=os.path.join(mediaOutputPath, name),
+                frameSource=source,
+                headless=self._headless,
+                recordingMode=recordingMode,
+                recordImage=recordImage,
+                recordDropPolicy=recordDropPolicy,
+                scaleChangePolicy=scaleChangePolicy,
+                renderMode=renderMode,
+                filterMode=filterMode,
+                filterAlpha=filterAlpha,
+                filterFrames=filterFrames,
+                metrics=frameMetrics,
+                streamServer=server,
+                displaySink=sink,
+                regions=regions,
+                hotspotDetector=detector,
+                statsStore=store,
+                correction=correction,
+                qualityGovernor=governor,
+                snapshotBurst=snapshotBurst))
+
+        # Mosaic init
+        self._mosaic = None
+        self._mosaicSink: DisplaySink = None
+        self._isFullscreen: bool = FULLSCREEN
+        if self.layout == CAMERA_LAYOUT_MOSAIC:
+            self._mosaicSink = HeadlessDisplaySink(MOSAIC_TITLE) if self._headless else WindowDisplaySink(MOSAIC_TITLE)
+            self._mosaicSink.open(*self._mosaicSize())
+            self._mosaicSink.setMouseCallback(self._onMouse)
+
+        # Set whenever a camera captured a frame or a processing job finished
+        self._wake = threading.Event()
+        self._lastHeatmaps: list = [None]*len(self.controllers)
+
+    @property
+    def displaySink(self) -> DisplaySink:
+        """
+        The sink key presses are read from: the mosaic window, or the first camera's window.
+        """
+        if self._mosaicSink is not None:
+            return self._mosaicSink
+        return self.controllers[0].gui.displaySink
+
+    @property
+    def frameCounts(self) -> dict[str, int]:
+        """
+        Returns the number of frames presented per camera.
+        """
+        return {name: controller.frameCount for name, controller in zip(self.names, self.controllers)}
+
+    ### MOSAIC
+    def _mosaicGrid(self) -> tuple[int, int]:
+        columns = min(len(self.controllers), MOSAIC_MAX_COLUMNS)
+        return math.ceil(len(self.controllers)/columns), columns
+
+    def _tileSize(self) -> tuple[int, int]:
+        gui = self.controllers[0].gui
+        return gui.scaledWidth, gui.scaledHeight
+
+    def _mosaicSize(self) -> tuple[int, int]:
+        rows, columns = self._mosaicGrid()
+        width, height = self._tileSize()
+        return width*columns, height*rows
+
+    def _drawTile(self, index: int, heatmap):
+        """
+        Copies a camera's rendered frame into its tile of the mosaic.
+        """
+        width, height = self._tileSize()
+        rows, columns = self._mosaicGrid()
+        if self._mosaic is None or self._mosaic.shape[:2] != (height*rows, width*columns):
+            self._mosaic = np.zeros((height*rows, width*columns, 3), dtype=np.uint8)
+
+        row, column = divmod(index, columns)
+        tile = self._mosaic[row*height:(row + 1)*height, column*width:(column + 1)*width]
+        if heatmap.shape[:2] == (height, width):
+            tile[:] = heatmap
+        else:
+            tile[:] = cv2.resize(heatmap, (width, height), interpolation=cv2.INTER_NEAREST)
+
+    def _onMouse(self, event: int, x: int, y: int, flags: int):
+        """
+        Passes a mouse event on the mosaic to the camera of the tile under the mouse, in that tile's coordinates.
+        """
+        width, height = self._tileSize()
+        rows, columns = self._mosaicGrid()
+        index = (y // height)*columns + x // width
+        for i, controller in enumerate(self.controllers):
+            if i == index:
+                controller.gui.onMouse(event, x % width, y % height, flags)
+            else:
+                controller.gui.hoverPoint = None
+
+    ### KEY PRESSES
+    def _pollKeyPress(self) -> bool:
+        """
+        Polls for a key press once for all cameras and applies it to every camera. Returns False when the quit key was pressed.
+        """
+        keyPress = self.displaySink.waitKey(1)
+        if keyPress == ord(KEY_QUIT):
+            return False
+        if keyPress == -1:
+            return True
+
+        tileSize = self._tileSize()
+        for controller, heatmap in zip(self.controllers, self._lastHeatmaps):
+            # Snapshots need a frame
+            if heatmap is not None or keyPress != ord(KEY_SNAPSHOT):
+                controller.handleKey(keyPress, heatmap)
+
+        # The mosaic window follows the scale and fullscreen keys of the cameras
+        if self._mosaicSink is not None:
+            if keyPress == ord(KEY_FULLSCREEN) or keyPress == ord(KEY_WINDOWED):
+                self._isFullscreen = keyPress == ord(KEY_FULLSCREEN)
+                self._mosaicSink.setFullscreen(self._isFullscreen, *self._mosaicSize())
+            elif tileSize != self._tileSize() and self._isFullscreen == False:
+                self._mosaicSink.resize(*self._mosaicSize())
+        return True
+
+    ### RUNTIME
+    def _present(self, index: int, item) -> bool:
+        """
+        Presents a processed frame of a camera in its window or mosaic tile. Returns False once the camera has presented all its frames.
+        """
+        controller = self.controllers[index]
+        isRunning = controller.present(*item)
+        if self._mosaicSink is not None:
+            self._drawTile(index, item[0])
+        self._lastHeatmaps[index] = item[0]
+        return isRunning
+
+    def run(self) -> dict[str, int]:
+        """
+        Runs all cameras until quit, or until every camera has finished. Returns the number of frames presented per camera.
+        """
+        # Start one capture thread per camera, every captured frame wakes up the loop below
+        self._wake.clear()
+        captureThreads = [controller.startCapture(lowLatency=self._lowLatency, onCapture=self._wake.set) for controller in self.controllers]
+
+        # A camera gets a processing job once it has a frame waiting, never more than one at a time; results are
+        # presented as they complete. Jobs never wait on a queue, so a camera without frames never holds up a worker.
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="process")
+        jobs: dict[int, Future] = {}
+        running = set(range(len(self.controllers)))
+        isRunning = True
+        while isRunning and len(running) > 0:
+            self._wake.clear()
+            presented = False
+            for index in sorted(running):
+                controller = self.controllers[index]
+                job = jobs.get(index)
+                if job is not None:
+                    if not job.done():
+                        continue
+                    del jobs[index]
+                    try:
+                        item = job.result()
+                        # Source finished, or the camera presented all its frames
+                        if item is None or self._present(index, item) == False:
+                            running.discard(index)
+                            continue
+                        presented = True
+                    except queue.Empty:
+                        # The frame was replaced by a newer one just as it was taken (low latency mode)
+                        pass
+                if controller.capturedCount > 0:
+                    jobs[index] = pool.submit(controller.process, 0)
+                    jobs[index].add_done_callback(lambda job: self._wake.set())
+
+            if presented == True and self._mosaicSink is not None and self._mosaic is not None:
+                self._mosaicSink.show(self._mosaic)
+            if self._pollKeyPress() == False:
+                isRunning = False
+
+            # Nothing ready yet, wait for the next frame or job instead of spinning
+            if isRunning and presented == False:
+                self._wake.wait(QUEUE_POLL_TIMEOUT)
+        self._stop(pool)
+        return self.frameCounts
+
+    def _stop(self, pool: ThreadPoolExecutor):
+        """
+        Stops capture and processing and closes out every camera.
+        """
+        pool.shutdown(wait=True, cancel_futures=True)
+        for controller in self.controllers:
+            controller.stop()
+        if self._mosaicSink is not None:
+            self._mosaicSink.close()
@@ -1,8 +1,19 @@
 import time
 import cv2
+import numpy as np
 
 from defaults.values import *
 from enums.ColormapEnum import Colormap
+from enums.RenderModeEnum import RenderMode
+from enums.FilterModeEnum import FilterMode
+from enums.QualityLevelEnum import QualityLevel
+from sinks.displaySink import DisplaySink, WindowDisplaySink
+from processing.frameStats import FrameStats
+from processing.regions import RegionOfInterest
+from processing.temperatureMap import TemperatureMap
+from processing.radiometry import RadiometricCorrection
+from helpers.bufferPool import BufferPool
+from helpers.metrics import FrameMetrics
 
 class GuiController:
     def __init__(self, 
@@ -13,7 +24,14 @@ class GuiController:
                  colormap: Colormap = COLORMAP, 
                  contrast: float = CONTRAST, 
                  blurRadius: int = BLUR_RADIUS, 
-                 threshold: int = THRESHOLD):
+                 threshold: int = THRESHOLD,
+                 renderMode: RenderMode = RENDER_MODE,
+                 filterMode: FilterMode = TEMPORAL_FILTER,
+                 correction: RadiometricCorrection = None,
+                 metrics: FrameMetrics = None,
+                 displaySink: DisplaySink = None,
+                 bufferSlots: int = RENDER_BUFFER_SLOTS,
+                 regions: list[RegionOfInterest] = None):
         # Passed parameters
         self.windowTitle = windowTitle
         self.width = width
@@ -23,6 +41,11 @@ class GuiController:
         self.contrast = contrast
         self.blurRadius = blurRadius
         self.threshold = threshold
+        self.renderMode = renderMode
+        self.filterMode = filterMode
+        self.correction: RadiometricCorrection = correction if correction is not None else RadiometricCorrection()
+        self.metrics = metrics
+        self.regions: list[RegionOfInterest] = regions if regions is not None else []
         
         # Calculated properties
         self.scaledWidth = int(self.width*self.scale)
@@ -32,6 +55,13 @@ class GuiController:
         self.isHudVisible: bool = HUD_VISIBLE
         self.isFullscreen: bool = FULLSCREEN
         self.isInverted: bool = False
+        self.isHoverEnabled: bool = HOVER_ENABLED
+        # Rendering quality, lowered by the quality governor under load
+        self.quality: QualityLevel = QualityLevel.CUBIC
+        # Sensor pixel under the mouse
+        self.hoverPoint: tuple[int, int] = None
+        # Line drawn under the image, e.g. the playback position of a recording
+        self.statusText: str = None
         
         # Recording stats
         self.recordingStartTime: float = RECORDING_START_TIME
@@ -40,10 +70,34 @@ class GuiController:
         
         # Other
         self._font = FONT
+        self._buffers: BufferPool = BufferPool(bufferSlots)
+        self._hudOverlay = None
+        self._hudKey: tuple = None
+        # Last drawn HUD (with its dynamic fields) and the frames since, for QualityLevel.REDUCED_HUD
+        self._hudFrame = None
+        self._hudFrameAge: int = 0
+        self._colorLUTs: dict = {}
+        self._regionOutlines: dict = {}
         
         # Initialize the GUI
-        cv2.namedWindow(self.windowTitle, cv2.WINDOW_GUI_NORMAL)
-        cv2.resizeWindow(self.windowTitle, self.scaledWidth, self.scaledHeight)
+        self.displaySink: DisplaySink = displaySink if displaySink is not None else WindowDisplaySink(self.windowTitle)
+        self.displaySink.open(self.scaledWidth, self.scaledHeight)
+        self.displaySink.setMouseCallback(self.onMouse)
+
+    def windowToSensor(self, x: int, y: int) -> tuple[int, int]:
+        """
+        Maps coordinates in the rendered (scaled) image back to the sensor pixel they show, or None outside of the image.
+        """
+        if x < 0 or y < 0 or x >= self.scaledWidth or y >= self.scaledHeight:
+            return None
+        return min(int(x // self.scale), self.width - 1), min(int(y // self.scale), self.height - 1)
+
+    def onMouse(self, event: int, x: int, y: int, flags: int):
+        """
+        Tracks the sensor pixel under the mouse for the temperature readout.
+        """
+        if event == cv2.EVENT_MOUSEMOVE:
+            self.hoverPoint = self.windowToSensor(x, y)
         
     def updateRecordingStats(self):
         """
@@ -51,43 +105,123 @@ class GuiController:
         """
         self.recordingDuration = (time.time() - self.recordingStartTime)
         self.recordingDuration = time.strftime("%H:%M:%S", time.gmtime(self.recordingDuration)) 
+
+    def setScale(self, scale: int):
+        """
+        Changes the scale of the rendered image (clamped to SCALE_MIN-SCALE_MAX), resizing the window unless fullscreen.
+        """
+        self.scale = min(max(scale, SCALE_MIN), SCALE_MAX)
+        self.scaledWidth = int(self.width*self.scale)
+        self.scaledHeight = int(self.height*self.scale)
+        if self.isFullscreen == False:
+            self.displaySink.resize(self.scaledWidth, self.scaledHeight)
+
+    def holdFrame(self) -> int:
+        """
+        Keeps the buffers of the frame last drawn from being drawn over until releaseFrame() is called with the returned
+        handle, for frames handed over to another thread.
+        """
+        return self._buffers.hold()
+
+    def releaseFrame(self, handle: int):
+        """
+        Lets the buffers of a frame held with holdFrame() be drawn over again.
+        """
+        if handle is not None:
+            self._buffers.release(handle)
         
-    def drawGUI(self, imdata, temp, averageTemp, maxTemp, minTemp, isRecording, mrow, mcol, lrow, lcol):
+    def drawGUI(self, imdata, stats: FrameStats, isRecording, temperatures: TemperatureMap = None):
         """
         Draws the GUI elements on the thermal image.
+        imdata is the image at sensor resolution: the YUY2 image plane for RenderMode.IMAGE,
+        otherwise the thermal plane mapped to 8-bit grayscale by automatic gain control.
+        temperatures is the temperature map of the frame, for the mouse hover readout.
         """
-        # Apply affects
-        img = self.applyEffects(imdata=imdata)
-        
-        # Apply inversion
-        if self.isInverted == True:
-            img = cv2.bitwise_not(img)
+        metrics = self.metrics
+        if metrics is not None:
+            start = time.perf_counter_ns()
+
+        # Render into the next set of preallocated buffers
+        self._buffers.advance()
 
-        # Apply colormap
-        img = self.applyColormap(img)
+        # Apply contrast, inversion and colormap (one lookup at sensor resolution)
+        img = self.applyColormap(imdata)
+        if metrics is not None:
+            metrics.record("colormap", start)
+            start = time.perf_counter_ns()
+
+        # Apply affects
+        img = self.applyEffects(imdata=img)
+        if metrics is not None:
+            metrics.record("effects", start)
+            start = time.perf_counter_ns()
 
         # Draw crosshairs
         img = self.drawCrosshairs(img)
         
         # Draw temp
-        img = self.drawTemp(img, temp)
+        img = self.drawTemp(img, stats.center)
+
+        # Draw regions of interest
+        if len(stats.regions) > 0:
+            img = self.drawRegions(img, stats.regions)
+
+        # Draw hotspots
+        if len(stats.hotspots) > 0:
+            img = self.drawHotspots(img, stats.hotspots)
 
         # Draw HUD
         if self.isHudVisible == True:
-            img = self.drawHUD(img, averageTemp, isRecording)
+            img = self.drawHUD(img, stats.mean, isRecording)
         
         # Display floating max temp
-        if maxTemp > averageTemp + self.threshold:
-            img = self.drawMaxTemp(img, mrow, mcol, maxTemp)
+        if stats.maximum > stats.mean + self.threshold:
+            img = self.drawMaxTemp(img, stats.maxLoc[0], stats.maxLoc[1], stats.maximum)
 
         # Display floating min temp
-        if minTemp < averageTemp - self.threshold:
-            img = self.drawMinTemp(img, lrow, lcol, minTemp)
+        if stats.minimum < stats.mean - self.threshold:
+            img = self.drawMinTemp(img, stats.minLoc[0], stats.minLoc[1], stats.minimum)
+
+        # Display the temperature under the mouse
+        hoverPoint = self.hoverPoint
+        if self.isHoverEnabled == True and hoverPoint is not None and temperatures is not None:
+            temp = temperatures.at(*hoverPoint)
+            if temp is not None:
+                img = self.drawHover(img, hoverPoint[0], hoverPoint[1], round(temp, TEMPERATURE_SIG_DIGITS))
+
+        # Display the status of the frame source
+        statusText = self.statusText
+        if statusText is not None:
+            img = self.drawStatus(img, statusText)
             
         # Update recording stats
         if isRecording == True:
             self.updateRecordingStats()
 
+        if metrics is not None:
+            metrics.record("overlay", start)
+        return img
+
+    def drawMetrics(self, img):
+        """
+        Draws the live frame rates and latency below the HUD.
+        """
+        cv2.rectangle(
+            img,
+            (0, 191),
+            (160, 219),
+            (0,0,0),
+            -1)
+        for i, line in enumerate(self.metrics.hudLines()):
+            cv2.putText(
+                img,
+                line,
+                (10, 200 + i*14),
+                self._font,
+                0.4,
+                (0, 255, 255),
+                1,
+                cv2.LINE_AA)
         return img
 
     def drawTemp(self, img, temp):
@@ -149,17 +283,32 @@ class GuiController:
 
     def drawHUD(self, img, averageTemp, isRecording):
         """
-        Draws the HUD onto the image.
+        Draws the HUD (and the metrics, if enabled) onto the image.
+        The static part of the HUD is rendered once into a cached overlay (see _renderHUD()) and only
+        re-rendered when a displayed setting changes. Only the average temperature and the recording
+        duration are drawn every frame, or every QUALITY_REDUCED_HUD_INTERVAL frames at QualityLevel.REDUCED_HUD.
         """
-        # Display black box for our data
-        cv2.rectangle(
-            img, 
-            (0, 0),
-            (160, 134),
-            (0,0,0),
-            -1)
-        
-        # Put text in the box
+        # Re-render the overlay if any displayed setting changed
+        hudKey = (self.threshold, self.colormap, self.blurRadius, self.scale, self.contrast, self.last_snapshot_time, self.isInverted, self.renderMode, self.filterMode, self.correction, self.quality, isRecording)
+        if hudKey != self._hudKey:
+            self._hudOverlay = self._renderHUD(isRecording)
+            self._hudKey = hudKey
+            self._hudFrame = None
+
+        # Reuse the last drawn HUD while it is fresh enough
+        if self.quality == QualityLevel.REDUCED_HUD and self._hudFrame is not None and self._hudFrameAge < QUALITY_REDUCED_HUD_INTERVAL:
+            height, width = self._hudFrame.shape[:2]
+            if height <= img.shape[0] and width <= img.shape[1]:
+                img[:height, :width] = self._hudFrame
+                self._hudFrameAge += 1
+                return img
+
+        # The HUD box is opaque, so the overlay is copied straight over the image
+        height = min(self._hudOverlay.shape[0], img.shape[0])
+        width = min(self._hudOverlay.shape[1], img.shape[1])
+        img[:height, :width] = self._hudOverlay[:height, :width]
+
+        # Draw the dynamic fields
         cv2.putText(
             img,
             'Avg Temp: '+str(averageTemp)+' C',
@@ -170,6 +319,35 @@ class GuiController:
             1,
             cv2.LINE_AA)
 
+        if isRecording == True:
+            cv2.putText(
+                img,
+                'Recording: '+self.recordingDuration,
+                (10, 112),
+                self._font,
+                0.4,
+                (40, 40, 255),
+                1,
+                cv2.LINE_AA)
+
+        if self.metrics is not None:
+            img = self.drawMetrics(img)
+
+        # Keep the drawn HUD for the next frames
+        if self.quality == QualityLevel.REDUCED_HUD:
+            height = min(219 if self.metrics is not None else self._hudOverlay.shape[0], img.shape[0])
+            self._hudFrame = img[:height, :width].copy()
+            self._hudFrameAge = 0
+        return img
+
+    def _renderHUD(self, isRecording):
+        """
+        Renders the static part of the HUD (box and settings) into a new overlay image.
+        """
+        # Display black box for our data
+        img = np.zeros((191, 161, 3), dtype=np.uint8)
+        
+        # Put text in the box
         cv2.putText(
             img,
             'Label Threshold: '+str(self.threshold)+' C',
@@ -240,16 +418,6 @@ class GuiController:
                 (200, 200, 200),
                 1,
                 cv2.LINE_AA)
-        else:
-            cv2.putText(
-                img,
-                'Recording: '+self.recordingDuration,
-                (10, 112),
-                self._font,
-                0.4,
-                (40, 40, 255),
-                1,
-                cv2.LINE_AA)
             
         cv2.putText(
             img,
@@ -261,8 +429,111 @@ class GuiController:
             1,
             cv2.LINE_AA)
             
+        cv2.putText(
+            img,
+            'Render: '+self.renderMode.name,
+            (10, 140),
+            self._font,
+            0.4,
+            (0, 255, 255),
+            1,
+            cv2.LINE_AA)
+
+        cv2.putText(
+            img,
+            'Filter: '+self.filterMode.name,
+            (10, 154),
+            self._font,
+            0.4,
+            (0, 255, 255),
+            1,
+            cv2.LINE_AA)
+
+        cv2.putText(
+            img,
+            'Emiss: '+str(self.correction.emissivity)+' Refl: '+str(self.correction.reflectedTemp)+' C',
+            (10, 168),
+            self._font,
+            0.4,
+            (0, 255, 255),
+            1,
+            cv2.LINE_AA)
+
+        cv2.putText(
+            img,
+            'Quality: '+self.quality.name,
+            (10, 182),
+            self._font,
+            0.4,
+            (0, 255, 255),
+            1,
+            cv2.LINE_AA)
+            
         return img
     
+    def drawRegions(self, img, regionStats: list):
+        """
+        Draws the outline of every region of interest, labelled with its name and max/mean temperatures.
+        """
+        # Outlines only change with the scale
+        outlines = self._regionOutlines.get(self.scale)
+        if outlines is None:
+            outlines = [region.points*self.scale for region in self.regions]
+            self._regionOutlines[self.scale] = outlines
+
+        cv2.polylines(img, outlines, True, (0,0,0), 2)
+        cv2.polylines(img, outlines, True, ROI_COLOR, 1)
+        for outline, stats in zip(outlines, regionStats):
+            x, y = outline.min(axis=0)
+            text = f'{stats.name}: {stats.maximum} / {stats.mean} C'
+            cv2.putText(img, text, (int(x) + 3, int(y) + 13), self._font, 0.4, (0,0,0), 2, cv2.LINE_AA)
+            cv2.putText(img, text, (int(x) + 3, int(y) + 13), self._font, 0.4, ROI_LABEL_COLOR, 1, cv2.LINE_AA)
+        return img
+
+    def drawHotspots(self, img, hotspots: list):
+        """
+        Draws the bounding box and peak temperature of every hotspot, red when in alarm.
+        """
+        for hotspot in hotspots:
+            x, y, w, h = hotspot.bbox
+            color = HOTSPOT_ALARM_COLOR if hotspot.isAlarm == True else HOTSPOT_PENDING_COLOR
+            topLeft = (x*self.scale, y*self.scale)
+            bottomRight = ((x + w)*self.scale - 1, (y + h)*self.scale - 1)
+            cv2.rectangle(img, topLeft, bottomRight, (0,0,0), 3)
+            cv2.rectangle(img, topLeft, bottomRight, color, 1)
+            text = f'#{hotspot.id} {hotspot.peak} C'
+            cv2.putText(img, text, (topLeft[0], max(topLeft[1] - 5, 10)), self._font, 0.45, (0,0,0), 2, cv2.LINE_AA)
+            cv2.putText(img, text, (topLeft[0], max(topLeft[1] - 5, 10)), self._font, 0.45, color, 1, cv2.LINE_AA)
+        return img
+
+    def drawHover(self, img, x: int, y: int, temp: float):
+        """
+        Marks the sensor pixel under the mouse and labels it with its temperature.
+        """
+        # Center of the pixel in the scaled image
+        cx = x*self.scale + self.scale // 2
+        cy = y*self.scale + self.scale // 2
+        cv2.drawMarker(img, (cx, cy), (0,0,0), cv2.MARKER_CROSS, 11, 3)
+        cv2.drawMarker(img, (cx, cy), HOVER_COLOR, cv2.MARKER_CROSS, 11, 1)
+
+        # Keep the label inside the image
+        text = str(temp)+' C'
+        (textWidth, textHeight), _ = cv2.getTextSize(text, self._font, 0.45, 2)
+        tx = cx + 8 if cx + 8 + textWidth < self.scaledWidth else cx - 8 - textWidth
+        ty = cy - 8 if cy - 8 - textHeight > 0 else cy + 8 + textHeight
+        cv2.putText(img, text, (tx, ty), self._font, 0.45, (0,0,0), 2, cv2.LINE_AA)
+        cv2.putText(img, text, (tx, ty), self._font, 0.45, HOVER_COLOR, 1, cv2.LINE_AA)
+        return img
+
+    def drawStatus(self, img, text: str):
+        """
+        Draws a status line (e.g. the playback position) in a box at the bottom left of the image.
+        """
+        (textWidth, _), _ = cv2.getTextSize(text, self._font, 0.4, 1)
+        cv2.rectangle(img, (0, self.scaledHeight - 20), (textWidth + 20, self.scaledHeight), (0,0,0), -1)
+        cv2.putText(img, text, (10, self.scaledHeight - 6), self._font, 0.4, (0, 255, 255), 1, cv2.LINE_AA)
+        return img
+
     def drawMaxTemp(self, img, row: int, col: int, maxTemp):
         """
         Draws the maximum temperature point on the image.
@@ -336,49 +607,119 @@ class GuiController:
 
         return img
     
-    def applyColormap(self, img):
+    def getColorLUT(self, isImage: bool = False):
+        """
+        Returns the 256-entry BGR lookup table combining contrast, inversion and the selected colormap, indexed by
+        grayscale values (isImage=False) or by the luma of the camera's YUY2 image (isImage=True).
+        Tables are built once per (colormap, inverted, contrast, input) and cached.
         """
-        Applies the selected colormap to the image data.
+        key = (self.colormap, self.isInverted, self.contrast, isImage)
+        lut = self._colorLUTs.get(key)
+        if lut is None:
+            lut = self._buildColorLUT(isImage)
+            self._colorLUTs[key] = lut
+        return lut
+
+    def _buildColorLUT(self, isImage: bool):
+        """
+        Builds the lookup table by running a 0-255 ramp through the same per-pixel OpenCV steps a frame would go through.
+        """
+        if isImage == True:
+            # YUY2 luma ramp (neutral chroma) -> RGB, like the camera's image plane
+            ramp = np.empty((1, 256, 2), dtype=np.uint8)
+            ramp[0, :, 0] = np.arange(256)
+            ramp[0, :, 1] = 128
+            img = cv2.cvtColor(ramp, cv2.COLOR_YUV2RGB_YUY2)
+        else:
+            # Automatic gain control outputs full range grayscale
+            img = cv2.cvtColor(np.arange(256, dtype=np.uint8).reshape((1, 256)), cv2.COLOR_GRAY2RGB)
+
+        # Contrast
+        img = cv2.convertScaleAbs(img, alpha=self.contrast)
+
+        # Inversion
+        if self.isInverted == True:
+            img = cv2.bitwise_not(img)
+
+        # Colormap
+        img = self._colorize(img)
+
+        return np.ascontiguousarray(img[0])
+
+    def _colorize(self, img, dst=None):
+        """
+        Applies the selected colormap to an RGB image (returned as is for Colormap.NONE).
         """
         match Colormap(self.colormap.value):
             case Colormap.JET:
-                img = cv2.applyColorMap(img, cv2.COLORMAP_JET)
+                img = cv2.applyColorMap(img, cv2.COLORMAP_JET, dst)
             case Colormap.HOT:
-                img = cv2.applyColorMap(img, cv2.COLORMAP_HOT)
+                img = cv2.applyColorMap(img, cv2.COLORMAP_HOT, dst)
             case Colormap.MAGMA:
-                img = cv2.applyColorMap(img, cv2.COLORMAP_MAGMA)
+                img = cv2.applyColorMap(img, cv2.COLORMAP_MAGMA, dst)
             case Colormap.INFERNO:
-                img = cv2.applyColorMap(img, cv2.COLORMAP_INFERNO)
+                img = cv2.applyColorMap(img, cv2.COLORMAP_INFERNO, dst)
             case Colormap.PLASMA:
-                img = cv2.applyColorMap(img, cv2.COLORMAP_PLASMA)
+                img = cv2.applyColorMap(img, cv2.COLORMAP_PLASMA, dst)
             case Colormap.BONE:
-                img = cv2.applyColorMap(img, cv2.COLORMAP_BONE)
+                img = cv2.applyColorMap(img, cv2.COLORMAP_BONE, dst)
             case Colormap.SPRING:
-                img = cv2.applyColorMap(img, cv2.COLORMAP_SPRING)
+                img = cv2.applyColorMap(img, cv2.COLORMAP_SPRING, dst)
             case Colormap.AUTUMN:
-                img = cv2.applyColorMap(img, cv2.COLORMAP_AUTUMN)
+                img = cv2.applyColorMap(img, cv2.COLORMAP_AUTUMN, dst)
             case Colormap.VIRIDIS:
-                img = cv2.applyColorMap(img, cv2.COLORMAP_VIRIDIS)
+                img = cv2.applyColorMap(img, cv2.COLORMAP_VIRIDIS, dst)
             case Colormap.PARULA:
-                img = cv2.applyColorMap(img, cv2.COLORMAP_PARULA)
+                img = cv2.applyColorMap(img, cv2.COLORMAP_PARULA, dst)
             case Colormap.INV_RAINBOW:
-                img = cv2.applyColorMap(img, cv2.COLORMAP_RAINBOW)
-                img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-
+                img = cv2.applyColorMap(img, cv2.COLORMAP_RAINBOW, dst)
+                img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB, img)
         return img
 
+    def applyColormap(self, img):
+        """
+        Applies contrast, inversion and the selected colormap to the image data in a single table lookup: 8-bit grayscale,
+        or the luma of the camera's YUY2 image (a colormap replaces the colors anyway).
+        Without a colormap the YUY2 image keeps its chroma: it is converted to RGB and run through the OpenCV steps pixel by pixel.
+        """
+        dst = self._buffers.get("colormap", img.shape[:2] + (3,))
+        if img.ndim == 3:
+            if self.colormap == Colormap.NONE:
+                rgb = cv2.cvtColor(img, cv2.COLOR_YUV2RGB_YUY2, dst)
+                rgb = cv2.convertScaleAbs(rgb, rgb, alpha=self.contrast)
+                if self.isInverted == True:
+                    rgb = cv2.bitwise_not(rgb, rgb)
+                return rgb
+            luma = cv2.cvtColor(img, cv2.COLOR_YUV2GRAY_YUY2, self._buffers.get("luma", img.shape[:2]))
+            return np.take(self.getColorLUT(isImage=True), luma, axis=0, out=dst)
+        return np.take(self.getColorLUT(), img, axis=0, out=dst)
+
+    @property
+    def interpolation(self) -> int:
+        """
+        The OpenCV interpolation used for upscaling at the current quality level.
+        """
+        match self.quality:
+            case QualityLevel.CUBIC:
+                return cv2.INTER_CUBIC
+            case QualityLevel.LINEAR:
+                return cv2.INTER_LINEAR
+            case _:
+                return cv2.INTER_NEAREST
+
     def applyEffects(self, imdata):
         """
-        Applies effects (contrast, blur, upscaling, interpolation, etc.) to the image data.
+        Applies effects (blur, upscaling, interpolation, etc.) to the image data.
+        Every step writes into a preallocated buffer, which is only reallocated when the scale changes.
+        Lower quality levels interpolate more cheaply and skip the blur.
         """
-        # Contrast
-        img = cv2.convertScaleAbs(imdata, alpha=self.contrast)
-        
-        # Bicubic interpolate, upscale and blur
-        img = cv2.resize(img, (self.scaledWidth,self.scaledHeight), interpolation=cv2.INTER_CUBIC) # Scale up!
+        scaledShape = (self.scaledHeight, self.scaledWidth) + imdata.shape[2:]
+
+        # Interpolate and upscale
+        img = cv2.resize(imdata, (self.scaledWidth,self.scaledHeight), self._buffers.get("resized", scaledShape), interpolation=self.interpolation) # Scale up!
         
         # Blur
-        if self.blurRadius > 0:
-            img = cv2.blur(img,(self.blurRadius, self.blurRadius))
+        if self.blurRadius > 0 and self.quality.value < QualityLevel.NO_BLUR.value:
+            img = cv2.blur(img,(self.blurRadius, self.blurRadius), self._buffers.get("blurred", scaledShape))
 
         return img
@@ -1,11 +1,32 @@
-import cv2, time, os
+import cv2, time, os, queue, threading
+from dataclasses import replace
+from typing import Callable
 import numpy as np
 
-from src.defaults.values import *
-from src.defaults.keybinds import *
+from defaults.values import *
+from defaults.keybinds import *
 
-from src.enums.ColormapEnum import Colormap
-from src.controllers.guiController import GuiController
+from enums.ColormapEnum import Colormap
+from enums.RenderModeEnum import RenderMode
+from enums.FilterModeEnum import FilterMode
+from controllers.guiController import GuiController
+from sources.frameSource import FrameSource, CameraFrameSource
+from sinks.displaySink import DisplaySink, WindowDisplaySink, HeadlessDisplaySink
+from helpers.frameQueue import FrameQueue
+from helpers.metrics import FrameMetrics
+from helpers.qualityGovernor import QualityGovernor
+from server.streamServer import StreamServer
+from recording.rawRecording import RawRecorder
+from recording.mediaWriter import VideoFileWriter, SnapshotWriter
+from recording.snapshots import RadiometricSnapshotWriter, SnapshotBurst, snapshotMetadata
+from recording.statsStore import StatsStore
+from processing.frameStats import FrameStats, computeFrameStats
+from processing.agc import AutoGainControl
+from processing.regions import RegionOfInterest, RegionMeter
+from processing.temporalFilter import TemporalFilter
+from processing.hotspots import HotspotDetector
+from processing.temperatureMap import TemperatureLUT, TemperatureMap
+from processing.radiometry import RadiometricCorrection, rawToCelsius, celsiusToRaw
 
 class ThermalCameraController:
     def __init__(self, 
@@ -14,28 +35,68 @@ class ThermalCameraController:
                  height: int = SENSOR_HEIGHT, 
                  fps: int = DEVICE_FPS, 
                  deviceName: str = DEVICE_NAME, 
-                 mediaOutputPath: str = MEDIA_OUTPUT_PATH):
+                 mediaOutputPath: str = MEDIA_OUTPUT_PATH,
+                 frameSource: FrameSource = None,
+                 headless: bool = HEADLESS,
+                 maxFrames: int = MAX_FRAMES,
+                 pipelined: bool = PIPELINED,
+                 lowLatency: bool = LOW_LATENCY,
+                 recordingMode: str = RECORDING_MODE,
+                 recordImage: bool = RAW_RECORDING_INCLUDE_IMAGE,
+                 recordDropPolicy: str = VIDEO_WRITER_DROP_POLICY,
+                 scaleChangePolicy: str = VIDEO_SCALE_CHANGE_POLICY,
+                 renderMode: RenderMode = RENDER_MODE,
+                 filterMode: FilterMode = TEMPORAL_FILTER,
+                 filterAlpha: float = TEMPORAL_FILTER_ALPHA,
+                 filterFrames: int = TEMPORAL_FILTER_FRAMES,
+                 metrics: FrameMetrics = None,
+                 streamServer: StreamServer = None,
+                 displaySink: DisplaySink = None,
+                 regions: list[RegionOfInterest] = None,
+                 hotspotDetector: HotspotDetector = None,
+                 statsStore: StatsStore = None,
+                 correction: RadiometricCorrection = None,
+                 qualityGovernor: QualityGovernor = None,
+                 snapshotBurst: int = SNAPSHOT_BURST_FRAMES):
+        if snapshotBurst < 1:
+            raise ValueError(f"A snapshot needs at least one frame, got {snapshotBurst}.")
+        if pipelined == True and lowLatency == True:
+            raise ValueError("The pipelined and low latency modes cannot be combined.")
+
         # Parameters init
         self._deviceIndex: int = deviceIndex
         self._deviceName: str = deviceName
         self._width: int = width
         self._height: int = height
         self._fps: int = fps
+        self._headless: bool = headless
+        self._maxFrames: int = maxFrames
+        self._frameCount: int = 0
+        self._pipelined: bool = pipelined
+        self._lowLatency: bool = lowLatency
+        self._metrics: FrameMetrics = metrics
+        self._streamServer: StreamServer = streamServer
+        self._qualityGovernor: QualityGovernor = qualityGovernor
 
         # Calculated values init
-        self._rawTemp = TEMPERATURE_RAW
-        self._temp = TEMPERATURE
-        self._maxTemp = TEMPERATURE_MAX
-        self._minTemp = TEMPERATURE_MIN
-        self._avgTemp = TEMPERATURE_AVG
-        self._mcol: int = 0
-        self._mrow: int = 0
-        self._lcol: int = 0
-        self._lrow: int = 0
+        self._stats: FrameStats = FrameStats()
+        self._agc: AutoGainControl = AutoGainControl(width=self._width, height=self._height)
+        self._temporalFilter: TemporalFilter = TemporalFilter(width=self._width, height=self._height, alpha=filterAlpha, frames=filterFrames)
+        self._hotspotDetector: HotspotDetector = hotspotDetector
+        self._correction: RadiometricCorrection = correction if correction is not None else RadiometricCorrection()
+        self._temperatureLUT: TemperatureLUT = TemperatureLUT(rawToCelsius, d=RAW_TEMPERATURE_DIVISOR, c=KELVIN_OFFSET, correction=self._correction)
+        self._temperatureMap: TemperatureMap = TemperatureMap(self._temperatureLUT, width=self._width, height=self._height)
+        self._statsStore: StatsStore = statsStore
+        self._regionMeter: RegionMeter = RegionMeter(regions, width=self._width, height=self._height) if regions else None
         
         # Media/recording init
         self._isRecording = not RECORDING
         self._mediaOutputPath: str = mediaOutputPath
+        self._recordingMode: str = recordingMode
+        self._recordImage: bool = recordImage
+        self._recordDropPolicy: str = recordDropPolicy
+        self._scaleChangePolicy: str = scaleChangePolicy
+        self._snapshotBurst: int = snapshotBurst
         
         if not os.path.exists(self._mediaOutputPath):
             os.makedirs(self._mediaOutputPath)
@@ -43,11 +104,44 @@ class ThermalCameraController:
         # GUI Init
         self._guiController = GuiController(
             width=self._width,
-            height=self._height)
+            height=self._height,
+            renderMode=renderMode,
+            filterMode=filterMode,
+            correction=self._correction,
+            metrics=self._metrics,
+            regions=regions,
+            displaySink=displaySink if displaySink is not None else HeadlessDisplaySink(WINDOW_TITLE) if self._headless else WindowDisplaySink(WINDOW_TITLE))
         
+        # Frame source init
+        self._frameSource: FrameSource = frameSource if frameSource is not None else CameraFrameSource(
+            deviceIndex=self._deviceIndex,
+            width=self._width,
+            height=self._height,
+            fps=self._fps)
+
+        # Last decoded frame
+        self._yuvPic = None
+        self._thmPic = None
+        self._frameTimestamp: float = 0
+
         # OpenCV init
-        self._cap = None
-        self._videoOut = None
+        self._videoOut: VideoFileWriter = None
+        self._rawOut: RawRecorder = None
+        self._snapshotOut: SnapshotWriter = None
+        self._radiometricOut: RadiometricSnapshotWriter = None
+        self._burst: SnapshotBurst = None
+        # Last presented frame: (thermal, timestamp, stats), the one a snapshot stores
+        self._presented: tuple = None
+        # Capture and render buffers of the last presented frame, held until the next one is presented
+        self._presentedHandles: tuple = None
+
+        # Pipeline init (see _runPipelined())
+        self._stateLock = threading.Lock()
+        self._stopEvent = threading.Event()
+        self._captureQueue: FrameQueue = None
+        self._presentQueue: FrameQueue = None
+        self._captureThread: threading.Thread = None
+        self._onCapture: Callable[[], None] = None
     
     @staticmethod
     def printBindings():
@@ -64,7 +158,13 @@ class ThermalCameraController:
         print(f'{KEY_SNAPSHOT} : Snapshot')
         print(f'{KEY_CYCLE_THROUGH_COLORMAPS} : Cycle through ColorMaps')
         print(f'{KEY_INVERT} : Invert ColorMap')
+        print(f'{KEY_CYCLE_RENDER_MODES} : Cycle through render modes (camera image or thermal data with automatic gain control)')
+        print(f'{KEY_CYCLE_FILTER_MODES} : Cycle through temporal noise filters')
+        print(f'{KEY_INCREASE_EMISSIVITY} {KEY_DECREASE_EMISSIVITY}: Increase/Decrease Emissivity')
+        print(f'{KEY_INCREASE_REFLECTED_TEMP} {KEY_DECREASE_REFLECTED_TEMP}: Increase/Decrease Reflected Temperature')
         print(f'{KEY_TOGGLE_HUD} : Toggle HUD')
+        print(f'{KEY_PLAYBACK_PAUSE!r} {KEY_PLAYBACK_STEP_BACK} {KEY_PLAYBACK_STEP_FORWARD}: Pause, Step Back/Forward (recording playback)')
+        print(f'{KEY_PLAYBACK_SEEK_BACK} {KEY_PLAYBACK_SEEK_FORWARD}: Seek Back/Forward {PLAYBACK_SEEK_SECONDS:g} s, {KEY_PLAYBACK_SLOWER} {KEY_PLAYBACK_FASTER}: Slower/Faster, {KEY_PLAYBACK_RESTART} : Restart (recording playback)')
         print(f'{KEY_QUIT} : Quit')
 
     @staticmethod
@@ -81,6 +181,10 @@ class ThermalCameraController:
         """
         Checks and acts on key presses.
         """
+        ### SOURCE CONTROLS (e.g. playback)
+        if self._frameSource.handleKey(keyPress) == True:
+            return
+
         ### BLUR RADIUS
         if keyPress == ord(KEY_INCREASE_BLUR): # Increase blur radius
             self._guiController.blurRadius += BLUR_RADIUS_INCREMENT
@@ -99,32 +203,17 @@ class ThermalCameraController:
 
         ### SCALE CONTROLS
         if keyPress == ord(KEY_INCREASE_SCALE): # Increase scale
-            self._guiController.scale += SCALE_INCREMENT
-            if self._guiController.scale >= SCALE_MAX:
-                self._guiController.scale = SCALE_MAX
-            self._guiController.scaledWidth = self._width*self._guiController.scale
-            self._guiController.scaledHeight = self._height*self._guiController.scale
-            if self._guiController.isFullscreen == False:
-                cv2.resizeWindow(self._guiController.windowTitle, self._guiController.scaledWidth, self._guiController.scaledHeight)
+            self._guiController.setScale(self._guiController.scale + SCALE_INCREMENT)
         if keyPress == ord(KEY_DECREASE_SCALE): # Decrease scale
-            self._guiController.scale -= SCALE_INCREMENT
-            if self._guiController.scale <= SCALE_MIN:
-                self._guiController.scale = SCALE_MIN
-            self._guiController.scaledWidth = self._width*self._guiController.scale
-            self._guiController.scaledHeight = self._height*self._guiController.scale
-            if self._guiController.isFullscreen == False:
-                cv2.resizeWindow(self._guiController.windowTitle, self._guiController.scaledWidth,self._guiController.scaledHeight)
+            self._guiController.setScale(self._guiController.scale - SCALE_INCREMENT)
 
         ### FULLSCREEN CONTROLS
         if keyPress == ord(KEY_FULLSCREEN): # Enable fullscreen
             self._guiController.isFullscreen = FULLSCREEN
-            cv2.namedWindow(self._guiController.windowTitle, cv2.WND_PROP_FULLSCREEN)
-            cv2.setWindowProperty(self._guiController.windowTitle, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+            self._guiController.displaySink.setFullscreen(True, self._guiController.scaledWidth, self._guiController.scaledHeight)
         if keyPress == ord(KEY_WINDOWED): # Disable fullscreen
             self._guiController.isFullscreen = not FULLSCREEN
-            cv2.namedWindow(self._guiController.windowTitle, cv2.WINDOW_GUI_NORMAL)
-            cv2.setWindowProperty(self._guiController.windowTitle, cv2.WND_PROP_AUTOSIZE, cv2.WINDOW_GUI_NORMAL)
-            cv2.resizeWindow(self._guiController.windowTitle, self._guiController.scaledWidth, self._guiController.scaledHeight)
+            self._guiController.displaySink.setFullscreen(False, self._guiController.scaledWidth, self._guiController.scaledHeight)
 
         ### CONTRAST CONTROLS
         if keyPress == ord(KEY_INCREASE_CONTRAST): # Increase contrast
@@ -153,15 +242,44 @@ class ThermalCameraController:
                 self._guiController.colormap = Colormap(self._guiController.colormap.value + 1)
         if keyPress == ord(KEY_INVERT): # Cycle through color maps
             self._guiController.isInverted = not self._guiController.isInverted
+
+        ### RENDER MODES
+        if keyPress == ord(KEY_CYCLE_RENDER_MODES): # Cycle through render modes
+            if self._guiController.renderMode.value + 1 > RenderMode.EQUALIZE.value:
+                self._guiController.renderMode = RenderMode.IMAGE
+            else:
+                self._guiController.renderMode = RenderMode(self._guiController.renderMode.value + 1)
+            self._agc.reset()
+
+        ### TEMPORAL FILTER
+        if keyPress == ord(KEY_CYCLE_FILTER_MODES): # Cycle through temporal filter modes
+            if self._guiController.filterMode.value + 1 > FilterMode.BOX.value:
+                self._guiController.filterMode = FilterMode.NONE
+            else:
+                self._guiController.filterMode = FilterMode(self._guiController.filterMode.value + 1)
+
+        ### RADIOMETRIC CORRECTION
+        if keyPress == ord(KEY_INCREASE_EMISSIVITY): # Increase emissivity
+            self.correction = replace(self._correction, emissivity=round(min(self._correction.emissivity + EMISSIVITY_INCREMENT, EMISSIVITY_MAX), 2))
+        if keyPress == ord(KEY_DECREASE_EMISSIVITY): # Decrease emissivity
+            self.correction = replace(self._correction, emissivity=round(max(self._correction.emissivity - EMISSIVITY_INCREMENT, EMISSIVITY_MIN), 2))
+        if keyPress == ord(KEY_INCREASE_REFLECTED_TEMP): # Increase reflected temperature
+            self.correction = replace(self._correction, reflectedTemp=self._correction.reflectedTemp + REFLECTED_TEMP_INCREMENT)
+        if keyPress == ord(KEY_DECREASE_REFLECTED_TEMP): # Decrease reflected temperature
+            self.correction = replace(self._correction, reflectedTemp=self._correction.reflectedTemp - REFLECTED_TEMP_INCREMENT)
             
         
         ### RECORDING/MEDIA CONTROLS
         if keyPress == ord(KEY_RECORD) and self._isRecording == False: # Start recording
-            self._videoOut = self._record()
+            if self._recordingMode != RECORDING_MODE_RAW:
+                self._videoOut = self._record()
+            if self._recordingMode != RECORDING_MODE_VIDEO:
+                self._rawOut = self._recordRaw()
             self._isRecording = RECORDING
             self._guiController.recordingStartTime = time.time()
             
         if keyPress == ord(KEY_STOP): # Stop reording
+            self._stopRecording()
             self._isRecording = not RECORDING
             self._guiController.recordingDuration = RECORDING_DURATION
 
@@ -173,13 +291,43 @@ class ThermalCameraController:
         STart recording video to file.
         """
         currentTimeStr = time.strftime("%Y%m%d--%H%M%S")
-        #do NOT use mp4 here, it is flakey!
-        self._videoOut = cv2.VideoWriter(
+        self._videoOut = VideoFileWriter(
             f"{self._mediaOutputPath}/{currentTimeStr}-output.avi",
-            cv2.VideoWriter_fourcc(*'XVID'),
-            self._fps,
-            (self._guiController.scaledWidth, self._guiController.scaledHeight))
+            fps=self._fps,
+            scaleChangePolicy=self._scaleChangePolicy,
+            dropPolicy=self._recordDropPolicy)
         return self._videoOut
+
+    def _recordRaw(self):
+        """
+        Start recording the raw thermal data (see recording.rawRecording) to file.
+        """
+        currentTimeStr = time.strftime("%Y%m%d--%H%M%S")
+        self._rawOut = RawRecorder(
+            f"{self._mediaOutputPath}/{currentTimeStr}-output.{RAW_RECORDING_EXTENSION}",
+            width=self._width,
+            height=self._height,
+            fps=self._fps,
+            includeImage=self._recordImage,
+            dropPolicy=self._recordDropPolicy)
+        return self._rawOut
+
+    def _stopRecording(self):
+        """
+        Closes out any open recordings.
+        """
+        if self._videoOut is not None:
+            # Writes out the frames still queued
+            self._videoOut.close()
+            stats = self._videoOut.stats
+            print(f'Recording stopped: {stats["written"]} frames written, {stats["dropped"]} dropped ({", ".join(self._videoOut.paths)})')
+            self._videoOut = None
+        if self._rawOut is not None:
+            # Writes out the frames still queued, then the index
+            self._rawOut.release()
+            stats = self._rawOut.stats
+            print(f'Raw recording stopped: {stats["written"]} frames written, {stats["dropped"]} dropped ({self._rawOut.path})')
+            self._rawOut = None
     
     def _snapshot(self, img):
         """
@@ -188,118 +336,544 @@ class ThermalCameraController:
         #I would put colons in here, but it Win throws a fit if you try and open them!
         currentTimeStr = time.strftime("%Y%m%d-%H%M%S") 
         self._guiController.last_snapshot_time = time.strftime("%H:%M:%S")
-        cv2.imwrite(f"{self._mediaOutputPath}/{self._deviceName}-{currentTimeStr}.png", img)
+        if self._snapshotOut is None:
+            self._snapshotOut = SnapshotWriter()
+        path = f"{self._mediaOutputPath}/{self._deviceName}-{currentTimeStr}"
+        self._snapshotOut.submit(img, f"{path}.png")
+        if self._presented is not None:
+            self._snapshotRadiometric(path)
         return self._guiController.last_snapshot_time
 
-    def normalizeTemperature(self, rawTemp: float, d: int = 64, c: float = 273.15) -> float:
+    def _snapshotRadiometric(self, path: str):
+        """
+        Starts a radiometric snapshot (see recording.snapshots) of the presented frame and, for bursts, the frames after it.
+        """
+        # A burst still running is cut short, so snapshots never overlap
+        if self._burst is not None:
+            self._burst.submit()
+        if self._radiometricOut is None:
+            self._radiometricOut = RadiometricSnapshotWriter()
+        thm_pic, timestamp, stats = self._presented
+        gui = self._guiController
+        settings = {
+            "colormap": gui.colormap.name,
+            "renderMode": gui.renderMode.name,
+            "filterMode": gui.filterMode.name,
+            "scale": gui.scale,
+            "contrast": gui.contrast,
+            "blurRadius": gui.blurRadius,
+            "threshold": gui.threshold,
+            "inverted": gui.isInverted}
+        # Wall clock time of the frame, from its monotonic capture time
+        wallTime = time.time() - (time.monotonic() - timestamp)
+        metadata = snapshotMetadata(self._deviceName, wallTime, self._correction, settings, stats)
+        self._burst = self._radiometricOut.burst(f"{path}.{SNAPSHOT_EXTENSION}", self._snapshotBurst, self._width, self._height, metadata)
+        if self._burst.add(thm_pic, timestamp) == True:
+            self._burst = None
+
+    def _snapshotFrame(self, thm_pic, timestamp: float, stats: FrameStats):
         """
-        Normalizes/converts the raw temperature data using the formula found by LeoDJ.
+        Remembers a frame about to be presented and adds it to the burst snapshot being taken, if any.
+        """
+        if self._burst is not None and self._burst.add(thm_pic, timestamp) == True:
+            self._burst = None
+        self._presented = (thm_pic, timestamp, stats)
+
+    @property
+    def correction(self) -> RadiometricCorrection:
+        """
+        The radiometric correction (emissivity, reflected temperature, atmosphere) applied to every temperature.
+        """
+        return self._correction
+
+    @property
+    def agc(self) -> AutoGainControl:
+        """
+        The automatic gain control mapping the thermal data to 8 bits for the thermal render modes.
+        """
+        return self._agc
+
+    @correction.setter
+    def correction(self, correction: RadiometricCorrection):
+        self._correction = correction
+        self._guiController.correction = correction
+        # Per-pixel conversions switch to the table of the new parameters (built once, then cached)
+        self._temperatureLUT.update(correction=correction)
+
+    def normalizeTemperature(self, rawTemp: float, d: int = RAW_TEMPERATURE_DIVISOR, c: float = KELVIN_OFFSET) -> float:
+        """
+        Normalizes/converts the raw temperature data using the formula found by LeoDJ, with the radiometric correction applied.
         Link: https://www.eevblog.com/forum/thermal-imaging/infiray-and-their-p2-pro-discussion/200/
         """
-        return (rawTemp/d) - c
+        return rawToCelsius(rawTemp, d, c, self._correction)
+
+    def rawTemperature(self, temp: float, d: int = RAW_TEMPERATURE_DIVISOR, c: float = KELVIN_OFFSET) -> float:
+        """
+        Converts a temperature back to the raw sensor value (the inverse of normalizeTemperature()).
+        """
+        return celsiusToRaw(temp, d, c, self._correction)
+
+    @property
+    def temperatureMap(self) -> TemperatureMap:
+        """
+        The temperatures (C) of every pixel of the last rendered frame, converted on first access.
+        """
+        return self._temperatureMap
+
+    def temperatureAt(self, x: int, y: int) -> float:
+        """
+        Returns the temperature (C) of the sensor pixel (x, y) of the last rendered frame.
+        """
+        return self._temperatureMap.at(x, y)
+
+    def calculateStats(self, thdata, withStd: bool = STATS_STD) -> FrameStats:
+        """
+        Calculates the center/min/max/average (and optionally the standard deviation of the) temperatures of the frame
+        in one fused pass (see processing.frameStats), and of every region of interest (see processing.regions).
+        Raw values are converted through the temperature lookup table.
+        """
+        stats = computeFrameStats(thdata, self._temperatureLUT.celsius, withStd=withStd)
+        if self._regionMeter is not None:
+            stats.regions = self._regionMeter.measure(thdata, self._temperatureLUT.celsius)
+        return stats
+
+    def decodeFrame(self, frame):
+        """
+        Splits a raw frame into the YUY2 image plane and the uint16 thermal plane.
+        Both planes are views into the capture buffer, nothing is copied.
+        """
+        # Windows returns the frame as a 2D array with size [1][<number of bytes>],
+        # Linux (V4L2) returns it as a (384, 256, 2) array. Either way it is the same bytes, so flatten it (a view)
+        data = frame.reshape(-1)
+        half = data.size // 2
+
+        # Top half is the YUY2 image, bottom half is the little-endian uint16 thermal data
+        yuv_pic = data[:half].reshape((self._height, self._width, 2))
+        thm_pic = data[half:].view(np.uint16).reshape((self._height, self._width))
+        return yuv_pic, thm_pic
 
-    def calculateTemperature(self, thdata):
+    def processFrame(self, frame, timestamp: float = None):
         """
-        Calculates the (normalized) temperature of the frame.
+        Decodes a raw frame, calculates its temperatures and renders the GUI. Returns the rendered heatmap.
+        The timestamp is the monotonic capture time of the frame, it defaults to now.
         """
-        raw = self.calculateRawTemperature(thdata)
-        return round(self.normalizeTemperature(raw), TEMPERATURE_SIG_DIGITS)
+        governor = self._qualityGovernor
+        if governor is not None:
+            began = time.perf_counter_ns()
+        metrics = self._metrics
+        if metrics is not None:
+            start = time.perf_counter_ns()
+
+        yuv_pic, thm_pic = self.decodeFrame(frame)
+        self._yuvPic, self._thmPic = yuv_pic, thm_pic
+        self._frameTimestamp = timestamp if timestamp is not None else time.monotonic()
+
+        # Reduce frame to frame noise, recordings and raw streams keep the unfiltered plane
+        if self._guiController.filterMode != FilterMode.NONE:
+            thm_pic = self._temporalFilter.apply(thm_pic, self._guiController.filterMode)
+            if metrics is not None:
+                metrics.record("filter", start)
+                start = time.perf_counter_ns()
 
-    def calculateRawTemperature(self, thdata):
+        # Now parse the data from the bottom frame and convert to temp!
+        self._stats = self.calculateStats(thm_pic)
+        if self._statsStore is not None:
+            self._statsStore.append(self._stats, self._frameTimestamp)
+        if metrics is not None:
+            metrics.record("stats", start)
+            start = time.perf_counter_ns()
+
+        # Hotspot alarms
+        if self._hotspotDetector is not None:
+            self._stats.hotspots = self._hotspotDetector.detect(thm_pic, self._stats, self._temperatureLUT.celsius, self.rawTemperature, self._frameTimestamp)
+            if metrics is not None:
+                metrics.record("hotspots", start)
+        heatmap = self.renderFrame(yuv_pic, thm_pic, self._stats)
+
+        # Adapt the rendering quality of the next frames to the time this one took
+        if governor is not None:
+            self._guiController.quality = governor.update((time.perf_counter_ns() - began)/1e6)
+        return heatmap
+
+    def renderFrame(self, yuv_pic, thm_pic, stats: FrameStats):
         """
-        Calculates the raw temperature of the center of the frame.
+        Renders the heatmap and GUI of a decoded frame. Returns the rendered heatmap.
         """
-        return thdata[self._height // 2][self._width // 2]
+        metrics = self._metrics
+        if metrics is not None:
+            start = time.perf_counter_ns()
+
+        # Temperatures of the rendered frame, only converted if something asks for them
+        self._temperatureMap.update(thm_pic)
 
-    def calculateAverageTemperature(self, thdata):
+        # Pick the image to render: the camera's own image, or the thermal data mapped to 8 bits
+        if self._guiController.renderMode == RenderMode.IMAGE:
+            imdata = yuv_pic
+        else:
+            imdata = self._agc.apply(thm_pic, self._guiController.renderMode, stats.rawMinimum, stats.rawMaximum)
+            if metrics is not None:
+                metrics.record("agc", start)
+                start = time.perf_counter_ns()
+
+        # Draw GUI elements
+        heatmap = self._guiController.drawGUI(
+            imdata=imdata,
+            stats=stats,
+            isRecording=self._isRecording,
+            temperatures=self._temperatureMap)
+        if metrics is not None:
+            metrics.record("render", start)
+        return heatmap
+
+    def _readFrame(self):
         """
-        Calculates the average temperature of the frame.
+        Reads the next frame from the frame source. Returns (ret, frame, capture timestamp).
         """
-        return round(self.normalizeTemperature(thdata.mean()), TEMPERATURE_SIG_DIGITS)
+        if self._metrics is not None:
+            start = time.perf_counter_ns()
+        ret, frame = self._frameSource.read()
+        timestamp = time.monotonic()
+        self._guiController.statusText = self._frameSource.status
+        if self._metrics is not None and ret == True:
+            self._metrics.record("capture", start)
+            self._metrics.tick("capture")
+        return ret, frame, timestamp
 
-    def calculateMinimumTemperature(self, thdata):
+    def _present(self, heatmap, thm_pic, yuv_pic, timestamp: float, stats: FrameStats, handles: tuple = None) -> bool:
         """
-        Calculates the minimum temperature of the frame.
+        Presents a rendered frame and handles key presses. Returns False when the program should quit.
         """
-        self._lcol, self._lrow = np.unravel_index(np.argmin(thdata), thdata.shape)
-        return round(self.normalizeTemperature(thdata[self._lcol][self._lrow]), TEMPERATURE_SIG_DIGITS)
+        if self.present(heatmap, thm_pic, yuv_pic, timestamp, stats, handles) == False:
+            return False
 
-    def calculateMaximumTemperature(self, thdata):
+        # Check for quit and other inputs
+        metrics = self._metrics
+        if metrics is not None:
+            start = time.perf_counter_ns()
+        if self._pollKeyPress(heatmap) == False:
+            return False
+        if metrics is not None:
+            metrics.record("waitKey", start)
+        return True
+
+    def present(self, heatmap, thm_pic, yuv_pic, timestamp: float, stats: FrameStats, handles: tuple = None) -> bool:
         """
-        Calculates the maximum temperature of the frame.
+        Presentation stage: records, displays and streams a rendered frame (key presses are left to the caller, see handleKey()).
+        Returns False once the frame limit has been reached.
+        handles are the capture and render buffers of the frame when it came through process().
         """
-        # Find the max temperature in the frame
-        self._mcol, self._mrow = np.unravel_index(np.argmax(thdata), thdata.shape)
-        return round(self.normalizeTemperature(thdata[self._mcol][self._mrow]), TEMPERATURE_SIG_DIGITS)
+        metrics = self._metrics
+        self._frameCount += 1
+        self._keepPresented(handles)
+
+        # Check for recording
+        self._recordFrame(heatmap, thm_pic, yuv_pic, timestamp)
+        self._snapshotFrame(thm_pic, timestamp, stats)
+        if metrics is not None:
+            start = time.perf_counter_ns()
 
-    def run(self):
+        # Display image
+        self._guiController.displaySink.show(heatmap)
+        if metrics is not None:
+            # End to end: from the capture of the frame until it was handed to the display
+            metrics.add("latency", (time.monotonic() - timestamp)*1000)
+
+        # Stream to network clients
+        if self._streamServer is not None:
+            self._streamServer.publish(heatmap, stats, thm_pic, timestamp)
+        if metrics is not None:
+            metrics.record("show", start)
+            metrics.tick("present")
+            metrics.dumpIfDue()
+        return not (self._maxFrames > 0 and self._frameCount >= self._maxFrames)
+
+    def _recordFrame(self, heatmap, thm_pic, yuv_pic, timestamp: float):
         """
-        Runs the main runtime loop for the program.
+        Writes a frame to the open recordings, if any.
         """
-        # Initialize video
-        self._cap = cv2.VideoCapture(self._deviceIndex)
+        if self._isRecording == False:
+            return
+        metrics = self._metrics
+        if metrics is not None:
+            start = time.perf_counter_ns()
+        if self._videoOut is not None:
+            self._videoOut.submit(heatmap)
+        if self._rawOut is not None:
+            self._rawOut.write(thm_pic, yuv_pic, timestamp)
+        if metrics is not None:
+            metrics.record("record", start)
 
+    def _pollKeyPress(self, img) -> bool:
         """
-        disable automatic YUY2 -> RGB conversion in OpenCV
+        Polls for and acts on a key press. Returns False when the quit key was pressed.
         """
-        self._cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+        keyPress = self._guiController.displaySink.waitKey(1)
+        if keyPress == ord(KEY_QUIT):
+            return False
+
+        if keyPress != -1:
+            self.handleKey(keyPress, img)
+        return True
+
+    def handleKey(self, keyPress: int, img):
+        """
+        Acts on a key press (other than quit). img is the last presented frame, the one a snapshot saves.
+        """
+        # Settings are shared with the processing stage when pipelined
+        with self._stateLock:
+            self._checkForKeyPress(keyPress=keyPress, img=img)
+
+    @property
+    def gui(self) -> GuiController:
+        """
+        The GUI (render settings and display) of the camera.
+        """
+        return self._guiController
+
+    @property
+    def frameCount(self) -> int:
+        """
+        The number of frames presented.
+        """
+        return self._frameCount
+
+    def stop(self):
+        """
+        Stops capture and closes out recording, the frame source and the display.
+        """
+        self._stopEvent.set()
+        if self._captureThread is not None:
+            self._captureThread.join(timeout=1)
+            self._captureThread = None
+        # Check for recording and close out, writing out queued frames and snapshots
+        self._stopRecording()
+        if self._snapshotOut is not None:
+            self._snapshotOut.close()
+            self._snapshotOut = None
+        if self._burst is not None:
+            self._burst.submit()
+            self._burst = None
+        if self._radiometricOut is not None:
+            self._radiometricOut.close()
+            self._radiometricOut = None
+        if self._statsStore is not None:
+            self._statsStore.close()
+        # Snapshots are written, the frame last presented can be let go
+        self._keepPresented(None)
+        self._frameSource.release()
+        self._guiController.displaySink.close()
+        if self._metrics is not None and self._metrics.dumpPath is not None:
+            self._metrics.dump()
+
+    @property
+    def pipelineStats(self) -> dict:
+        """
+        Returns the put/drop counters of the pipeline queues.
+        """
+        stats = {"presented": self._frameCount}
+        for name, q in (("capture", self._captureQueue), ("present", self._presentQueue)):
+            if q is not None:
+                stats[f"{name}Queued"] = q.putCount
+                stats[f"{name}Dropped"] = q.dropCount
+        for name, writer in (("video", self._videoOut), ("raw", self._rawOut), ("snapshot", self._snapshotOut), ("radiometric", self._radiometricOut)):
+            if writer is not None:
+                for key, value in writer.stats.items():
+                    stats[f"{name}{key.capitalize()}"] = value
+        return stats
+
+    def _releaseCaptured(self, item):
+        """
+        Returns the buffer of a captured frame that was dropped to the frame source.
+        """
+        self._frameSource.releaseFrame(item[2])
+
+    def _skipCaptured(self, item):
+        """
+        Releases a captured frame replaced by a newer one in low latency mode, counting it as skipped.
+        """
+        self._releaseCaptured(item)
+        if self._metrics is not None:
+            self._metrics.tick("skipped")
+
+    def _releaseProcessed(self, item):
+        """
+        Returns the capture and render buffers of a processed frame that was dropped.
+        """
+        self._releaseHandles(item[5])
+
+    def _releaseHandles(self, handles: tuple):
+        frameHandle, renderHandle = handles
+        self._frameSource.releaseFrame(frameHandle)
+        self._guiController.releaseFrame(renderHandle)
+
+    def _keepPresented(self, handles: tuple):
+        """
+        Holds the buffers of the frame being presented (snapshots and key presses may still use it) and releases the
+        ones of the frame presented before.
+        """
+        if self._presentedHandles is not None:
+            self._releaseHandles(self._presentedHandles)
+        self._presentedHandles = handles
+
+    def captureOnce(self) -> bool:
+        """
+        Capture stage: reads the next frame from the source and queues it for process(). Returns False once the source is
+        finished, after closing the capture queue. Needs startCapture() (or a capture queue) first.
+        Every queued frame holds its capture buffer until it has been presented or dropped, so a slow stage never
+        sees its frame overwritten by the source.
+        """
+        if self._stopEvent.is_set() or not self._frameSource.isOpened():
+            self._captureQueue.close()
+            return False
+        ret, frame, timestamp = self._readFrame()
+        if ret == True:
+            self._captureQueue.put((frame, timestamp, self._frameSource.holdFrame()))
+            if self._onCapture is not None:
+                self._onCapture()
+        return True
+
+    def _captureLoop(self):
+        while self.captureOnce() == True:
+            pass
+
+    def startCapture(self, lowLatency: bool = False, onCapture: Callable[[], None] = None) -> threading.Thread:
+        """
+        Opens the frame source and starts a thread running captureOnce() as fast as the source delivers frames.
+        In low latency mode only the newest frame is kept. onCapture is called (on the capture thread) after every
+        queued frame. Returns the capture thread; stop() stops it.
+        """
+        self._stopEvent.clear()
+        self._frameSource.open()
+        self._frameCount = 0
+        self._onCapture = onCapture
+        if lowLatency == True:
+            self._captureQueue = FrameQueue(LOW_LATENCY_QUEUE_SIZE, DROP_OLDEST, onDrop=self._skipCaptured)
+        else:
+            self._captureQueue = FrameQueue(CAPTURE_QUEUE_SIZE, CAPTURE_DROP_POLICY, onDrop=self._releaseCaptured)
+        self._captureThread = threading.Thread(target=self._captureLoop, name=f"capture-{self._deviceName}", daemon=True)
+        self._captureThread.start()
+        return self._captureThread
+
+    @property
+    def capturedCount(self) -> int:
+        """
+        The number of captured frames waiting for process() (the end of capture counts as one).
+        """
+        if self._captureQueue is None:
+            return 0
+        count = self._captureQueue.qsize()
+        return max(count, 1) if self._captureQueue.isClosed else count
+
+    def process(self, timeout: float = QUEUE_POLL_TIMEOUT):
+        """
+        Processing stage: processes the next captured frame. Returns what present() takes: (heatmap, thermal, image,
+        timestamp, stats, handles), or None once capture has finished. Raises queue.Empty if no frame arrives within the
+        timeout; with a timeout of 0 it never waits.
+        The capture and render buffers of the frame stay held until it has been presented or dropped (see _releaseProcessed()).
+        """
+        item = self._captureQueue.get(timeout) if timeout > 0 else self._captureQueue.getNowait()
+        if item is None:
+            return None
+
+        frame, timestamp, frameHandle = item
+        with self._stateLock:
+            heatmap = self.processFrame(frame, timestamp)
+            return (heatmap, self._thmPic, self._yuvPic, self._frameTimestamp, self._stats, (frameHandle, self._guiController.holdFrame()))
+
+    def _processLoop(self):
+        """
+        Processing stage thread of the pipelined mode.
+        """
+        while not self._stopEvent.is_set():
+            try:
+                item = self.process()
+            except queue.Empty:
+                continue
+            if item is None:
+                break
+            self._presentQueue.put(item)
+        self._presentQueue.close()
+
+    def _runPipelined(self) -> int:
+        """
+        Runs capture and processing on their own threads connected by bounded queues,
+        while presentation/recording stays on the calling thread (HighGUI needs it).
+        """
+        self._presentQueue = FrameQueue(PRESENT_QUEUE_SIZE, PRESENT_DROP_POLICY, onDrop=self._releaseProcessed)
+        self.startCapture()
+        processThread = threading.Thread(target=self._processLoop, name="process", daemon=True)
+        processThread.start()
+
+        heatmap = None
+        while True:
+            try:
+                item = self._presentQueue.get()
+            except queue.Empty:
+                # Keep the window responsive while waiting on frames
+                if heatmap is not None and self._pollKeyPress(heatmap) == False:
+                    break
+                continue
+            if item is None or self._present(*item) == False:
+                break
+            heatmap = item[0]
+
+        self._stopEvent.set()
+        processThread.join(timeout=1)
+        self.stop()
+        return self._frameCount
+
+    def _runLowLatency(self) -> int:
+        """
+        Runs capture on its own thread that keeps draining the source, while the calling thread always processes and
+        presents the newest frame. Frames arriving while a frame is processed replace each other in a single slot
+        instead of piling up in the driver buffer; they are counted as skipped.
+        """
+        self.startCapture(lowLatency=True)
+
+        heatmap = None
+        while True:
+            try:
+                item = self.process()
+            except queue.Empty:
+                # Keep the window responsive while waiting on frames
+                if heatmap is not None and self._pollKeyPress(heatmap) == False:
+                    break
+                continue
+            if item is None or self._present(*item) == False:
+                break
+            heatmap = item[0]
+
+        self._stopEvent.set()
+        self._captureThread.join(timeout=1)
+        summary = f"Low latency capture: {self._frameCount} frames shown, {self._captureQueue.dropCount} skipped"
+        metrics = self._metrics
+        if metrics is not None:
+            p50, p99 = metrics.percentiles("latency")
+            summary += f", capture to display latency {round(p50, 1)} ms (p99 {round(p99, 1)} ms)"
+        print(summary)
+        self.stop()
+        return self._frameCount
+
+    def run(self) -> int:
+        """
+        Runs the main runtime loop for the program. Returns the number of frames processed.
+        """
+        if self._pipelined == True:
+            return self._runPipelined()
+        if self._lowLatency == True:
+            return self._runLowLatency()
+
+        # Initialize the frame source
+        self._frameSource.open()
+        self._frameCount = 0
 
         # Start main runtime loop
-        while(self._cap.isOpened()):
-            ret, frame = self._cap.read()
+        while(self._frameSource.isOpened()):
+            ret, frame, timestamp = self._readFrame()
             if ret == True:
-                # Split frame into two parts: image data and thermal data
-                # We use frame[0] since on Windows this is returned as a 2D array with size [1][<number of pixels>]
-                # Other OS are untested
-                imdata, thdata = np.array_split(frame[0], 2)
-
-                # First convert the image to YUV
-                yuv_pic = np.frombuffer(imdata, dtype=np.uint8).reshape((self._height, self._width, 2))
-                # Next convert to RGB
-                rgb_pic = cv2.cvtColor(yuv_pic, cv2.COLOR_YUV2RGB_YUY2)
-                # Assemble the thermal data
-                thm_pic = np.frombuffer(thdata, dtype=np.uint16).reshape((self._height, self._width))
-                
-                # Now parse the data from the bottom frame and convert to temp!
-                # Grab data from the center pixel...
-                self._rawTemp = self.calculateRawTemperature(thm_pic)
-                self._temp = self.calculateTemperature(thm_pic)
-
-                # Calculate minimum temperature
-                self._minTemp = self.calculateMinimumTemperature(thm_pic)
-                
-                # Calculate maximum temperature
-                self._maxTemp = self.calculateMaximumTemperature(thm_pic)
-
-                # Find the average temperature in the frame
-                self._avgTemp = self.calculateAverageTemperature(thm_pic)
-                
-                # Draw GUI elements
-                heatmap = self._guiController.drawGUI(
-                    imdata=rgb_pic,
-                    temp=self._temp,
-                    maxTemp=self._maxTemp,
-                    minTemp=self._minTemp,
-                    averageTemp=self._avgTemp,
-                    isRecording=self._isRecording,
-                    mcol=self._mcol,
-                    mrow=self._mrow,
-                    lcol=self._lcol,
-                    lrow=self._lrow)
-
-                # Check for recording
-                if self._isRecording == True:
-                    self._videoOut.write(heatmap)
-                    
-                # Check for quit and other inputs
-                keyPress = cv2.waitKey(1)
-                if keyPress == ord(KEY_QUIT):
-                    # Check for recording and close out
-                    if self._isRecording == True:
-                        self._videoOut.release()
-                    return
-
-                self._checkForKeyPress(keyPress=keyPress, img=heatmap)
-                
-                # Display image
-                cv2.imshow(self._guiController.windowTitle, heatmap)
+                heatmap = self.processFrame(frame, timestamp)
+                if self._present(heatmap, self._thmPic, self._yuvPic, self._frameTimestamp, self._stats) == False:
+                    break
+
+        self.stop()
+        return self._frameCount
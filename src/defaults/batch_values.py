@@ -0,0 +1,9 @@
+from os import getcwd
+
+### BATCH PROCESSING CONSTANTS
+BATCH_OUTPUT_PATH: str = f"{getcwd()}/batch"
+# Worker processes (0 = one per CPU core)
+BATCH_WORKERS: int = 0
+# Raw dumps (see sources.frameSource.FileFrameSource) are recognized by these extensions, raw recordings by RAW_RECORDING_EXTENSION
+BATCH_RAW_DUMP_EXTENSIONS: list[str] = ["raw", "bin"]
+BATCH_SUMMARY_NAME: str = "summary"
@@ -0,0 +1,12 @@
+from os import path
+
+### DEVICE DISCOVERY CONSTANTS
+# Candidate video device indexes that are probed (0 to DEVICE_PROBE_MAX_INDEX - 1)
+DEVICE_PROBE_MAX_INDEX: int = 8
+# Seconds to wait for all probes, a device that does not answer in time is skipped
+DEVICE_PROBE_TIMEOUT: float = 3.0
+# Discovered devices are cached between runs
+DEVICE_CACHE_PATH: str = path.join(path.expanduser("~"), ".cache", "thermal-camera", "devices.json")
+DEVICE_CACHE_TTL: float = 24*60*60
+# On Windows the cache is keyed on the attached UVC (usbvideo driver) devices, listed in this registry key (under HKLM)
+DEVICE_ENUM_REGISTRY_KEY: str = r"SYSTEM\CurrentControlSet\Services\usbvideo\Enum"
@@ -0,0 +1,20 @@
+from defaults.thermal_values import DEVICE_FPS
+
+### QUALITY GOVERNOR CONSTANTS
+QUALITY_GOVERNOR_ENABLED: bool = False
+# Frame rate the governor tries to hold
+QUALITY_TARGET_FPS: float = DEVICE_FPS
+# Weight of the newest frame time in the moving average
+QUALITY_EMA_ALPHA: float = 0.1
+# Step quality down when the average frame time exceeds this fraction of the frame budget...
+QUALITY_DOWNGRADE_RATIO: float = 0.9
+# ...and back up when it stays below this fraction
+QUALITY_UPGRADE_RATIO: float = 0.5
+# Frames the average has to stay over/under the thresholds before stepping
+QUALITY_DOWNGRADE_FRAMES: int = 5
+QUALITY_UPGRADE_FRAMES: int = 50
+# An upgrade that is undone within this many frames doubles the frames the next upgrade waits for (up to the cap)
+QUALITY_UPGRADE_BACKOFF_FRAMES: int = 100
+QUALITY_UPGRADE_FRAMES_MAX: int = 1600
+# Frames between HUD refreshes at QualityLevel.REDUCED_HUD
+QUALITY_REDUCED_HUD_INTERVAL: int = 5
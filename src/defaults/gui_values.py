@@ -13,3 +13,6 @@ SCALE: int = 3
 SCALE_MAX: int = 5
 SCALE_MIN: int = 1
 SCALE_INCREMENT: int = 1
+# Mouse hover temperature readout
+HOVER_ENABLED: bool = True
+HOVER_COLOR: tuple[int, int, int] = (255, 255, 255)
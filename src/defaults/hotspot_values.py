@@ -0,0 +1,22 @@
+### HOTSPOT ALARM CONSTANTS
+HOTSPOT_ENABLED: bool = False
+# Temperature (C) a region has to reach to raise an alarm, or degrees above the frame's mean if relative
+HOTSPOT_THRESHOLD: float = 50.0
+HOTSPOT_RELATIVE: bool = False
+# A tracked hotspot lasts until it cools below the threshold minus the hysteresis
+HOTSPOT_HYSTERESIS: float = 2.0
+# Regions smaller than this (sensor pixels) are ignored
+HOTSPOT_MIN_AREA: int = 4
+# Frames a hotspot has to stay above the threshold before its alarm starts, and has to be gone before it ends
+HOTSPOT_DEBOUNCE_FRAMES: int = 3
+HOTSPOT_RELEASE_FRAMES: int = 5
+# Maximum centroid movement (sensor pixels) between frames for a region to count as the same hotspot
+HOTSPOT_MATCH_DISTANCE: float = 12.0
+# CSV file alarm events are appended to
+HOTSPOT_LOG_PATH: str = None
+# Events
+HOTSPOT_EVENT_START: str = "start"
+HOTSPOT_EVENT_END: str = "end"
+# Colors (BGR)
+HOTSPOT_ALARM_COLOR: tuple[int, int, int] = (0, 0, 255)
+HOTSPOT_PENDING_COLOR: tuple[int, int, int] = (0, 165, 255)
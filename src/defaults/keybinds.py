@@ -13,5 +13,19 @@ KEY_STOP = 't'
 KEY_SNAPSHOT = 'p'
 KEY_CYCLE_THROUGH_COLORMAPS = 'm'
 KEY_INVERT = 'i'
+KEY_CYCLE_RENDER_MODES = 'g'
+KEY_CYCLE_FILTER_MODES = 'n'
+KEY_INCREASE_EMISSIVITY = 'o'
+KEY_DECREASE_EMISSIVITY = 'l'
+KEY_INCREASE_REFLECTED_TEMP = 'u'
+KEY_DECREASE_REFLECTED_TEMP = 'j'
+KEY_PLAYBACK_PAUSE = ' '
+KEY_PLAYBACK_STEP_BACK = ','
+KEY_PLAYBACK_STEP_FORWARD = '.'
+KEY_PLAYBACK_SEEK_BACK = '['
+KEY_PLAYBACK_SEEK_FORWARD = ']'
+KEY_PLAYBACK_SLOWER = '-'
+KEY_PLAYBACK_FASTER = '='
+KEY_PLAYBACK_RESTART = '0'
 KEY_TOGGLE_HUD = 'h'
 KEY_QUIT = 'q'
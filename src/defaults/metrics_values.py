@@ -0,0 +1,8 @@
+### METRICS CONSTANTS
+METRICS_ENABLED: bool = False
+# Samples kept per stage (ring buffer)
+METRICS_WINDOW: int = 256
+# Periodic dump of the counters (None disables), format picked from the file extension (.csv or .json)
+METRICS_DUMP_PATH: str = None
+# Seconds between dumps (0 or less disables the periodic dump)
+METRICS_DUMP_INTERVAL: float = 10.0
@@ -0,0 +1,10 @@
+### MULTI-CAMERA CONSTANTS
+CAMERA_LAYOUT_WINDOWS: str = "windows"
+CAMERA_LAYOUT_MOSAIC: str = "mosaic"
+CAMERA_LAYOUTS: list[str] = [CAMERA_LAYOUT_WINDOWS, CAMERA_LAYOUT_MOSAIC]
+CAMERA_LAYOUT: str = CAMERA_LAYOUT_WINDOWS
+# Processing workers shared by all cameras (0 = one per camera, up to the number of CPU cores)
+CAMERA_WORKERS: int = 0
+# Mosaic window
+MOSAIC_TITLE: str = "Thermal Cameras"
+MOSAIC_MAX_COLUMNS: int = 3
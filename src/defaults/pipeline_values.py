@@ -0,0 +1,29 @@
+### PIPELINE CONSTANTS
+PIPELINED: bool = False
+# Queue drop policies
+DROP_OLDEST: str = "oldest"
+DROP_NEWEST: str = "newest"
+DROP_BLOCK: str = "block"
+DROP_POLICIES: list[str] = [DROP_OLDEST, DROP_NEWEST, DROP_BLOCK]
+# Capture -> processing queue
+CAPTURE_QUEUE_SIZE: int = 2
+CAPTURE_DROP_POLICY: str = DROP_OLDEST
+# Processing -> presentation/recording queue
+PRESENT_QUEUE_SIZE: int = 2
+PRESENT_DROP_POLICY: str = DROP_OLDEST
+# How long (seconds) a stage waits on an empty queue before checking for shutdown
+QUEUE_POLL_TIMEOUT: float = 0.05
+# Render buffer sets in flight: one being rendered, the ones waiting in the present queue and the one being presented
+RENDER_BUFFER_SLOTS: int = PRESENT_QUEUE_SIZE + 2
+# Capture buffers in flight: the capture and present queues, plus the ones being captured, processed and presented
+CAPTURE_BUFFER_SLOTS: int = CAPTURE_QUEUE_SIZE + PRESENT_QUEUE_SIZE + 3
+# Recording and snapshot writer queues (see recording.mediaWriter)
+VIDEO_WRITER_QUEUE_SIZE: int = 32
+VIDEO_WRITER_DROP_POLICY: str = DROP_NEWEST
+RAW_WRITER_QUEUE_SIZE: int = 32
+RAW_WRITER_DROP_POLICY: str = DROP_NEWEST
+SNAPSHOT_WRITER_QUEUE_SIZE: int = 8
+SNAPSHOT_WRITER_DROP_POLICY: str = DROP_NEWEST
+# Low latency mode: capture keeps draining the device into a single slot, so processing always takes the newest frame
+LOW_LATENCY: bool = False
+LOW_LATENCY_QUEUE_SIZE: int = 1
@@ -1,4 +1,6 @@
 from enums.ColormapEnum import Colormap
+from enums.RenderModeEnum import RenderMode
+from enums.FilterModeEnum import FilterMode
 
 ### IMAGE PROCESSING CONSTANTS
 COLORMAP: Colormap = Colormap.NONE
@@ -17,3 +19,14 @@ THRESHOLD: int = 2
 THRESHOLD_MAX: int = 3
 THRESHOLD_MIN: int = 0
 THRESHOLD_INCREMENT: int = 1
+# Render mode (IMAGE uses the camera's YUY2 image, the others map the thermal plane with automatic gain control)
+RENDER_MODE: RenderMode = RenderMode.IMAGE
+# Automatic gain control
+AGC_CLIP_PERCENT: float = 1.0
+AGC_SMOOTHING: float = 0.2
+AGC_HISTOGRAM_BINS: int = 1024
+AGC_HISTOGRAM_STRIDE: int = 2
+# Temporal noise reduction of the thermal plane (EMA = exponential moving average, BOX = mean of the last N frames)
+TEMPORAL_FILTER: FilterMode = FilterMode.NONE
+TEMPORAL_FILTER_ALPHA: float = 0.3
+TEMPORAL_FILTER_FRAMES: int = 4
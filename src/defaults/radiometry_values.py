@@ -0,0 +1,15 @@
+### RADIOMETRIC CORRECTION CONSTANTS
+# Emissivity of the target (1 disables the correction)
+EMISSIVITY: float = 1.0
+EMISSIVITY_MIN: float = 0.1
+EMISSIVITY_MAX: float = 1.0
+EMISSIVITY_INCREMENT: float = 0.05
+# Apparent temperature (C) of what the target reflects, usually the surroundings
+REFLECTED_TEMP: float = 20.0
+REFLECTED_TEMP_INCREMENT: float = 1.0
+# Air between the camera and the target (a distance of 0 disables the atmospheric correction)
+ATMOSPHERIC_TEMP: float = 20.0
+DISTANCE: float = 0.0
+RELATIVE_HUMIDITY: float = 0.5
+# Atmospheric transmissions remembered (one per set of air conditions)
+RADIOMETRY_CACHE_SIZE: int = 32
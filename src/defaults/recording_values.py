@@ -3,3 +3,26 @@ from os import getcwd
 ### DEFAULT RECORDING CONSTANTS
 MEDIA_OUTPUT_PATH: str = f"{getcwd()}/output"
 RECORDING: bool = True
+# Recording modes
+RECORDING_MODE_VIDEO: str = "video"
+RECORDING_MODE_RAW: str = "raw"
+RECORDING_MODE_BOTH: str = "both"
+RECORDING_MODES: list[str] = [RECORDING_MODE_VIDEO, RECORDING_MODE_RAW, RECORDING_MODE_BOTH]
+RECORDING_MODE: str = RECORDING_MODE_VIDEO
+# Raw recording format
+RAW_RECORDING_EXTENSION: str = "tcraw"
+RAW_RECORDING_INCLUDE_IMAGE: bool = False
+RAW_RECORDING_KEYFRAME_INTERVAL: int = 25
+RAW_RECORDING_COMPRESSION_LEVEL: int = 1
+# Radiometric snapshots (see recording.snapshots): the raw thermal plane and metadata next to every snapshot image
+SNAPSHOT_EXTENSION: str = "npz"
+SNAPSHOT_VERSION: int = 1
+# Consecutive frames stored by one snapshot
+SNAPSHOT_BURST_FRAMES: int = 1
+# Frame statistics stored in the snapshot metadata
+SNAPSHOT_STATS_FIELDS: tuple = ("center", "minimum", "maximum", "mean", "std", "minLoc", "maxLoc", "percentiles")
+# What a video recording does when the frame size changes (scale key) mid-recording
+VIDEO_SCALE_CHANGE_RESCALE: str = "rescale"
+VIDEO_SCALE_CHANGE_ROLL: str = "roll"
+VIDEO_SCALE_CHANGE_POLICIES: list[str] = [VIDEO_SCALE_CHANGE_RESCALE, VIDEO_SCALE_CHANGE_ROLL]
+VIDEO_SCALE_CHANGE_POLICY: str = VIDEO_SCALE_CHANGE_RESCALE
@@ -0,0 +1,5 @@
+### REGION OF INTEREST CONSTANTS
+# JSON file with the regions to measure (see processing.regions.loadRegions)
+ROI_PATH: str = None
+ROI_COLOR: tuple[int, int, int] = (255, 255, 255)
+ROI_LABEL_COLOR: tuple[int, int, int] = (0, 255, 255)
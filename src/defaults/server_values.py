@@ -0,0 +1,10 @@
+### STREAMING SERVER CONSTANTS
+SERVE: bool = False
+# The server has no authentication, so it only listens on this machine unless another address is given
+SERVER_HOST: str = "127.0.0.1"
+SERVER_PORT: int = 8080
+SERVE_RAW: bool = False
+# JPEG quality of the MJPEG stream (0-100)
+STREAM_JPEG_QUALITY: int = 80
+# Frames buffered per client before the oldest is dropped
+STREAM_CLIENT_QUEUE_SIZE: int = 2
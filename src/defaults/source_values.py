@@ -0,0 +1,21 @@
+### FRAME SOURCE CONSTANTS
+FRAME_SOURCE_CAMERA: str = "camera"
+FRAME_SOURCE_FILE: str = "file"
+FRAME_SOURCE_SYNTHETIC: str = "synthetic"
+FRAME_SOURCE_RECORDING: str = "recording"
+FRAME_SOURCE: str = FRAME_SOURCE_CAMERA
+FRAME_SOURCES: list[str] = [FRAME_SOURCE_CAMERA, FRAME_SOURCE_FILE, FRAME_SOURCE_SYNTHETIC, FRAME_SOURCE_RECORDING]
+# Synthetic source
+SYNTHETIC_SEED: int = 0
+SYNTHETIC_AMBIENT_TEMP: float = 22.0
+SYNTHETIC_HOTSPOT_TEMP: float = 60.0
+SYNTHETIC_NOISE: float = 0.15
+# File source
+FILE_SOURCE_LOOP: bool = False
+# Raw recording playback
+PLAYBACK_SPEED: float = 1.0
+PLAYBACK_SPEEDS: list[float] = [0.125, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0]
+PLAYBACK_SEEK_SECONDS: float = 5.0
+# Headless runs
+HEADLESS: bool = False
+MAX_FRAMES: int = 0
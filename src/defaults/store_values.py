@@ -0,0 +1,10 @@
+### STATISTICS STORE CONSTANTS
+# Directory the per-frame statistics are persisted to (None disables the store)
+STATS_STORE_PATH: str = None
+# Rows per on-disk chunk (4 minutes at 25 fps), and the longest time (s) rows stay in memory only
+STATS_STORE_CHUNK_ROWS: int = 6000
+STATS_STORE_FLUSH_INTERVAL: float = 60.0
+# Chunks also hold min/max/mean rollups of this many seconds, used by queries with wider buckets
+STATS_STORE_ROLLUP_SECONDS: float = 10.0
+STATS_STORE_CHUNK_PREFIX: str = "stats"
+STATS_STORE_QUERY_BUCKETS: int = 1000
@@ -11,3 +11,11 @@ TEMPERATURE_MIN = 0
 TEMPERATURE_MAX = 0
 TEMPERATURE_AVG = 0
 TEMPERATURE_SIG_DIGITS = 2
+# Optional frame statistics (each costs an extra pass over the frame)
+STATS_STD: bool = False
+STATS_PERCENTILES: tuple = ()
+# Raw sensor value -> C conversion (see ThermalCameraController.normalizeTemperature())
+RAW_TEMPERATURE_DIVISOR: int = 64
+KELVIN_OFFSET: float = 273.15
+# Raw -> C lookup tables kept per set of conversion parameters
+TEMPERATURE_LUT_CACHE_SIZE: int = 8
@@ -2,6 +2,18 @@ from defaults.gui_values import *
 from defaults.thermal_values import *
 from defaults.recording_values import *
 from defaults.processing_values import *
+from defaults.source_values import *
+from defaults.pipeline_values import *
+from defaults.metrics_values import *
+from defaults.server_values import *
+from defaults.multicamera_values import *
+from defaults.device_values import *
+from defaults.batch_values import *
+from defaults.roi_values import *
+from defaults.hotspot_values import *
+from defaults.store_values import *
+from defaults.radiometry_values import *
+from defaults.governor_values import *
 
 ### MAIN CONSTANTS
 VIDEO_DEVICE_INDEX: int = 1
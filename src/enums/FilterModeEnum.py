@@ -0,0 +1,6 @@
+from enum import Enum
+
+class FilterMode(Enum):
+    NONE = 0
+    EMA = 1
+    BOX = 2
@@ -0,0 +1,8 @@
+from enum import Enum
+
+class QualityLevel(Enum):
+    CUBIC = 0
+    LINEAR = 1
+    NEAREST = 2
+    NO_BLUR = 3
+    REDUCED_HUD = 4
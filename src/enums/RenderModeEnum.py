@@ -0,0 +1,7 @@
+from enum import Enum
+
+class RenderMode(Enum):
+    IMAGE = 0
+    LINEAR = 1
+    PERCENTILE = 2
+    EQUALIZE = 3
@@ -0,0 +1,79 @@
+import threading
+import numpy as np
+
+class BufferPool:
+    """
+    Preallocated, named scratch buffers for OpenCV dst= arguments, so steady-state frames allocate nothing.
+
+    Buffers are only reallocated when the requested shape/dtype changes (e.g. the scale changed).
+    With slots > 1 the pool rotates through independent buffer sets (see advance()). A set handed to another
+    pipeline stage is marked with hold() and skipped by advance() until it is released, so a frame still in use
+    is never overwritten however long the other stage takes; if every set is held, a new one is added.
+    """
+    def __init__(self, slots: int = 1):
+        self.slots: int = max(1, slots)
+        self.allocations: int = 0
+        self._slot: int = 0
+        self._buffers: list[dict] = [{} for _ in range(self.slots)]
+        self._held: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def advance(self):
+        """
+        Moves on to the next buffer set that is not held.
+        """
+        with self._lock:
+            for offset in range(1, self.slots + 1):
+                slot = (self._slot + offset) % self.slots
+                if slot not in self._held:
+                    self._slot = slot
+                    return
+            # Every set is still in use downstream
+            self._buffers.append({})
+            self.slots += 1
+            self._slot = self.slots - 1
+
+    def hold(self) -> int:
+        """
+        Marks the current buffer set as in use until release() is called with the returned handle.
+        """
+        with self._lock:
+            self._held[self._slot] = self._held.get(self._slot, 0) + 1
+            return self._slot
+
+    def release(self, slot: int):
+        """
+        Releases a buffer set held with hold().
+        """
+        with self._lock:
+            count = self._held.get(slot, 0) - 1
+            if count > 0:
+                self._held[slot] = count
+            else:
+                self._held.pop(slot, None)
+
+    @property
+    def heldCount(self) -> int:
+        """
+        The number of buffer sets currently held.
+        """
+        return len(self._held)
+
+    def get(self, name: str, shape: tuple, dtype=np.uint8):
+        """
+        Returns the named buffer of the current set, (re)allocating it if its shape or dtype changed.
+        """
+        buffers = self._buffers[self._slot]
+        buffer = buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            buffers[name] = buffer
+            self.allocations += 1
+        return buffer
+
+    def clear(self):
+        """
+        Drops all buffers.
+        """
+        with self._lock:
+            self._buffers = [{} for _ in range(self.slots)]
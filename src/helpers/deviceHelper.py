@@ -1,18 +1,170 @@
-import cv2
+import cv2, glob, json, os, threading, time
+from dataclasses import dataclass, asdict
 
-def getDevices() -> list[int]:
+from defaults.values import *
+
+@dataclass(slots=True)
+class VideoDevice:
+	"""
+	A video device that could be opened and read from.
+	"""
+	index: int
+	width: int
+	height: int
+	isThermal: bool
+
+def isThermalFrame(frame, frameWidth: int, frameHeight: int, width: int = SENSOR_WIDTH, height: int = SENSOR_HEIGHT) -> bool:
 	"""
-	Returns a list of video device indexes for opencv. 
-	Credit: Patrick Yeadon on StackOverflow - https://stackoverflow.com/questions/8044539/listing-available-devices-in-python-opencv
-	"""
-	index = 0
-	arr = []
-	while True:
-		cap = cv2.VideoCapture(index)
-		if not cap.read()[0]:
-			break
-		else:
-			arr.append(index)
+	Checks a raw (unconverted) frame and the frame size reported by the device for the TC001/TS001 signature:
+	a YUY2 image of width x 2*height, i.e. the image plane stacked on top of the thermal plane, 2 bytes per pixel each.
+	"""
+	return (frame is not None
+		and frameWidth == width
+		and frameHeight == height*2
+		and frame.nbytes == width*height*2*2)
+
+def probeDevice(index: int, width: int = SENSOR_WIDTH, height: int = SENSOR_HEIGHT) -> VideoDevice:
+	"""
+	Opens a video device, reads one raw frame and closes it again. Returns None if the device cannot be read.
+	"""
+	cap = cv2.VideoCapture(index)
+	try:
+		if not cap.isOpened():
+			return None
+		cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+		ret, frame = cap.read()
+		if not ret:
+			return None
+		frameWidth = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+		frameHeight = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+		return VideoDevice(
+			index=index,
+			width=frameWidth,
+			height=frameHeight,
+			isThermal=isThermalFrame(frame, frameWidth, frameHeight, width, height))
+	finally:
 		cap.release()
-		index += 1
-	return arr
+
+def _windowsDeviceFingerprint() -> list:
+	"""
+	Lists the instance ids of the attached UVC devices, which the usbvideo driver keeps in the registry
+	(see DEVICE_ENUM_REGISTRY_KEY). Empty if the driver has never been loaded.
+	"""
+	import winreg
+	fingerprint = []
+	try:
+		with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, DEVICE_ENUM_REGISTRY_KEY) as key:
+			count, _ = winreg.QueryValueEx(key, "Count")
+			for i in range(count):
+				instance, _ = winreg.QueryValueEx(key, str(i))
+				fingerprint.append(instance)
+	except OSError:
+		pass
+	return fingerprint
+
+def _deviceFingerprint() -> list:
+	"""
+	Identifies the set of attached video devices cheaply, without opening them.
+	On Windows this is the list of attached UVC devices. Device nodes are recreated on (re)plug, so on Linux
+	their paths and change times are enough. Elsewhere there is nothing cheap to compare and the cache only expires by age.
+	"""
+	if os.name == "nt":
+		return _windowsDeviceFingerprint()
+	fingerprint = []
+	for path in sorted(glob.glob("/dev/video*")):
+		try:
+			fingerprint.append([path, os.stat(path).st_ctime])
+		except OSError:
+			pass
+	return fingerprint
+
+def _readCache(cachePath: str, maxIndex: int, ttl: float) -> list[VideoDevice]:
+	"""
+	Returns the cached devices, or None if there is no cache or it is stale.
+	"""
+	try:
+		with open(cachePath) as f:
+			cache = json.load(f)
+		if (time.time() - cache["time"] > ttl
+			or cache["maxIndex"] != maxIndex
+			or cache["fingerprint"] != _deviceFingerprint()):
+			return None
+		return [VideoDevice(**device) for device in cache["devices"]]
+	except (OSError, ValueError, KeyError, TypeError):
+		return None
+
+def _writeCache(cachePath: str, maxIndex: int, devices: list[VideoDevice]):
+	try:
+		os.makedirs(os.path.dirname(cachePath), exist_ok=True)
+		with open(cachePath, "w") as f:
+			json.dump({
+				"time": time.time(),
+				"maxIndex": maxIndex,
+				"fingerprint": _deviceFingerprint(),
+				"devices": [asdict(device) for device in devices]}, f)
+	except OSError:
+		# Caching is only an optimization
+		pass
+
+def clearDeviceCache(cachePath: str = DEVICE_CACHE_PATH):
+	"""
+	Forgets the cached devices, the next discovery probes again.
+	"""
+	try:
+		os.remove(cachePath)
+	except FileNotFoundError:
+		pass
+
+def discoverDevices(maxIndex: int = DEVICE_PROBE_MAX_INDEX,
+					timeout: float = DEVICE_PROBE_TIMEOUT,
+					refresh: bool = False,
+					cachePath: str = DEVICE_CACHE_PATH,
+					ttl: float = DEVICE_CACHE_TTL) -> list[VideoDevice]:
+	"""
+	Returns the readable video devices among indexes 0 to maxIndex - 1.
+
+	All candidates are probed at the same time, each on its own thread, and devices that do not answer
+	within the timeout are skipped. The result is cached (see DEVICE_CACHE_PATH) until it is older than ttl
+	or the attached devices change; pass refresh=True to probe regardless.
+	"""
+	if refresh == False and cachePath is not None:
+		devices = _readCache(cachePath, maxIndex, ttl)
+		if devices is not None:
+			return devices
+
+	results: dict[int, VideoDevice] = {}
+	def probe(index: int):
+		try:
+			results[index] = probeDevice(index)
+		except cv2.error:
+			results[index] = None
+
+	# Daemon threads, so a device that hangs in its driver cannot keep the program alive
+	threads = [threading.Thread(target=probe, args=(index,), name=f"probe-{index}", daemon=True) for index in range(maxIndex)]
+	for thread in threads:
+		thread.start()
+	deadline = time.monotonic() + timeout
+	for thread in threads:
+		thread.join(max(0, deadline - time.monotonic()))
+
+	devices = [results[index] for index in range(maxIndex) if results.get(index) is not None]
+
+	# A device that timed out may just be busy, so only cache complete results
+	if cachePath is not None and len(results) == maxIndex:
+		_writeCache(cachePath, maxIndex, devices)
+	return devices
+
+def findThermalDevice(refresh: bool = False) -> int:
+	"""
+	Returns the index of the first thermal camera (see isThermalFrame), or None if there is none.
+	"""
+	for device in discoverDevices(refresh=refresh):
+		if device.isThermal == True:
+			return device.index
+	return None
+
+def getDevices() -> list[int]:
+	"""
+	Returns a list of video device indexes for opencv (see discoverDevices).
+	"""
+	return [device.index for device in discoverDevices()]
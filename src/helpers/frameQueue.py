@@ -0,0 +1,122 @@
+import queue
+import threading
+from typing import Callable
+
+from defaults.pipeline_values import *
+
+class FrameQueue:
+    """
+    A bounded queue between two pipeline stages with an explicit policy for what happens when it is full:
+    - DROP_OLDEST: discard the oldest queued item to make room (consumers always see the freshest frames)
+    - DROP_NEWEST: discard the item being put
+    - DROP_BLOCK: block the producer until there is room
+
+    onDrop is called with every dropped item (including the ones put after close()), e.g. to recycle its buffers.
+    """
+    def __init__(self, maxsize: int, dropPolicy: str = DROP_OLDEST, onDrop: Callable = None):
+        if dropPolicy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy '{dropPolicy}'. Expected one of {DROP_POLICIES}.")
+        self.maxsize: int = maxsize
+        self.dropPolicy: str = dropPolicy
+        self.putCount: int = 0
+        self.dropCount: int = 0
+        self.onDrop: Callable = onDrop
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._space = threading.Condition(self._lock)
+        self._closed = threading.Event()
+        self._sentinel = None
+
+    @property
+    def isClosed(self) -> bool:
+        return self._closed.is_set()
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def put(self, item) -> bool:
+        """
+        Puts an item on the queue following the drop policy. Returns False if an item was dropped.
+        Items put after close() are dropped.
+        """
+        self.putCount += 1
+        with self._lock:
+            while True:
+                if self.isClosed:
+                    self.dropCount += 1
+                    self._dropped(item)
+                    return False
+                try:
+                    self._queue.put_nowait(item)
+                    return True
+                except queue.Full:
+                    pass
+
+                if self.dropPolicy == DROP_BLOCK:
+                    # Wait for the consumer to take an item (or for close())
+                    self._space.wait(QUEUE_POLL_TIMEOUT)
+                    continue
+
+                self.dropCount += 1
+                if self.dropPolicy == DROP_NEWEST:
+                    self._dropped(item)
+                    return False
+
+                # Drop the oldest item and retry (the consumer may have emptied the queue in the meantime)
+                try:
+                    self._dropped(self._queue.get_nowait())
+                except queue.Empty:
+                    pass
+                self._queue.put_nowait(item)
+                return False
+
+    def _dropped(self, item):
+        if self.onDrop is not None and item is not None:
+            self.onDrop(item)
+
+    def _taken(self, item):
+        # Let a blocked producer know there is room again
+        if self.dropPolicy == DROP_BLOCK:
+            with self._lock:
+                self._space.notify()
+        return item
+
+    def get(self, timeout: float = QUEUE_POLL_TIMEOUT):
+        """
+        Gets the next item, or the sentinel once the queue is closed and drained.
+        Raises queue.Empty if nothing arrives within the timeout.
+        """
+        if self.isClosed:
+            return self.getNowait()
+        try:
+            return self._taken(self._queue.get(timeout=timeout))
+        except queue.Empty:
+            if self.isClosed:
+                return self.getNowait()
+            raise
+
+    def getNowait(self):
+        """
+        Gets the next item without waiting, or the sentinel once the queue is closed and drained.
+        Raises queue.Empty if there is none.
+        """
+        try:
+            return self._taken(self._queue.get_nowait())
+        except queue.Empty:
+            if self.isClosed:
+                return self._sentinel
+            raise
+
+    def close(self, sentinel=None):
+        """
+        Closes the queue: no more items are accepted, and once the queued ones are taken the consumer gets the sentinel.
+        Queued items are never discarded. The sentinel is also queued if there is room, to wake up a waiting consumer.
+        """
+        with self._lock:
+            self._sentinel = sentinel
+            self._closed.set()
+            try:
+                self._queue.put_nowait(sentinel)
+            except queue.Full:
+                pass
+            self._space.notify_all()
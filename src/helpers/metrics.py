@@ -0,0 +1,143 @@
+import csv
+import json
+import os
+import time
+import numpy as np
+
+from defaults.metrics_values import *
+
+class FrameMetrics:
+    """
+    Low-overhead per-stage timing for the hot path.
+
+    Each stage keeps its last `window` durations (ms) in a preallocated ring buffer, and each event
+    (e.g. a captured or presented frame) its last `window` monotonic timestamps for rate calculations.
+    Callers guard every call with `if metrics is not None`, so disabled metrics cost a single branch.
+
+    Typical use:
+        start = time.perf_counter_ns()
+        ...
+        metrics.record("stats", start)
+    """
+    def __init__(self, window: int = METRICS_WINDOW, dumpPath: str = METRICS_DUMP_PATH, dumpInterval: float = METRICS_DUMP_INTERVAL):
+        self.window: int = window
+        self.dumpPath: str = dumpPath
+        self.dumpInterval: float = dumpInterval
+        self._samples: dict[str, np.ndarray] = {}
+        self._counts: dict[str, int] = {}
+        self._events: dict[str, np.ndarray] = {}
+        self._eventCounts: dict[str, int] = {}
+        self._lastDump: float = time.monotonic()
+
+    def _ring(self, rings: dict, counts: dict, name: str):
+        ring = rings.get(name)
+        if ring is None:
+            ring = np.zeros(self.window, dtype=np.float64)
+            rings[name] = ring
+            counts[name] = 0
+        return ring
+
+    def add(self, stage: str, durationMs: float):
+        """
+        Adds a duration sample (ms) to a stage.
+        """
+        ring = self._ring(self._samples, self._counts, stage)
+        ring[self._counts[stage] % self.window] = durationMs
+        self._counts[stage] += 1
+
+    def record(self, stage: str, startNs: int):
+        """
+        Adds the time elapsed since startNs (from time.perf_counter_ns()) to a stage.
+        """
+        self.add(stage, (time.perf_counter_ns() - startNs)/1e6)
+
+    def tick(self, event: str):
+        """
+        Records that an event (e.g. "capture", "present") happened now.
+        """
+        ring = self._ring(self._events, self._eventCounts, event)
+        ring[self._eventCounts[event] % self.window] = time.monotonic()
+        self._eventCounts[event] += 1
+
+    def _window(self, rings: dict, counts: dict, name: str):
+        ring = rings.get(name)
+        if ring is None:
+            return None
+        return ring[:min(counts[name], self.window)]
+
+    def rate(self, event: str) -> float:
+        """
+        Returns the rate (per second) of an event over the window.
+        """
+        times = self._window(self._events, self._eventCounts, event)
+        if times is None or len(times) < 2:
+            return 0.0
+        elapsed = times.max() - times.min()
+        return (len(times) - 1)/elapsed if elapsed > 0 else 0.0
+
+    def percentiles(self, stage: str, percentiles: tuple = (50, 99)) -> tuple:
+        """
+        Returns the duration percentiles (ms) of a stage over the window.
+        """
+        samples = self._window(self._samples, self._counts, stage)
+        if samples is None or len(samples) == 0:
+            return tuple(0.0 for _ in percentiles)
+        return tuple(float(v) for v in np.percentile(samples, percentiles))
+
+    def summary(self) -> dict:
+        """
+        Returns the current counters: per-stage count/mean/p50/p99/max (ms) and per-event rates.
+        """
+        stages = {}
+        for stage in self._samples:
+            samples = self._window(self._samples, self._counts, stage)
+            p50, p99 = self.percentiles(stage)
+            stages[stage] = {
+                "count": self._counts[stage],
+                "mean_ms": round(float(samples.mean()), 4),
+                "p50_ms": round(p50, 4),
+                "p99_ms": round(p99, 4),
+                "max_ms": round(float(samples.max()), 4)}
+        rates = {event: round(self.rate(event), 2) for event in self._events}
+        return {"time": time.time(), "stages": stages, "rates": rates}
+
+    def hudLines(self) -> list[str]:
+        """
+        Returns the lines shown in the HUD: capture/present rates and the capture-to-present latency.
+        """
+        p50, p99 = self.percentiles("latency")
+        return [
+            f"FPS: {self.rate('capture'):.1f} / {self.rate('present'):.1f}",
+            f"Lat: {p50:.1f} / {p99:.1f} ms"]
+
+    def dump(self, path: str = None):
+        """
+        Writes the current counters to a file: .json overwrites it with a snapshot, anything else appends CSV rows.
+        """
+        path = path if path is not None else self.dumpPath
+        summary = self.summary()
+        if path.endswith(".json"):
+            with open(path, "w") as f:
+                json.dump(summary, f, indent=2)
+            return
+
+        isNew = not os.path.exists(path)
+        with open(path, "a", newline="") as f:
+            writer = csv.writer(f)
+            if isNew:
+                writer.writerow(["time", "name", "count", "mean_ms", "p50_ms", "p99_ms", "max_ms", "rate"])
+            for stage, values in summary["stages"].items():
+                writer.writerow([summary["time"], stage, values["count"], values["mean_ms"], values["p50_ms"], values["p99_ms"], values["max_ms"], ""])
+            for event, rate in summary["rates"].items():
+                writer.writerow([summary["time"], event, self._eventCounts[event], "", "", "", "", rate])
+
+    def dumpIfDue(self):
+        """
+        Dumps the counters if a dump path is set and the dump interval has passed.
+        """
+        if self.dumpPath is None or self.dumpInterval <= 0:
+            return
+        now = time.monotonic()
+        if now - self._lastDump >= self.dumpInterval:
+            self._lastDump = now
+            self.dump()
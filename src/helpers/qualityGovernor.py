@@ -0,0 +1,109 @@
+from defaults.values import *
+from enums.QualityLevelEnum import QualityLevel
+
+class QualityGovernor:
+    """
+    Holds a target frame rate by trading rendering quality for time.
+
+    Every frame's processing time feeds an exponential moving average. When the average stays above
+    downgradeRatio of the frame budget (1/targetFps) for downgradeFrames frames, quality steps down one level
+    (cubic -> linear -> nearest upscaling, then no blur, then a reduced HUD refresh, see QualityLevel); when it
+    stays below upgradeRatio of the budget for upgradeFrames frames, quality steps back up.
+    The gap between the two ratios and the longer upgrade wait keep the level from flapping. An upgrade that has to
+    be undone within backoffFrames doubles the wait before the next one, up to maxUpgradeFrames.
+
+    Typical use:
+        quality = governor.update(durationMs)
+    """
+    def __init__(self,
+                 targetFps: float = QUALITY_TARGET_FPS,
+                 alpha: float = QUALITY_EMA_ALPHA,
+                 downgradeRatio: float = QUALITY_DOWNGRADE_RATIO,
+                 upgradeRatio: float = QUALITY_UPGRADE_RATIO,
+                 downgradeFrames: int = QUALITY_DOWNGRADE_FRAMES,
+                 upgradeFrames: int = QUALITY_UPGRADE_FRAMES,
+                 backoffFrames: int = QUALITY_UPGRADE_BACKOFF_FRAMES,
+                 maxUpgradeFrames: int = QUALITY_UPGRADE_FRAMES_MAX,
+                 maxLevel: QualityLevel = QualityLevel.REDUCED_HUD):
+        if targetFps <= 0:
+            raise ValueError(f"Target frame rate must be positive, got {targetFps}.")
+        if not 0 < upgradeRatio < downgradeRatio:
+            raise ValueError(f"Upgrade ratio ({upgradeRatio}) must be positive and below the downgrade ratio ({downgradeRatio}).")
+        self.targetFps: float = targetFps
+        self.alpha: float = alpha
+        self.downgradeRatio: float = downgradeRatio
+        self.upgradeRatio: float = upgradeRatio
+        self.downgradeFrames: int = downgradeFrames
+        self.baseUpgradeFrames: int = upgradeFrames
+        self.backoffFrames: int = backoffFrames
+        self.maxUpgradeFrames: int = maxUpgradeFrames
+        self.maxLevel: QualityLevel = maxLevel
+        self.reset()
+
+    def reset(self):
+        """
+        Goes back to full quality and forgets the measured frame times.
+        """
+        self.level: QualityLevel = QualityLevel.CUBIC
+        self.upgradeFrames: int = self.baseUpgradeFrames
+        self.changes: int = 0
+        self._average: float = None
+        self._frame: int = 0
+        self._over: int = 0
+        self._under: int = 0
+        self._lastUpgrade: int = None
+
+    @property
+    def budgetMs(self) -> float:
+        """
+        The time (ms) a frame may take at the target frame rate.
+        """
+        return 1000/self.targetFps
+
+    @property
+    def averageMs(self) -> float:
+        """
+        The moving average of the frame time (ms) at the current level, None until a frame was measured.
+        """
+        return self._average
+
+    def update(self, durationMs: float) -> QualityLevel:
+        """
+        Adds the processing time (ms) of a frame. Returns the quality level the next frame should be rendered at.
+        """
+        self._frame += 1
+        if self._average is None:
+            self._average = durationMs
+        else:
+            self._average += self.alpha*(durationMs - self._average)
+
+        budget = self.budgetMs
+        if self._average > budget*self.downgradeRatio:
+            self._over += 1
+            self._under = 0
+        elif self._average < budget*self.upgradeRatio:
+            self._under += 1
+            self._over = 0
+        else:
+            self._over = self._under = 0
+
+        if self._over >= self.downgradeFrames and self.level.value < self.maxLevel.value:
+            # An upgrade undone this soon was premature, wait longer before the next one
+            if self._lastUpgrade is not None and self._frame - self._lastUpgrade <= self.backoffFrames:
+                self.upgradeFrames = min(self.upgradeFrames*2, self.maxUpgradeFrames)
+            self._lastUpgrade = None
+            self._step(1)
+        elif self._under >= self.upgradeFrames and self.level.value > QualityLevel.CUBIC.value:
+            self._step(-1)
+            self._lastUpgrade = self._frame
+        return self.level
+
+    def _step(self, delta: int):
+        """
+        Moves the quality level by delta steps (positive is cheaper).
+        """
+        self.level = QualityLevel(self.level.value + delta)
+        self.changes += 1
+        self._over = self._under = 0
+        # The average was measured at the old level
+        self._average = None
@@ -6,31 +6,263 @@ A Python program to read, parse and display thermal data from the Topdon TC001 T
 Forked by Riley Meyerkorth on 17 January 2025 to modernize and clean up the program for Windows and the TS001.
 '''
 
+import os
 from argparse import ArgumentParser
-from defaults.values import VIDEO_DEVICE_INDEX
+
+from defaults.values import *
+from enums.RenderModeEnum import RenderMode
+from enums.FilterModeEnum import FilterMode
 from controllers.thermalcameracontroller import ThermalCameraController
+from controllers.cameraSupervisor import CameraSupervisor
+from sources.frameSource import createFrameSource
+from helpers.metrics import FrameMetrics
+from helpers.qualityGovernor import QualityGovernor
+from server.streamServer import StreamServer
+from processing.regions import loadRegions
+from processing.hotspots import HotspotDetector, HotspotEvent
+from processing.radiometry import RadiometricCorrection
+from recording.statsStore import StatsStore
 
 # Initialize argument parsing
 parser = ArgumentParser()
-parser.add_argument("--device", type=int, default=VIDEO_DEVICE_INDEX, help=f"VideoDevice index. Default is 0.")
+parser.add_argument("--device", type=int, nargs="+", default=[VIDEO_DEVICE_INDEX], help=f"VideoDevice index. Pass several indices to run several cameras at once. Default is 0.")
+parser.add_argument("--source", type=str, default=FRAME_SOURCE, choices=FRAME_SOURCES, help=f"Where frames come from. Default is {FRAME_SOURCE}.")
+parser.add_argument("--file", type=str, default=None, help="Raw dump file to replay when using the file source, or raw recording (.tcraw) to play back when using the recording source.")
+parser.add_argument("--loop", action="store_true", default=FILE_SOURCE_LOOP, help="Loop the raw dump file or recording.")
+parser.add_argument("--speed", type=float, default=PLAYBACK_SPEED, help=f"Playback speed of the recording source. Default is {PLAYBACK_SPEED} (real time).")
+parser.add_argument("--seek", type=float, default=0, help="Start playing the recording this many seconds in.")
+parser.add_argument("--headless", action="store_true", default=HEADLESS, help="Run without opening a window.")
+parser.add_argument("--pipelined", action="store_true", default=PIPELINED, help="Run capture, processing and display on separate threads.")
+parser.add_argument("--low-latency", action="store_true", default=LOW_LATENCY, help="Keep draining the camera on a background thread and always process only the newest frame. Implies --metrics.")
+parser.add_argument("--record-mode", type=str, default=RECORDING_MODE, choices=RECORDING_MODES, help=f"What the record key writes: rendered AVI video, raw thermal data or both. Default is {RECORDING_MODE}.")
+parser.add_argument("--record-image", action="store_true", default=RAW_RECORDING_INCLUDE_IMAGE, help="Also store the YUY2 image plane in raw recordings.")
+parser.add_argument("--record-drop-policy", type=str, default=VIDEO_WRITER_DROP_POLICY, choices=DROP_POLICIES, help=f"Which frames a video or raw recording drops when the disk cannot keep up: the newest, the oldest queued, or none (blocks the camera). Default is {VIDEO_WRITER_DROP_POLICY}.")
+parser.add_argument("--record-scale-change", type=str, default=VIDEO_SCALE_CHANGE_POLICY, choices=VIDEO_SCALE_CHANGE_POLICIES, help=f"What a video recording does when the scale changes: rescale frames to the recording's size or roll over to a new file. Default is {VIDEO_SCALE_CHANGE_POLICY}.")
+parser.add_argument("--render-mode", type=str, default=RENDER_MODE.name.lower(), choices=[m.name.lower() for m in RenderMode], help=f"What the heatmap is rendered from: the camera's image, or the thermal data with linear, percentile clipped or histogram equalized gain control. Default is {RENDER_MODE.name.lower()}.")
+parser.add_argument("--filter", type=str, default=TEMPORAL_FILTER.name.lower(), choices=[m.name.lower() for m in FilterMode], help=f"Temporal noise reduction of the thermal data: none, an exponential moving average or the mean of the last frames. Default is {TEMPORAL_FILTER.name.lower()}.")
+parser.add_argument("--filter-alpha", type=float, default=TEMPORAL_FILTER_ALPHA, help=f"Weight of the newest frame in the exponential moving average. Default is {TEMPORAL_FILTER_ALPHA}.")
+parser.add_argument("--filter-frames", type=int, default=TEMPORAL_FILTER_FRAMES, help=f"Number of frames averaged by the box filter. Default is {TEMPORAL_FILTER_FRAMES}.")
+parser.add_argument("--emissivity", type=float, default=EMISSIVITY, help=f"Emissivity of the target (0-1). Default is {EMISSIVITY} (no correction).")
+parser.add_argument("--reflected-temp", type=float, default=REFLECTED_TEMP, help=f"Apparent temperature (C) of what the target reflects. Default is {REFLECTED_TEMP}.")
+parser.add_argument("--atmospheric-temp", type=float, default=ATMOSPHERIC_TEMP, help=f"Temperature (C) of the air between the camera and the target. Default is {ATMOSPHERIC_TEMP}.")
+parser.add_argument("--distance", type=float, default=DISTANCE, help=f"Distance (m) to the target, for the atmospheric correction. Default is {DISTANCE} (no correction).")
+parser.add_argument("--humidity", type=float, default=RELATIVE_HUMIDITY, help=f"Relative humidity (0-1) of the air. Default is {RELATIVE_HUMIDITY}.")
+parser.add_argument("--snapshot-burst", type=int, default=SNAPSHOT_BURST_FRAMES, help=f"Consecutive frames of thermal data stored by the snapshot key. Default is {SNAPSHOT_BURST_FRAMES}.")
+parser.add_argument("--governor", action="store_true", default=QUALITY_GOVERNOR_ENABLED, help="Lower the rendering quality under load (and raise it again when there is headroom) to hold the target frame rate.")
+parser.add_argument("--target-fps", type=float, default=QUALITY_TARGET_FPS, help=f"Frame rate the quality governor holds. Default is {QUALITY_TARGET_FPS}. Implies --governor.")
+parser.add_argument("--metrics", action="store_true", default=METRICS_ENABLED, help="Time every pipeline stage and show frame rates and latency in the HUD.")
+parser.add_argument("--metrics-file", type=str, default=METRICS_DUMP_PATH, help="Periodically dump the timing counters to this file (.csv or .json). Implies --metrics.")
+parser.add_argument("--metrics-interval", type=float, default=METRICS_DUMP_INTERVAL, help=f"Seconds between metrics dumps. Default is {METRICS_DUMP_INTERVAL}.")
+parser.add_argument("--serve", action="store_true", default=SERVE, help="Serve an MJPEG stream and a WebSocket stats feed over HTTP.")
+parser.add_argument("--host", type=str, default=SERVER_HOST, help=f"Address the server listens on. Default is {SERVER_HOST} (this machine only); use 0.0.0.0 to serve the whole network, the server has no authentication.")
+parser.add_argument("--port", type=int, default=SERVER_PORT, help=f"Port the server listens on. Default is {SERVER_PORT}.")
+parser.add_argument("--serve-raw", action="store_true", default=SERVE_RAW, help="Also serve raw uint16 thermal frames over a WebSocket.")
+parser.add_argument("--roi", type=str, default=ROI_PATH, help="JSON file with regions of interest to measure and draw.")
+parser.add_argument("--alarm", action="store_true", default=HOTSPOT_ENABLED, help="Detect and track hotspots above a temperature threshold and raise alarms for them.")
+parser.add_argument("--alarm-threshold", type=float, default=HOTSPOT_THRESHOLD, help=f"Temperature (C) that raises an alarm. Default is {HOTSPOT_THRESHOLD}. Implies --alarm.")
+parser.add_argument("--alarm-relative", action="store_true", help="Treat the alarm threshold as degrees above the frame's mean temperature.")
+parser.add_argument("--alarm-hysteresis", type=float, default=HOTSPOT_HYSTERESIS, help=f"Degrees a hotspot has to cool below the threshold before it is released. Default is {HOTSPOT_HYSTERESIS}.")
+parser.add_argument("--alarm-log", type=str, default=HOTSPOT_LOG_PATH, help="Append alarm events to this CSV file. Implies --alarm.")
+parser.add_argument("--stats-store", type=str, default=STATS_STORE_PATH, help="Persist the per-frame statistics to this directory (query them with statsQuery.py).")
+parser.add_argument("--layout", type=str, default=CAMERA_LAYOUT, choices=CAMERA_LAYOUTS, help=f"How several cameras are displayed: a window per camera or one tiled mosaic window. Default is {CAMERA_LAYOUT}.")
+parser.add_argument("--workers", type=int, default=CAMERA_WORKERS, help="Processing threads shared by several cameras. Default is one per camera, up to the number of CPU cores.")
+parser.add_argument("--frames", type=int, default=MAX_FRAMES, help="Stop after this many frames. Default is 0 (run until quit).")
 args = parser.parse_args()
+if args.pipelined and args.low_latency:
+    parser.error("--pipelined and --low-latency cannot be combined.")
+if args.speed <= 0:
+    parser.error("--speed must be positive.")
+if args.snapshot_burst < 1:
+    parser.error("--snapshot-burst must be at least 1.")
+
+def createCorrection() -> RadiometricCorrection:
+    """
+    Creates the radiometric correction from the arguments.
+    """
+    if not 0 < args.emissivity <= 1:
+        parser.error("--emissivity must be in (0, 1].")
+    return RadiometricCorrection(
+        emissivity=args.emissivity,
+        reflectedTemp=args.reflected_temp,
+        atmosphericTemp=args.atmospheric_temp,
+        distance=args.distance,
+        humidity=args.humidity)
+
+def createQualityGovernor() -> QualityGovernor:
+    """
+    Creates the quality governor of a camera from the arguments. Returns None when the governor is off.
+    """
+    if not (args.governor or args.target_fps != QUALITY_TARGET_FPS):
+        return None
+    if args.target_fps <= 0:
+        parser.error("--target-fps must be positive.")
+    return QualityGovernor(targetFps=args.target_fps)
+
+def createHotspotDetector(name: str = None) -> HotspotDetector:
+    """
+    Creates the hotspot detector of a camera from the arguments, printing its alarm events. Returns None when alarms are off.
+    """
+    if not (args.alarm or args.alarm_threshold != HOTSPOT_THRESHOLD or args.alarm_log is not None):
+        return None
+
+    prefix = f"[{name}] " if name is not None else ""
+    def printEvent(event: HotspotEvent):
+        hotspot = event.hotspot
+        print(f"{prefix}Alarm {event.kind}: hotspot #{hotspot.id} {hotspot.peak} C at {hotspot.peakLoc} ({hotspot.area} px, {event.latency} ms after capture)")
+
+    return HotspotDetector(
+        threshold=args.alarm_threshold,
+        relative=args.alarm_relative,
+        hysteresis=args.alarm_hysteresis,
+        logPath=args.alarm_log,
+        callbacks=[printEvent])
+
+def createMetrics(name: str = None) -> FrameMetrics:
+    """
+    Creates the metrics of a camera from the arguments, dumped to a file per camera when there are several. Returns None when metrics are off.
+    """
+    if not (args.metrics or args.metrics_file is not None or args.low_latency):
+        return None
+    dumpPath = args.metrics_file
+    if dumpPath is not None and name is not None:
+        base, extension = os.path.splitext(dumpPath)
+        dumpPath = f"{base}-{name}{extension}"
+    return FrameMetrics(dumpPath=dumpPath, dumpInterval=args.metrics_interval)
+
+def createStreamServer(port: int = None) -> StreamServer:
+    """
+    Creates and starts a streaming server from the arguments. Returns None when serving is off.
+    """
+    if not (args.serve or args.serve_raw):
+        return None
+    server = StreamServer(host=args.host, port=port if port is not None else args.port, serveRaw=args.serve_raw)
+    server.start()
+    print(f'Serving on http://{args.host}:{server.port}/\n')
+    return server
+
+def runCameras(devices: list[int]):
+    """
+    Runs several cameras from one process (see controllers.cameraSupervisor).
+    Every camera gets its own streaming server, on consecutive ports from --port.
+    """
+    if args.pipelined:
+        parser.error("--pipelined applies to a single camera, several cameras are always processed by a shared pool.")
+
+    # Synthetic cameras get different seeds so they can be told apart
+    sources = [createFrameSource(
+        sourceType=args.source,
+        deviceIndex=dev,
+        path=args.file,
+        frameCount=args.frames,
+        loop=args.loop,
+        seed=dev,
+        speed=args.speed,
+        start=args.seek) for dev in devices]
+
+    servers = [createStreamServer(args.port + i) for i in range(len(devices))]
+    supervisor = CameraSupervisor(
+        frameSources=sources,
+        names=[f"device{dev}" for dev in devices],
+        layout=args.layout,
+        workers=args.workers,
+        headless=args.headless,
+        maxFrames=args.frames,
+        lowLatency=args.low_latency,
+        recordingMode=args.record_mode,
+        recordImage=args.record_image,
+        recordDropPolicy=args.record_drop_policy,
+        scaleChangePolicy=args.record_scale_change,
+        renderMode=RenderMode[args.render_mode.upper()],
+        filterMode=FilterMode[args.filter.upper()],
+        filterAlpha=args.filter_alpha,
+        filterFrames=args.filter_frames,
+        metrics=[createMetrics(f"device{dev}") for dev in devices],
+        streamServers=servers,
+        regions=loadRegions(args.roi) if args.roi is not None else None,
+        hotspotDetectors=[createHotspotDetector(f"device{dev}") for dev in devices],
+        statsStores=[StatsStore(os.path.join(args.stats_store, f"device{dev}")) for dev in devices] if args.stats_store is not None else None,
+        correction=createCorrection(),
+        qualityGovernors=[createQualityGovernor() for dev in devices],
+        snapshotBurst=args.snapshot_burst)
+
+    # Print the credits and bindings
+    ThermalCameraController.printCredits()
+    ThermalCameraController.printBindings()
+    print(f'\nRunning {len(devices)} cameras on {supervisor.workers} processing threads\n')
+    try:
+        supervisor.run()
+    finally:
+        for server in servers:
+            if server is not None:
+                server.stop()
 
 def main():
     # Check for devices
-    if args.device is not None:
-        dev = args.device
+    if args.device is not None and len(args.device) > 1:
+        runCameras(args.device)
+        return
+    elif args.device is not None:
+        dev = args.device[0]
     else:
         dev = VIDEO_DEVICE_INDEX
         
+    # Initialize the frame source
+    source = createFrameSource(
+        sourceType=args.source,
+        deviceIndex=dev,
+        path=args.file,
+        frameCount=args.frames,
+        loop=args.loop,
+        speed=args.speed,
+        start=args.seek)
+
+    # Recordings without the image plane can only be rendered from the thermal data
+    renderMode = RenderMode[args.render_mode.upper()]
+    if args.source == FRAME_SOURCE_RECORDING and source.hasImage == False and renderMode == RenderMode.IMAGE:
+        print('The recording has no image plane, rendering the thermal data instead.\n')
+        renderMode = RenderMode.LINEAR
+
+    # Initialize the metrics
+    metrics = createMetrics()
+
+    # Initialize the streaming server
+    server = createStreamServer()
+
     # Initialize the controller
-    c = ThermalCameraController(deviceIndex=dev)
+    c = ThermalCameraController(
+        deviceIndex=dev,
+        frameSource=source,
+        headless=args.headless,
+        maxFrames=args.frames,
+        pipelined=args.pipelined,
+        lowLatency=args.low_latency,
+        recordingMode=args.record_mode,
+        recordImage=args.record_image,
+        recordDropPolicy=args.record_drop_policy,
+        scaleChangePolicy=args.record_scale_change,
+        renderMode=renderMode,
+        filterMode=FilterMode[args.filter.upper()],
+        filterAlpha=args.filter_alpha,
+        filterFrames=args.filter_frames,
+        metrics=metrics,
+        streamServer=server,
+        regions=loadRegions(args.roi) if args.roi is not None else None,
+        hotspotDetector=createHotspotDetector(),
+        statsStore=StatsStore(args.stats_store) if args.stats_store is not None else None,
+        correction=createCorrection(),
+        qualityGovernor=createQualityGovernor(),
+        snapshotBurst=args.snapshot_burst)
     
     # Print the credits and bindings
     c.printCredits()
     c.printBindings()
     
     # Start the controller
-    c.run()
+    try:
+        c.run()
+    finally:
+        if server is not None:
+            server.stop()
     
 # Basic main call 
 if __name__ == '__main__':
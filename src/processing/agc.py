@@ -0,0 +1,86 @@
+import cv2
+import numpy as np
+
+from defaults.values import *
+from enums.RenderModeEnum import RenderMode
+
+class AutoGainControl:
+    """
+    Maps the uint16 thermal plane to an 8-bit image, so the rendered heatmap reflects actual temperatures.
+
+    - LINEAR: stretches the frame's min/max to 0-255
+    - PERCENTILE: like LINEAR but clips clipPercent of the pixels at either end (ignores a few hot/cold outliers)
+    - EQUALIZE: like LINEAR followed by histogram equalization
+
+    The mapped range is smoothed over time (exponential moving average) so the image does not pump when
+    something hot enters or leaves the scene. All outputs go into preallocated buffers.
+    """
+    def __init__(self,
+                 width: int = SENSOR_WIDTH,
+                 height: int = SENSOR_HEIGHT,
+                 clipPercent: float = AGC_CLIP_PERCENT,
+                 smoothing: float = AGC_SMOOTHING,
+                 histogramBins: int = AGC_HISTOGRAM_BINS,
+                 histogramStride: int = AGC_HISTOGRAM_STRIDE):
+        self.clipPercent: float = clipPercent
+        self.smoothing: float = smoothing
+        self.histogramBins: int = histogramBins
+        self.histogramStride: int = histogramStride
+
+        # Current (smoothed) raw range
+        self.low: float = None
+        self.high: float = None
+
+        self._offset = np.empty((height, width), dtype=np.uint16)
+        self._out = np.empty((height, width), dtype=np.uint8)
+
+    def reset(self):
+        """
+        Forgets the smoothed range, the next frame sets it directly.
+        """
+        self.low = None
+        self.high = None
+
+    def calculateRange(self, thdata, mode: RenderMode, rawMin: float, rawMax: float) -> tuple[float, float]:
+        """
+        Calculates the raw range of a frame to map to 0-255.
+        """
+        if mode != RenderMode.PERCENTILE or self.clipPercent <= 0:
+            return rawMin, rawMax
+
+        # The histogram of a subsampled frame is plenty to find the clip points
+        stride = self.histogramStride
+        sample = np.ascontiguousarray(thdata[::stride, ::stride])
+        hist = cv2.calcHist([sample], [0], None, [self.histogramBins], [rawMin, rawMax + 1]).ravel()
+        cdf = np.cumsum(hist)
+        clip = cdf[-1]*self.clipPercent/100
+        binWidth = (rawMax + 1 - rawMin)/self.histogramBins
+        low = rawMin + np.searchsorted(cdf, clip, side="right")*binWidth
+        high = rawMin + (np.searchsorted(cdf, cdf[-1] - clip) + 1)*binWidth
+        return float(low), float(min(high, rawMax))
+
+    def apply(self, thdata, mode: RenderMode, rawMin: float = None, rawMax: float = None):
+        """
+        Maps the thermal plane to 8 bits. Pass the raw min/max if they are already known (see FrameStats) to save a pass.
+        The returned image is reused by the next call.
+        """
+        if rawMin is None or rawMax is None:
+            rawMin, rawMax, _, _ = cv2.minMaxLoc(thdata)
+        low, high = self.calculateRange(thdata, mode, rawMin, rawMax)
+
+        # Smooth the range over time
+        if self.low is None:
+            self.low, self.high = low, high
+        else:
+            self.low += self.smoothing*(low - self.low)
+            self.high += self.smoothing*(high - self.high)
+        low = self.low
+        high = max(self.high, low + 1)
+
+        # (raw - low)*255/(high - low), saturated to 0-255
+        cv2.subtract(thdata, low, self._offset)
+        cv2.convertScaleAbs(self._offset, self._out, alpha=255/(high - low))
+
+        if mode == RenderMode.EQUALIZE:
+            cv2.equalizeHist(self._out, self._out)
+        return self._out
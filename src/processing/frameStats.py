@@ -0,0 +1,66 @@
+from dataclasses import dataclass, field
+from typing import Callable
+import cv2
+import numpy as np
+
+from defaults.values import *
+
+@dataclass(slots=True)
+class FrameStats:
+    """
+    Per-frame temperature statistics. Temperatures are normalized (C), locations are (x, y) sensor pixels.
+    """
+    rawCenter: int = TEMPERATURE_RAW
+    rawMinimum: float = TEMPERATURE_RAW
+    rawMaximum: float = TEMPERATURE_RAW
+    center: float = TEMPERATURE
+    minimum: float = TEMPERATURE_MIN
+    maximum: float = TEMPERATURE_MAX
+    mean: float = TEMPERATURE_AVG
+    minLoc: tuple[int, int] = (0, 0)
+    maxLoc: tuple[int, int] = (0, 0)
+    std: float = None
+    percentiles: dict[float, float] = field(default_factory=dict)
+    # Per region of interest statistics (see processing.regions)
+    regions: list = field(default_factory=list)
+    # Hotspots seen in the frame (see processing.hotspots)
+    hotspots: list = field(default_factory=list)
+
+def computeFrameStats(thdata,
+                      normalize: Callable[[float], float],
+                      sigDigits: int = TEMPERATURE_SIG_DIGITS,
+                      withStd: bool = STATS_STD,
+                      percentiles: tuple = STATS_PERCENTILES) -> FrameStats:
+    """
+    Calculates the center/min/max/mean temperatures and min/max locations of a uint16 thermal frame.
+
+    min, max and both locations come from a single cv2.minMaxLoc() pass and the mean (and std) from one more
+    native pass, instead of separate argmin/argmax/mean scans. Only the final scalars are converted to C.
+    """
+    height, width = thdata.shape
+    rawMin, rawMax, minLoc, maxLoc = cv2.minMaxLoc(thdata)
+    if withStd == True:
+        rawMean, rawStd = cv2.meanStdDev(thdata)
+        rawMean, rawStd = float(rawMean[0][0]), float(rawStd[0][0])
+    else:
+        rawMean, rawStd = cv2.mean(thdata)[0], None
+    rawCenter = int(thdata[height // 2, width // 2])
+
+    stats = FrameStats(
+        rawCenter=rawCenter,
+        rawMinimum=rawMin,
+        rawMaximum=rawMax,
+        center=round(normalize(rawCenter), sigDigits),
+        minimum=round(normalize(rawMin), sigDigits),
+        maximum=round(normalize(rawMax), sigDigits),
+        mean=round(normalize(rawMean), sigDigits),
+        minLoc=minLoc,
+        maxLoc=maxLoc)
+
+    # Spread of the temperatures around the mean (the conversion is not necessarily linear)
+    if rawStd is not None:
+        stats.std = round((normalize(rawMean + rawStd) - normalize(rawMean - rawStd))/2, sigDigits)
+    if len(percentiles) > 0:
+        values = np.percentile(thdata, percentiles)
+        stats.percentiles = {p: round(normalize(float(v)), sigDigits) for p, v in zip(percentiles, values)}
+    return stats
@@ -0,0 +1,191 @@
+import csv, os, time
+from dataclasses import dataclass, replace
+from typing import Callable
+import cv2
+import numpy as np
+
+from defaults.values import *
+from processing.frameStats import FrameStats
+
+@dataclass(slots=True)
+class Hotspot:
+    """
+    A tracked hot region. Temperatures are normalized (C), locations are sensor pixels.
+    """
+    id: int
+    area: int
+    centroid: tuple[float, float]
+    bbox: tuple[int, int, int, int]
+    peak: float
+    peakLoc: tuple[int, int]
+    # Consecutive frames above the threshold, and consecutive frames not seen at all
+    hotFrames: int = 0
+    missedFrames: int = 0
+    isAlarm: bool = False
+
+@dataclass(slots=True)
+class HotspotEvent:
+    """
+    An alarm starting or ending. latency is the time (ms) from the capture of the frame that triggered it.
+    """
+    kind: str
+    hotspot: Hotspot
+    time: float
+    latency: float
+
+class HotspotDetector:
+    """
+    Finds and tracks every region above a temperature threshold and raises alarms for them.
+
+    Every frame is segmented at sensor resolution: the pixels above the low threshold (threshold - hysteresis) are
+    split into connected components with their area, centroid and bounding box, and each component's peak is read
+    within its bounding box. Components are matched to the hotspots of the previous frame by centroid distance.
+
+    - a new hotspot needs a peak above the threshold, a tracked one lasts while it stays above the low threshold (hysteresis)
+    - its alarm starts after `debounceFrames` consecutive frames above the threshold
+    - its alarm ends after it has not been seen for `releaseFrames` frames
+
+    Events are passed to the callbacks (and appended to the log file) straight from detect(), i.e. on the thread
+    processing the frame. Frames whose maximum is below the low threshold skip the segmentation entirely.
+    """
+    def __init__(self,
+                 width: int = SENSOR_WIDTH,
+                 height: int = SENSOR_HEIGHT,
+                 threshold: float = HOTSPOT_THRESHOLD,
+                 relative: bool = HOTSPOT_RELATIVE,
+                 hysteresis: float = HOTSPOT_HYSTERESIS,
+                 minArea: int = HOTSPOT_MIN_AREA,
+                 debounceFrames: int = HOTSPOT_DEBOUNCE_FRAMES,
+                 releaseFrames: int = HOTSPOT_RELEASE_FRAMES,
+                 matchDistance: float = HOTSPOT_MATCH_DISTANCE,
+                 logPath: str = HOTSPOT_LOG_PATH,
+                 callbacks: list[Callable[[HotspotEvent], None]] = None):
+        self.threshold: float = threshold
+        self.relative: bool = relative
+        self.hysteresis: float = hysteresis
+        self.minArea: int = minArea
+        self.debounceFrames: int = debounceFrames
+        self.releaseFrames: int = releaseFrames
+        self.matchDistance: float = matchDistance
+        self.logPath: str = logPath
+        self.callbacks: list[Callable[[HotspotEvent], None]] = list(callbacks) if callbacks is not None else []
+        self.eventCount: int = 0
+
+        self._tracks: list[Hotspot] = []
+        self._nextId: int = 1
+        self._mask = np.empty((height, width), dtype=np.uint8)
+        self._labels = np.empty((height, width), dtype=np.int32)
+
+    @property
+    def alarms(self) -> list[Hotspot]:
+        """
+        The hotspots currently in alarm.
+        """
+        return [track for track in self._tracks if track.isAlarm == True]
+
+    def reset(self):
+        """
+        Forgets all tracked hotspots without raising end events.
+        """
+        self._tracks = []
+
+    def thresholds(self, meanTemp: float, toRaw: Callable[[float], float]) -> tuple[float, float]:
+        """
+        Returns the raw (high, low) thresholds for a frame.
+        """
+        threshold = self.threshold + (meanTemp if self.relative == True else 0)
+        return toRaw(threshold), toRaw(threshold - self.hysteresis)
+
+    def _segment(self, thdata, rawLow: float) -> list[tuple]:
+        """
+        Returns the (peakRaw, peakLoc, centroid, bbox, area) of every component above rawLow.
+        """
+        cv2.compare(thdata, rawLow, cv2.CMP_GE, dst=self._mask)
+        count, labels, components, centroids = cv2.connectedComponentsWithStats(self._mask, self._labels, connectivity=8)
+
+        detections = []
+        for i in range(1, count):
+            x, y, w, h, area = (int(v) for v in components[i])
+            if area < self.minArea:
+                continue
+            # Peak of the component, other components may share its bounding box
+            inside = (labels[y:y + h, x:x + w] == i).view(np.uint8)
+            _, peakRaw, _, (px, py) = cv2.minMaxLoc(thdata[y:y + h, x:x + w], inside)
+            detections.append((peakRaw, (x + px, y + py), (float(centroids[i][0]), float(centroids[i][1])), (x, y, w, h), area))
+        return detections
+
+    def detect(self,
+               thdata,
+               stats: FrameStats,
+               normalize: Callable[[float], float],
+               toRaw: Callable[[float], float],
+               timestamp: float = None) -> list[Hotspot]:
+        """
+        Segments a uint16 thermal frame, updates the tracked hotspots and raises their events.
+        stats are the frame's statistics, normalize/toRaw convert between raw values and C and timestamp is the
+        monotonic capture time of the frame. Returns the hotspots seen in this frame.
+        """
+        rawHigh, rawLow = self.thresholds(stats.mean, toRaw)
+        detections = self._segment(thdata, rawLow) if stats.rawMaximum >= rawLow else []
+
+        # Hottest first, each claims the closest unclaimed hotspot of the previous frame
+        unmatched = list(self._tracks)
+        seen = []
+        for peakRaw, peakLoc, centroid, bbox, area in sorted(detections, key=lambda d: d[0], reverse=True):
+            track = None
+            bestDistance = self.matchDistance
+            for candidate in unmatched:
+                distance = np.hypot(candidate.centroid[0] - centroid[0], candidate.centroid[1] - centroid[1])
+                if distance <= bestDistance:
+                    track, bestDistance = candidate, distance
+            if track is not None:
+                unmatched.remove(track)
+            elif peakRaw >= rawHigh:
+                track = Hotspot(id=self._nextId, area=area, centroid=centroid, bbox=bbox, peak=0, peakLoc=peakLoc)
+                self._nextId += 1
+                self._tracks.append(track)
+            else:
+                # Warm, but never was hot
+                continue
+
+            track.area, track.centroid, track.bbox, track.peakLoc = area, centroid, bbox, peakLoc
+            track.peak = round(normalize(peakRaw), TEMPERATURE_SIG_DIGITS)
+            track.missedFrames = 0
+            track.hotFrames = track.hotFrames + 1 if peakRaw >= rawHigh else 0
+            if track.isAlarm == False and track.hotFrames >= self.debounceFrames:
+                track.isAlarm = True
+                self._emit(HOTSPOT_EVENT_START, track, timestamp)
+            seen.append(track)
+
+        # Hotspots that went away
+        for track in unmatched:
+            track.missedFrames += 1
+            track.hotFrames = 0
+            if track.missedFrames >= self.releaseFrames:
+                self._tracks.remove(track)
+                if track.isAlarm == True:
+                    self._emit(HOTSPOT_EVENT_END, track, timestamp)
+        return seen
+
+    def _emit(self, kind: str, track: Hotspot, timestamp: float):
+        """
+        Passes an event to the callbacks and the log file.
+        """
+        now = time.monotonic()
+        event = HotspotEvent(
+            kind=kind,
+            hotspot=replace(track),
+            time=time.time(),
+            latency=round((now - timestamp)*1000, 3) if timestamp is not None else 0.0)
+        self.eventCount += 1
+        for callback in self.callbacks:
+            callback(event)
+
+        if self.logPath is not None:
+            isNew = not os.path.exists(self.logPath)
+            with open(self.logPath, "a", newline="") as f:
+                writer = csv.writer(f)
+                if isNew:
+                    writer.writerow(["time", "event", "id", "peak", "x", "y", "area", "latency_ms"])
+                hotspot = event.hotspot
+                writer.writerow([round(event.time, 3), event.kind, hotspot.id, hotspot.peak, hotspot.peakLoc[0], hotspot.peakLoc[1], hotspot.area, event.latency])
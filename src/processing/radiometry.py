@@ -0,0 +1,99 @@
+from dataclasses import dataclass
+from functools import lru_cache
+import numpy as np
+
+from defaults.values import *
+
+# Atmospheric transmission model (FLIR), fitted for the 8-14 um band
+ATMOSPHERE_X: float = 1.9
+ATMOSPHERE_ALPHA1: float = 0.006569
+ATMOSPHERE_ALPHA2: float = 0.01262
+ATMOSPHERE_BETA1: float = -0.002276
+ATMOSPHERE_BETA2: float = -0.00667
+
+@dataclass(frozen=True, slots=True)
+class RadiometricCorrection:
+    """
+    Compensates the camera's reading (which assumes a black body right in front of it) for the target's emissivity,
+    the radiation it reflects and the air in between.
+
+    The radiation reaching the sensor is modelled with Stefan-Boltzmann (T^4, temperatures in K):
+        apparent^4 = tau*e*object^4 + tau*(1 - e)*reflected^4 + (1 - tau)*atmosphere^4
+    where tau is the transmission of the air over the distance. Temperatures here are in C.
+    Instances are immutable and hashable, so they can key the lookup tables built from them (see processing.temperatureMap).
+    """
+    emissivity: float = EMISSIVITY
+    reflectedTemp: float = REFLECTED_TEMP
+    atmosphericTemp: float = ATMOSPHERIC_TEMP
+    distance: float = DISTANCE
+    humidity: float = RELATIVE_HUMIDITY
+
+    @property
+    def transmission(self) -> float:
+        """
+        The transmission (0-1) of the air over the distance, from its temperature and relative humidity.
+        """
+        return atmosphericTransmission(self.atmosphericTemp, self.distance, self.humidity)
+
+    @property
+    def isIdentity(self) -> bool:
+        """
+        Whether the correction leaves temperatures as they are.
+        """
+        return self.emissivity >= 1 and self.transmission >= 1
+
+    def _background(self, tau: float) -> float:
+        """
+        The reflected and atmospheric part of the radiation reaching the sensor (K^4).
+        """
+        reflected = (self.reflectedTemp + KELVIN_OFFSET)**4
+        atmosphere = (self.atmosphericTemp + KELVIN_OFFSET)**4
+        return tau*(1 - self.emissivity)*reflected + (1 - tau)*atmosphere
+
+    def objectTemperature(self, apparent):
+        """
+        Returns the temperature (K) of the target given the apparent temperature (K) measured by the camera. Accepts arrays.
+        """
+        tau = self.transmission
+        radiation = (np.power(apparent, 4, dtype=np.float64) - self._background(tau))/(tau*self.emissivity)
+        # Targets colder than their background read as absolute zero
+        return np.power(np.maximum(radiation, 0), 0.25)
+
+    def apparentTemperature(self, temp):
+        """
+        Returns the apparent temperature (K) the camera measures for a target at the given temperature (K). Accepts arrays.
+        """
+        tau = self.transmission
+        return np.power(tau*self.emissivity*np.power(temp, 4, dtype=np.float64) + self._background(tau), 0.25)
+
+@lru_cache(maxsize=RADIOMETRY_CACHE_SIZE)
+def atmosphericTransmission(atmosphericTemp: float, distance: float, humidity: float) -> float:
+    """
+    The transmission (0-1) of the air over a distance (m) at a temperature (C) and relative humidity (0-1).
+    Cached, so the exponentials are only evaluated once per set of conditions.
+    """
+    if distance <= 0:
+        return 1.0
+    t = atmosphericTemp
+    h2o = humidity*np.exp(1.5587 + 0.06939*t - 0.00027816*t**2 + 0.00000068455*t**3)
+    root = np.sqrt(distance)
+    tau = (ATMOSPHERE_X*np.exp(-root*(ATMOSPHERE_ALPHA1 + ATMOSPHERE_BETA1*np.sqrt(h2o)))
+           + (1 - ATMOSPHERE_X)*np.exp(-root*(ATMOSPHERE_ALPHA2 + ATMOSPHERE_BETA2*np.sqrt(h2o))))
+    return float(min(max(tau, 0.0), 1.0))
+
+def rawToCelsius(raw, d: int = RAW_TEMPERATURE_DIVISOR, c: float = KELVIN_OFFSET, correction: RadiometricCorrection = None):
+    """
+    Converts raw sensor values to C (raw/d is the apparent temperature in K), with an optional radiometric correction.
+    """
+    apparent = raw/d
+    if correction is None or correction.isIdentity:
+        return apparent - c
+    return correction.objectTemperature(apparent) - c
+
+def celsiusToRaw(temp, d: int = RAW_TEMPERATURE_DIVISOR, c: float = KELVIN_OFFSET, correction: RadiometricCorrection = None):
+    """
+    Converts temperatures (C) back to raw sensor values, the inverse of rawToCelsius().
+    """
+    if correction is None or correction.isIdentity:
+        return (temp + c)*d
+    return correction.apparentTemperature(temp + c)*d
@@ -0,0 +1,137 @@
+import json
+from dataclasses import dataclass
+from typing import Callable
+import cv2
+import numpy as np
+
+from defaults.values import *
+
+@dataclass(slots=True)
+class RegionOfInterest:
+    """
+    A named region in sensor coordinates, either a rectangle (x, y, width, height) or a polygon [(x, y), ...].
+    """
+    name: str
+    rect: tuple[int, int, int, int] = None
+    polygon: list[tuple[int, int]] = None
+
+    @property
+    def points(self):
+        """
+        The outline of the region as an int32 (N, 2) array of (x, y) points.
+        """
+        if self.rect is not None:
+            x, y, w, h = self.rect
+            return np.array([(x, y), (x + w, y), (x + w, y + h), (x, y + h)], dtype=np.int32)
+        return np.array(self.polygon, dtype=np.int32).reshape((-1, 2))
+
+    def mask(self, width: int, height: int):
+        """
+        Returns the uint8 mask (1 inside) of the sensor pixels covered by the region.
+        """
+        mask = np.zeros((height, width), dtype=np.uint8)
+        if self.rect is not None:
+            x, y, w, h = self.rect
+            mask[max(y, 0):max(y + h, 0), max(x, 0):max(x + w, 0)] = 1
+        else:
+            cv2.fillPoly(mask, [self.points], 1)
+        return mask
+
+@dataclass(slots=True)
+class RegionStats:
+    """
+    Temperature statistics of a region. Temperatures are normalized (C), locations are (x, y) sensor pixels.
+    """
+    name: str
+    pixels: int
+    minimum: float
+    maximum: float
+    mean: float
+    minLoc: tuple[int, int]
+    maxLoc: tuple[int, int]
+
+def loadRegions(path: str) -> list[RegionOfInterest]:
+    """
+    Loads regions from a JSON file holding a list of {"name": ..., "rect": [x, y, width, height]}
+    and/or {"name": ..., "polygon": [[x, y], ...]} objects.
+    """
+    with open(path) as f:
+        entries = json.load(f)
+    regions = []
+    for i, entry in enumerate(entries):
+        name = entry.get("name", f"ROI {i + 1}")
+        if "rect" in entry:
+            regions.append(RegionOfInterest(name=name, rect=tuple(int(v) for v in entry["rect"])))
+        elif "polygon" in entry:
+            regions.append(RegionOfInterest(name=name, polygon=[(int(x), int(y)) for x, y in entry["polygon"]]))
+        else:
+            raise ValueError(f"Region '{name}' in '{path}' needs a 'rect' or a 'polygon'.")
+    return regions
+
+class RegionMeter:
+    """
+    Measures the min/max/mean temperature and min/max locations of any number of regions in one vectorized pass.
+
+    The regions are rasterized once into a pixel index: the flat sensor indexes of region 0's pixels, then region 1's, ...
+    (a label image sorted by label, which unlike a single label image also allows overlapping regions).
+    Every frame is then one gather of those pixels followed by minimum/maximum/add.reduceat() over the region
+    segments, so the cost depends on the number of covered pixels, not on the number of regions.
+    """
+    def __init__(self, regions: list[RegionOfInterest], width: int = SENSOR_WIDTH, height: int = SENSOR_HEIGHT):
+        self.regions: list[RegionOfInterest] = list(regions)
+        self.width: int = width
+        self.height: int = height
+
+        indexes = []
+        for region in self.regions:
+            index = np.flatnonzero(region.mask(self.width, self.height))
+            if len(index) == 0:
+                raise ValueError(f"Region '{region.name}' does not cover any sensor pixels.")
+            indexes.append(index)
+
+        self._counts = np.array([len(index) for index in indexes], dtype=np.int64)
+        self._starts = np.concatenate(([0], np.cumsum(self._counts)[:-1])).astype(np.intp)
+        self._pixelIndex = np.concatenate(indexes).astype(np.intp)
+        # Region of every gathered pixel, to broadcast per-region results back onto the pixels
+        self._segment = np.repeat(np.arange(len(self.regions), dtype=np.intp), self._counts)
+
+        # Per-frame buffers
+        self._values = np.empty(len(self._pixelIndex), dtype=np.uint16)
+        self._expanded = np.empty(len(self._pixelIndex), dtype=np.uint16)
+        self._matches = np.empty(len(self._pixelIndex), dtype=bool)
+
+    def _firstMatch(self, extremes):
+        """
+        Returns the (x, y) sensor locations of the first pixel of every region holding that region's extreme value.
+        """
+        np.take(extremes, self._segment, out=self._expanded)
+        np.equal(self._values, self._expanded, out=self._matches)
+        positions = np.flatnonzero(self._matches)
+        # Every region holds its own extreme, so the first match at or after its start is inside it
+        pixels = self._pixelIndex[positions[np.searchsorted(positions, self._starts)]]
+        return pixels % self.width, pixels // self.width
+
+    def measure(self, thdata, normalize: Callable, sigDigits: int = TEMPERATURE_SIG_DIGITS) -> list[RegionStats]:
+        """
+        Measures every region of a uint16 thermal frame. normalize converts raw values to C and must accept arrays.
+        """
+        np.take(thdata.reshape(-1), self._pixelIndex, out=self._values)
+        minimums = np.minimum.reduceat(self._values, self._starts)
+        maximums = np.maximum.reduceat(self._values, self._starts)
+        means = np.add.reduceat(self._values, self._starts, dtype=np.uint64)/self._counts
+        minX, minY = self._firstMatch(minimums)
+        maxX, maxY = self._firstMatch(maximums)
+
+        # Only the per-region scalars are converted to C
+        minimums = np.round(normalize(minimums.astype(np.float64)), sigDigits)
+        maximums = np.round(normalize(maximums.astype(np.float64)), sigDigits)
+        means = np.round(normalize(means), sigDigits)
+        return [RegionStats(
+                    name=region.name,
+                    pixels=int(self._counts[i]),
+                    minimum=float(minimums[i]),
+                    maximum=float(maximums[i]),
+                    mean=float(means[i]),
+                    minLoc=(int(minX[i]), int(minY[i])),
+                    maxLoc=(int(maxX[i]), int(maxY[i])))
+                for i, region in enumerate(self.regions)]
@@ -0,0 +1,125 @@
+from typing import Callable
+import numpy as np
+
+from defaults.values import *
+
+# Every value a uint16 thermal pixel can hold
+RAW_VALUES = np.arange(65536, dtype=np.float64)
+
+class TemperatureLUT:
+    """
+    A 65536-entry float32 table holding the temperature (C) of every raw sensor value.
+
+    The table is built by running the scalar conversion over all raw values once, so converting a whole frame is a
+    single np.take() instead of per-pixel arithmetic. Tables are cached per set of conversion parameters: changing
+    the parameters back and forth reuses the tables already built.
+    """
+    def __init__(self, convert: Callable[..., np.ndarray], cacheSize: int = TEMPERATURE_LUT_CACHE_SIZE, **parameters):
+        self.convert: Callable[..., np.ndarray] = convert
+        self.cacheSize: int = cacheSize
+        self.parameters: dict = parameters
+        self.buildCount: int = 0
+        self._tables: dict[tuple, np.ndarray] = {}
+        # Table of the current parameters, None until it is needed again after update()
+        self._table: np.ndarray = None
+
+    @property
+    def key(self) -> tuple:
+        """
+        Identifies the current conversion parameters.
+        """
+        return tuple(sorted(self.parameters.items()))
+
+    @property
+    def table(self) -> np.ndarray:
+        """
+        The table of the current conversion parameters, built on first use.
+        """
+        if self._table is not None:
+            return self._table
+        key = self.key
+        table = self._tables.get(key)
+        if table is None:
+            table = np.asarray(self.convert(RAW_VALUES, **self.parameters), dtype=np.float32)
+            table.flags.writeable = False
+            if len(self._tables) >= self.cacheSize:
+                # Drop the oldest table
+                self._tables.pop(next(iter(self._tables)))
+            self._tables[key] = table
+            self.buildCount += 1
+        self._table = table
+        return table
+
+    def update(self, **parameters):
+        """
+        Changes some conversion parameters. The table is rebuilt (or fetched from the cache) on next use.
+        """
+        self.parameters = {**self.parameters, **parameters}
+        self._table = None
+
+    def celsius(self, raw):
+        """
+        Converts raw values to C through the table. Accepts scalars and arrays; fractional values (e.g. means)
+        are interpolated between the neighbouring entries.
+        """
+        table = self.table
+        last = len(table) - 1
+        if isinstance(raw, (int, float, np.number)):
+            raw = min(max(float(raw), 0.0), float(last))
+            low = min(int(raw), last - 1)
+            lowValue = table.item(low)
+            return lowValue + (raw - low)*(table.item(low + 1) - lowValue)
+        raw = np.clip(np.asarray(raw, dtype=np.float64), 0, last)
+        low = np.minimum(raw.astype(np.intp), last - 1)
+        return table[low] + (raw - low)*(table[low + 1] - table[low])
+
+    def lookup(self, thdata, out=None):
+        """
+        Converts a uint16 thermal frame to a float32 temperature map (C).
+        """
+        # uint16 values are always inside the table, "wrap" only skips the bounds checks
+        return np.take(self.table, thdata, out=out, mode="wrap")
+
+class TemperatureMap:
+    """
+    The temperatures (C) of every pixel of the current thermal frame.
+
+    update() only keeps a reference to the frame; the full map is converted on first access and reused until the next
+    frame (or a new table), and single pixels (at()) are looked up without converting the map at all.
+    """
+    def __init__(self, lut: TemperatureLUT, width: int = SENSOR_WIDTH, height: int = SENSOR_HEIGHT):
+        self.lut: TemperatureLUT = lut
+        self.width: int = width
+        self.height: int = height
+        self._thdata = None
+        self._temperatures = np.empty((height, width), dtype=np.float32)
+        # Table the map was converted with, None while it is out of date
+        self._table: np.ndarray = None
+
+    def update(self, thdata):
+        """
+        Sets the uint16 thermal frame the map describes.
+        """
+        self._thdata = thdata
+        self._table = None
+
+    @property
+    def temperatures(self) -> np.ndarray:
+        """
+        The float32 temperature map of the frame (None before the first frame). Reused, copy it to keep it.
+        """
+        if self._thdata is None:
+            return None
+        table = self.lut.table
+        if self._table is not table:
+            np.take(table, self._thdata, out=self._temperatures, mode="wrap")
+            self._table = table
+        return self._temperatures
+
+    def at(self, x: int, y: int) -> float:
+        """
+        Returns the temperature of the sensor pixel (x, y), or None before the first frame.
+        """
+        if self._thdata is None:
+            return None
+        return float(self.lut.table[self._thdata[y, x]])
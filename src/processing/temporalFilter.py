@@ -0,0 +1,77 @@
+import cv2
+import numpy as np
+
+from defaults.values import *
+from enums.FilterModeEnum import FilterMode
+
+class TemporalFilter:
+    """
+    Temporal noise reduction of the uint16 thermal plane, so temperatures and labels stop flickering.
+
+    - EMA: exponential moving average, average += alpha*(frame - average)
+    - BOX: mean of the last `frames` frames, kept as a running sum over a ring buffer of the raw frames
+      (the oldest frame is subtracted as the newest is added, so the cost does not depend on `frames`)
+
+    All state lives in preallocated buffers updated in place, so filtering allocates nothing per frame.
+    The filter restarts whenever the mode changes.
+    """
+    def __init__(self,
+                 width: int = SENSOR_WIDTH,
+                 height: int = SENSOR_HEIGHT,
+                 alpha: float = TEMPORAL_FILTER_ALPHA,
+                 frames: int = TEMPORAL_FILTER_FRAMES):
+        self.alpha: float = alpha
+        self.frames: int = max(1, frames)
+        self._mode: FilterMode = FilterMode.NONE
+        self._count: int = 0
+        self._slot: int = 0
+
+        self._average = np.zeros((height, width), dtype=np.float32)
+        # The ring holds the frames widened to the type of the sum, mixed type arithmetic would need temporary buffers.
+        # An int32 sum is exact for up to 32768 frames of 16-bit values
+        self._ring = np.zeros((self.frames, height, width), dtype=np.int32)
+        self._sum = np.zeros((height, width), dtype=np.int32)
+        self._scaled = np.empty((height, width), dtype=np.float32)
+        self._out = np.empty((height, width), dtype=np.uint16)
+
+    def reset(self):
+        """
+        Forgets the filtered history, the next frame starts it over.
+        """
+        self._count = 0
+        self._slot = 0
+        self._sum.fill(0)
+
+    def apply(self, thdata, mode: FilterMode):
+        """
+        Filters a thermal plane. Returns it unchanged for FilterMode.NONE, otherwise a filtered plane that is reused by the next call.
+        """
+        if mode == FilterMode.NONE:
+            return thdata
+        if mode != self._mode:
+            self._mode = mode
+            self.reset()
+
+        if mode == FilterMode.EMA:
+            if self._count == 0:
+                np.copyto(self._average, thdata)
+            else:
+                cv2.accumulateWeighted(thdata, self._average, self.alpha)
+            self._count = 1
+            np.rint(self._average, out=self._scaled)
+        else:
+            # Swap the oldest frame in the ring for the new one, and the running sum with it
+            if self._count == self.frames:
+                np.subtract(self._sum, self._ring[self._slot], out=self._sum)
+            else:
+                self._count += 1
+            np.copyto(self._ring[self._slot], thdata)
+            np.add(self._sum, self._ring[self._slot], out=self._sum)
+            self._slot = (self._slot + 1) % self.frames
+            np.copyto(self._scaled, self._sum, casting="same_kind")
+            np.multiply(self._scaled, np.float32(1/self._count), out=self._scaled)
+            np.rint(self._scaled, out=self._scaled)
+
+        # Back to raw sensor units
+        np.copyto(self._out, self._scaled, casting="unsafe")
+        return self._out
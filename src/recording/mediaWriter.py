@@ -0,0 +1,187 @@
+import os
+import queue
+import threading
+from abc import ABC, abstractmethod
+import cv2
+import numpy as np
+
+from defaults.values import *
+from helpers.frameQueue import FrameQueue
+
+class BackgroundWriter(ABC):
+    """
+    Writes frames to disk on a background thread, so encoding and disk stalls never hold up the capture loop.
+
+    submit() copies the frame into a recycled buffer (rendered frames live in buffers the renderer reuses) and queues it
+    on a bounded FrameQueue; when the writer falls behind, the queue's drop policy decides which frames are lost.
+    close() writes out everything still queued before returning.
+    """
+    def __init__(self, name: str, queueSize: int, dropPolicy: str):
+        self.name: str = name
+        self.writtenCount: int = 0
+        self.errorCount: int = 0
+        self.lastError: str = None
+
+        self._free: list = []
+        self._freeLock = threading.Lock()
+        self._queue: FrameQueue = FrameQueue(queueSize, dropPolicy, onDrop=self._recycle)
+        self._closing = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    @property
+    def isOpened(self) -> bool:
+        return not self._closing.is_set()
+
+    @property
+    def stats(self) -> dict:
+        """
+        Returns the queued/dropped/written/pending frame counters of the writer.
+        """
+        return {
+            "queued": self._queue.putCount,
+            "dropped": self._queue.dropCount,
+            "written": self.writtenCount,
+            "pending": self._queue.qsize(),
+            "errors": self.errorCount}
+
+    def acquire(self, shape: tuple, dtype) -> np.ndarray:
+        """
+        Returns a free buffer of the given shape and dtype, allocating one only if none is free.
+        Fill it and hand it over with submit(buffer, copy=False).
+        """
+        with self._freeLock:
+            while len(self._free) > 0:
+                buffer = self._free.pop()
+                if buffer.shape == shape and buffer.dtype == dtype:
+                    return buffer
+        return np.empty(shape, dtype=dtype)
+
+    def _recycle(self, item):
+        with self._freeLock:
+            self._free.append(item[0])
+
+    def submit(self, frame, *args, copy: bool = True) -> bool:
+        """
+        Queues a copy of the frame (with args passed on to _write()). Returns False if a frame was dropped.
+        With copy=False the frame itself is queued: it has to come from acquire() and belongs to the writer afterwards.
+        """
+        if self._closing.is_set():
+            if copy == False:
+                self._recycle((frame,))
+            return False
+        if copy == True:
+            buffer = self.acquire(frame.shape, frame.dtype)
+            np.copyto(buffer, frame)
+            frame = buffer
+        return self._queue.put((frame,) + args)
+
+    def _run(self):
+        """
+        Writer thread: writes queued frames until closed and drained.
+        A frame that fails to write is counted and skipped, the writer keeps draining the queue and always finishes.
+        """
+        try:
+            while True:
+                try:
+                    item = self._queue.get()
+                except queue.Empty:
+                    if self._closing.is_set():
+                        break
+                    continue
+                try:
+                    self._write(*item)
+                    self.writtenCount += 1
+                except Exception as e:
+                    self.errorCount += 1
+                    self.lastError = f"{type(e).__name__}: {e}"
+                finally:
+                    self._recycle(item)
+        finally:
+            self._finish()
+
+    @abstractmethod
+    def _write(self, frame, *args):
+        """
+        Writes one frame. Runs on the writer thread.
+        """
+
+    def _finish(self):
+        """
+        Releases anything held by the writer. Runs on the writer thread once everything was written.
+        """
+        pass
+
+    def close(self, timeout: float = None):
+        """
+        Stops accepting frames and waits until the queued ones are written.
+        """
+        self._closing.set()
+        self._thread.join(timeout)
+
+class VideoFileWriter(BackgroundWriter):
+    """
+    Writes rendered frames to an XVID AVI file on a background thread.
+
+    The file is opened with the size of the first frame. If the frame size changes mid-recording (the scale key),
+    frames are either rescaled to the size of the file or the recording rolls over to a new file (-2, -3, ...) at the new size.
+    """
+    def __init__(self,
+                 path: str,
+                 fps: int = DEVICE_FPS,
+                 scaleChangePolicy: str = VIDEO_SCALE_CHANGE_POLICY,
+                 queueSize: int = VIDEO_WRITER_QUEUE_SIZE,
+                 dropPolicy: str = VIDEO_WRITER_DROP_POLICY):
+        if scaleChangePolicy not in VIDEO_SCALE_CHANGE_POLICIES:
+            raise ValueError(f"Unknown scale change policy '{scaleChangePolicy}'. Expected one of {VIDEO_SCALE_CHANGE_POLICIES}.")
+        self.path: str = path
+        self.fps: int = fps
+        self.scaleChangePolicy: str = scaleChangePolicy
+        self.paths: list[str] = []
+        self.frameSize: tuple[int, int] = None
+
+        self._writer = None
+        self._resized = None
+        super().__init__(f"video-{os.path.basename(path)}", queueSize, dropPolicy)
+
+    def _open(self, frameSize: tuple[int, int]):
+        """
+        Opens the next file of the recording at the given (width, height).
+        """
+        if self._writer is not None:
+            self._writer.release()
+        root, ext = os.path.splitext(self.path)
+        path = self.path if len(self.paths) == 0 else f"{root}-{len(self.paths) + 1}{ext}"
+        #do NOT use mp4 here, it is flakey!
+        self._writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'XVID'), self.fps, frameSize)
+        self.paths.append(path)
+        self.frameSize = frameSize
+
+    def _write(self, frame):
+        frameSize = (frame.shape[1], frame.shape[0])
+        if self._writer is None:
+            self._open(frameSize)
+        elif frameSize != self.frameSize:
+            if self.scaleChangePolicy == VIDEO_SCALE_CHANGE_ROLL:
+                self._open(frameSize)
+            else:
+                if self._resized is None:
+                    self._resized = np.empty((self.frameSize[1], self.frameSize[0], 3), dtype=np.uint8)
+                frame = cv2.resize(frame, self.frameSize, self._resized, interpolation=cv2.INTER_AREA)
+        self._writer.write(frame)
+
+    def _finish(self):
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+
+class SnapshotWriter(BackgroundWriter):
+    """
+    Encodes and writes snapshot images on a background thread.
+    """
+    def __init__(self, queueSize: int = SNAPSHOT_WRITER_QUEUE_SIZE, dropPolicy: str = SNAPSHOT_WRITER_DROP_POLICY):
+        super().__init__("snapshots", queueSize, dropPolicy)
+
+    def _write(self, frame, path: str):
+        if cv2.imwrite(path, frame) == False:
+            raise OSError(f"Could not write snapshot '{path}'.")
@@ -0,0 +1,295 @@
+"""
+Raw radiometric recording container (.tcraw)
+
+    header | chunk 0 | chunk 1 | ... | chunk N-1 | index | footer
+
+- header: magic, version, sensor width/height, fps, flags and the wall clock start time
+- chunk: a frame header (magic, frame index, monotonic timestamp, kind, payload lengths) followed by the
+  zlib-compressed thermal plane and, if the image flag is set, the zlib-compressed YUY2 plane
+- kind: key chunks hold the planes as-is, delta chunks hold the modular (wrapping) difference to the previous frame
+  which compresses far better since consecutive thermal frames barely change
+- index: one (offset, timestamp, kind) entry per frame so any frame can be located without scanning
+- footer: offset of the index, frame count and an end magic
+
+If a recording was not closed cleanly (no footer) the index is rebuilt by scanning the chunks.
+"""
+import mmap
+import os
+import struct
+import time
+import zlib
+import numpy as np
+
+from defaults.values import *
+from recording.mediaWriter import BackgroundWriter
+
+RAW_MAGIC: bytes = b"TCRW"
+RAW_VERSION: int = 1
+RAW_FLAG_IMAGE: int = 1
+CHUNK_MAGIC: bytes = b"FRME"
+INDEX_MAGIC: bytes = b"TIDX"
+CHUNK_KEY: int = 0
+CHUNK_DELTA: int = 1
+
+HEADER = struct.Struct("<4sHHHHHd")
+CHUNK = struct.Struct("<4sIdBII")
+FOOTER = struct.Struct("<QI4s")
+INDEX_DTYPE = np.dtype([("offset", "<u8"), ("timestamp", "<f8"), ("kind", "u1")])
+
+class RawRecorder(BackgroundWriter):
+    """
+    Appends uint16 thermal frames (and optionally the YUY2 image plane) to a raw recording.
+
+    write() only copies the planes into a recycled buffer; delta encoding, compression and the file writes run on a
+    background thread (see recording.mediaWriter.BackgroundWriter). Frames dropped when the disk cannot keep up are
+    simply missing from the recording, deltas are always taken between the frames actually written.
+    """
+    def __init__(self,
+                 path: str,
+                 width: int = SENSOR_WIDTH,
+                 height: int = SENSOR_HEIGHT,
+                 fps: int = DEVICE_FPS,
+                 includeImage: bool = RAW_RECORDING_INCLUDE_IMAGE,
+                 keyframeInterval: int = RAW_RECORDING_KEYFRAME_INTERVAL,
+                 compressionLevel: int = RAW_RECORDING_COMPRESSION_LEVEL,
+                 queueSize: int = RAW_WRITER_QUEUE_SIZE,
+                 dropPolicy: str = RAW_WRITER_DROP_POLICY):
+        self.path: str = path
+        self.width: int = width
+        self.height: int = height
+        self.fps: int = fps
+        self.includeImage: bool = includeImage
+        self.keyframeInterval: int = keyframeInterval
+        self.compressionLevel: int = compressionLevel
+        self.frameCount: int = 0
+        self.bytesWritten: int = 0
+
+        self._index: list[tuple] = []
+        self._startTimestamp: float = None
+        self._prevThermal = None
+        self._prevImage = None
+        self._thermalDelta = np.empty((self.height, self.width), dtype=np.uint16)
+        self._imageDelta = np.empty((self.height, self.width, 2), dtype=np.uint8)
+
+        self._file = open(self.path, "wb")
+        self._append(HEADER.pack(RAW_MAGIC, RAW_VERSION, self.width, self.height, self.fps, RAW_FLAG_IMAGE if self.includeImage else 0, time.time()))
+        super().__init__(f"raw-{os.path.basename(path)}", queueSize, dropPolicy)
+
+    def _append(self, data: bytes):
+        self._file.write(data)
+        self.bytesWritten += len(data)
+
+    def _encode(self, plane, prev, delta, isKey: bool) -> bytes:
+        """
+        Compresses a plane, as-is for key chunks or as the wrapping difference to the previous plane otherwise.
+        """
+        if isKey == False:
+            np.subtract(plane, prev, out=delta)
+            plane = delta
+        return zlib.compress(np.ascontiguousarray(plane).data, self.compressionLevel)
+
+    def write(self, thermal, image=None, timestamp: float = None) -> bool:
+        """
+        Queues a frame. The timestamp should come from time.monotonic() at capture, it defaults to now.
+        Returns False if a frame was dropped.
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        # Both planes go into one buffer, the passed planes may be views into a reused capture buffer
+        thermalBytes = self.width*self.height*2
+        buffer = self.acquire((thermalBytes*2 if self.includeImage else thermalBytes,), np.dtype(np.uint8))
+        buffer[:thermalBytes].view(np.uint16).reshape((self.height, self.width))[:] = thermal
+        if self.includeImage == True:
+            buffer[thermalBytes:].reshape((self.height, self.width, 2))[:] = image
+        return self.submit(buffer, timestamp, copy=False)
+
+    def _write(self, buffer, timestamp: float):
+        """
+        Encodes and appends a frame. Runs on the writer thread.
+        """
+        thermalBytes = self.width*self.height*2
+        thermal = buffer[:thermalBytes].view(np.uint16).reshape((self.height, self.width))
+        image = buffer[thermalBytes:].reshape((self.height, self.width, 2)) if self.includeImage == True else None
+        if self._startTimestamp is None:
+            self._startTimestamp = timestamp
+
+        isKey = self.frameCount % self.keyframeInterval == 0
+        thermalPayload = self._encode(thermal, self._prevThermal, self._thermalDelta, isKey)
+        imagePayload = b""
+        if self.includeImage == True:
+            imagePayload = self._encode(image, self._prevImage, self._imageDelta, isKey)
+
+        # Keep copies of the planes for the next delta, the buffer goes back to the free list
+        if self._prevThermal is None:
+            self._prevThermal = np.array(thermal, dtype=np.uint16)
+            self._prevImage = np.array(image, dtype=np.uint8) if self.includeImage else None
+        else:
+            np.copyto(self._prevThermal, thermal)
+            if self.includeImage == True:
+                np.copyto(self._prevImage, image)
+
+        kind = CHUNK_KEY if isKey else CHUNK_DELTA
+        relativeTimestamp = timestamp - self._startTimestamp
+        self._index.append((self.bytesWritten, relativeTimestamp, kind))
+        self._append(CHUNK.pack(CHUNK_MAGIC, self.frameCount, relativeTimestamp, kind, len(thermalPayload), len(imagePayload)))
+        self._append(thermalPayload)
+        self._append(imagePayload)
+        self.frameCount += 1
+
+    def _finish(self):
+        """
+        Writes the index and footer and closes the file. Runs on the writer thread once every queued frame is written.
+        """
+        try:
+            indexOffset = self.bytesWritten
+            self._append(np.array(self._index, dtype=INDEX_DTYPE).tobytes())
+            self._append(FOOTER.pack(indexOffset, self.frameCount, INDEX_MAGIC))
+        except OSError as e:
+            self.errorCount += 1
+            self.lastError = str(e)
+        self._file.close()
+        self._file = None
+
+    def release(self):
+        """
+        Writes out the queued frames, the index and the footer and closes the file.
+        """
+        self.close()
+
+class RawRecordingReader:
+    """
+    Reads frames back from a raw recording.
+
+    The file is memory mapped: chunks are decompressed straight from the mapping, so only the pages of the frames
+    actually read are loaded (and the OS can evict them again), however large the recording. Any frame is located
+    through the index, and decoding it never takes more than one key chunk and the deltas up to the next one.
+    """
+    def __init__(self, path: str):
+        self.path: str = path
+        self._file = open(self.path, "rb")
+        if HEADER.size > self._fileSize():
+            self._file.close()
+            raise ValueError(f"'{self.path}' is not a raw thermal recording.")
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, version, self.width, self.height, self.fps, flags, self.startTime = HEADER.unpack_from(self._data, 0)
+            if magic != RAW_MAGIC:
+                raise ValueError(f"'{self.path}' is not a raw thermal recording.")
+            if version > RAW_VERSION:
+                raise ValueError(f"'{self.path}' uses an unsupported raw recording version ({version}).")
+            self.hasImage: bool = bool(flags & RAW_FLAG_IMAGE)
+
+            self.index = self._readIndex()
+        except Exception:
+            self._data.close()
+            self._file.close()
+            raise
+        self._keys = np.flatnonzero(self.index["kind"] == CHUNK_KEY)
+
+        # Last decoded frame, so sequential reads only decode one chunk each
+        self._decodedIndex: int = -1
+        self._thermal = np.zeros((self.height, self.width), dtype=np.uint16)
+        self._image = np.zeros((self.height, self.width, 2), dtype=np.uint8)
+
+    @property
+    def frameCount(self) -> int:
+        return len(self.index)
+
+    @property
+    def timestamps(self):
+        """
+        Per-frame timestamps in seconds relative to the first frame.
+        """
+        return self.index["timestamp"]
+
+    @property
+    def duration(self) -> float:
+        """
+        Time in seconds from the first to the last frame.
+        """
+        return float(self.index["timestamp"][-1]) if self.frameCount > 0 else 0.0
+
+    def frameAt(self, timestamp: float) -> int:
+        """
+        Returns the frame shown at a timestamp (seconds relative to the first frame): the last frame captured at or before it.
+        """
+        index = int(np.searchsorted(self.index["timestamp"], timestamp, side="right")) - 1
+        return min(max(index, 0), self.frameCount - 1)
+
+    def _fileSize(self) -> int:
+        self._file.seek(0, 2)
+        return self._file.tell()
+
+    def _readIndex(self):
+        """
+        Reads the footer index, or rebuilds it by scanning the chunks if the recording was not closed cleanly.
+        The index is copied out of the mapping, at 17 bytes per frame.
+        """
+        size = len(self._data)
+        if size >= HEADER.size + FOOTER.size:
+            indexOffset, frameCount, magic = FOOTER.unpack_from(self._data, size - FOOTER.size)
+            if magic == INDEX_MAGIC:
+                return np.frombuffer(self._data, dtype=INDEX_DTYPE, count=frameCount, offset=indexOffset).copy()
+
+        entries = []
+        offset = HEADER.size
+        while offset + CHUNK.size <= size:
+            magic, _, timestamp, kind, thermalLen, imageLen = CHUNK.unpack_from(self._data, offset)
+            end = offset + CHUNK.size + thermalLen + imageLen
+            if magic != CHUNK_MAGIC or end > size:
+                break
+            entries.append((offset, timestamp, kind))
+            offset = end
+        return np.array(entries, dtype=INDEX_DTYPE)
+
+    def _decodeChunk(self, index: int):
+        """
+        Applies chunk `index` on top of the currently decoded planes.
+        """
+        offset = int(self.index["offset"][index])
+        _, _, _, kind, thermalLen, imageLen = CHUNK.unpack_from(self._data, offset)
+        offset += CHUNK.size
+        thermal = np.frombuffer(zlib.decompress(self._data[offset:offset + thermalLen]), dtype=np.uint16).reshape((self.height, self.width))
+        if kind == CHUNK_KEY:
+            np.copyto(self._thermal, thermal)
+        else:
+            np.add(self._thermal, thermal, out=self._thermal)
+
+        if self.hasImage == True:
+            offset += thermalLen
+            image = np.frombuffer(zlib.decompress(self._data[offset:offset + imageLen]), dtype=np.uint8).reshape((self.height, self.width, 2))
+            if kind == CHUNK_KEY:
+                np.copyto(self._image, image)
+            else:
+                np.add(self._image, image, out=self._image)
+        self._decodedIndex = index
+
+    def readFrame(self, index: int):
+        """
+        Returns the (thermal, image, timestamp) of a frame. image is None if the recording has no image plane.
+        The returned planes are reused by the next call, copy them to keep them.
+        """
+        if index < 0 or index >= self.frameCount:
+            raise IndexError(f"Frame {index} is out of range (0-{self.frameCount - 1}).")
+
+        # Decode forward from the closest key chunk unless we are already on the way there
+        key = int(self._keys[np.searchsorted(self._keys, index, side="right") - 1])
+        if self._decodedIndex < key or self._decodedIndex > index:
+            self._decodeChunk(key)
+        for i in range(self._decodedIndex + 1, index + 1):
+            self._decodeChunk(i)
+
+        return self._thermal, (self._image if self.hasImage else None), float(self.index["timestamp"][index])
+
+    def __iter__(self):
+        for i in range(self.frameCount):
+            yield self.readFrame(i)
+
+    def release(self):
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,135 @@
+"""
+Radiometric snapshots (.npz)
+
+Written next to every snapshot image, so a snapshot can be re-measured afterwards. A compressed NumPy archive with:
+- thermal: the raw uint16 thermal planes of the snapshot, (frames, height, width); one frame, or N for burst snapshots
+- timestamps: the capture time of every frame in seconds relative to the first one
+- metadata: a JSON document with the wall clock time of the first frame, the device, the conversion from raw values
+  to temperatures (divisor, Kelvin offset and radiometric correction), the display settings and the statistics shown
+
+The thermal planes are the unfiltered sensor data, like raw recordings (see recording.rawRecording).
+"""
+import json
+import os
+import time
+from dataclasses import asdict, fields
+import numpy as np
+
+from defaults.values import *
+from recording.mediaWriter import BackgroundWriter
+from processing.frameStats import FrameStats
+from processing.radiometry import RadiometricCorrection, rawToCelsius
+
+class RadiometricSnapshot:
+    """
+    A radiometric snapshot read back from disk.
+    """
+    def __init__(self, path: str):
+        self.path: str = path
+        with np.load(path) as archive:
+            self.thermal: np.ndarray = archive["thermal"]
+            self.timestamps: np.ndarray = archive["timestamps"]
+            self.metadata: dict = json.loads(str(archive["metadata"]))
+
+    @property
+    def frameCount(self) -> int:
+        return self.thermal.shape[0]
+
+    @property
+    def correction(self) -> RadiometricCorrection:
+        """
+        The radiometric correction the snapshot was taken with.
+        Unknown keys (e.g. from a newer writer) are ignored, missing ones take their defaults.
+        """
+        stored = self.metadata["conversion"].get("correction", {})
+        return RadiometricCorrection(**{f.name: stored[f.name] for f in fields(RadiometricCorrection) if f.init and f.name in stored})
+
+    def temperatures(self, frame: int = 0, correction: RadiometricCorrection = None) -> np.ndarray:
+        """
+        Converts a frame to temperatures (C), with the snapshot's radiometric correction unless another one is given
+        (e.g. to re-measure with the right emissivity).
+        """
+        conversion = self.metadata["conversion"]
+        return rawToCelsius(
+            self.thermal[frame],
+            conversion["divisor"],
+            conversion["kelvinOffset"],
+            correction if correction is not None else self.correction).astype(np.float32)
+
+class SnapshotBurst:
+    """
+    Collects the thermal planes of consecutive frames into a buffer from the snapshot writer.
+
+    Every frame costs a single plane copy on the calling thread; compressing and writing the burst is left to the writer.
+    """
+    def __init__(self, writer: "RadiometricSnapshotWriter", path: str, frames: int, width: int, height: int, metadata: dict):
+        self.writer: RadiometricSnapshotWriter = writer
+        self.path: str = path
+        self.frames: int = frames
+        self.metadata: dict = metadata
+        self.count: int = 0
+        self._thermal = writer.acquire((frames, height, width), np.dtype(np.uint16))
+        self._timestamps = np.zeros(frames, dtype=np.float64)
+
+    @property
+    def isFull(self) -> bool:
+        return self.count >= self.frames
+
+    def add(self, thermal, timestamp: float) -> bool:
+        """
+        Adds the thermal plane of a frame (and its monotonic capture time). Submits the burst once it is full,
+        returns whether it was.
+        """
+        np.copyto(self._thermal[self.count], thermal)
+        self._timestamps[self.count] = timestamp
+        self.count += 1
+        if self.isFull == True:
+            self.submit()
+            return True
+        return False
+
+    def submit(self):
+        """
+        Hands the frames collected so far over to the writer.
+        """
+        if self._thermal is None:
+            return
+        self.writer.submit(self._thermal, self.path, self.count, self._timestamps[:self.count] - self._timestamps[0], self.metadata, copy=False)
+        self._thermal = None
+
+class RadiometricSnapshotWriter(BackgroundWriter):
+    """
+    Compresses and writes radiometric snapshots (see RadiometricSnapshot) on a background thread.
+    """
+    def __init__(self, queueSize: int = SNAPSHOT_WRITER_QUEUE_SIZE, dropPolicy: str = SNAPSHOT_WRITER_DROP_POLICY):
+        super().__init__("radiometric-snapshots", queueSize, dropPolicy)
+
+    def burst(self, path: str, frames: int, width: int, height: int, metadata: dict) -> SnapshotBurst:
+        """
+        Starts a snapshot of the next frames.
+        """
+        return SnapshotBurst(self, path, frames, width, height, metadata)
+
+    def _write(self, thermal, path: str, count: int, timestamps, metadata: dict):
+        # Write to a temporary file and rename it into place, so a snapshot on disk is always complete
+        temporaryPath = f"{path}.tmp"
+        with open(temporaryPath, "wb") as f:
+            np.savez_compressed(f, thermal=thermal[:count], timestamps=timestamps, metadata=np.array(json.dumps(metadata, default=float)))
+        os.replace(temporaryPath, path)
+
+def snapshotMetadata(deviceName: str, timestamp: float, correction: RadiometricCorrection, settings: dict, stats: FrameStats) -> dict:
+    """
+    Returns the metadata stored with a radiometric snapshot. timestamp is the wall clock time of the first frame,
+    stats the statistics of the first frame (regions and hotspots are left out, they can be recomputed).
+    """
+    return {
+        "version": SNAPSHOT_VERSION,
+        "time": timestamp,
+        "localTime": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp)),
+        "device": deviceName,
+        "conversion": {
+            "divisor": RAW_TEMPERATURE_DIVISOR,
+            "kelvinOffset": KELVIN_OFFSET,
+            "correction": asdict(correction)},
+        "settings": settings,
+        "stats": {name: getattr(stats, name) for name in SNAPSHOT_STATS_FIELDS}}
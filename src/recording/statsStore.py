@@ -0,0 +1,285 @@
+"""
+Per-frame statistics time-series store
+
+    <path>/stats-<first ms>-<last ms>-<rows>.npz
+
+Frames are appended to a structured NumPy ring buffer in memory. Every STATS_STORE_CHUNK_ROWS rows (or every
+STATS_STORE_FLUSH_INTERVAL seconds) the unflushed rows are handed to a background thread that writes them in bulk to a
+compressed chunk file holding one array per column plus a rollup: the count and min/max/mean of every
+temperature per STATS_STORE_ROLLUP_SECONDS, so queries spanning weeks only read the rollups.
+Times are wall clock seconds since the epoch, derived from the monotonic capture timestamps. The times in the file name
+are rounded outwards to whole milliseconds, so the range they give always covers every row of the chunk.
+"""
+import math
+import os
+import queue
+import re
+import threading
+import time
+import numpy as np
+
+from defaults.values import *
+from processing.frameStats import FrameStats
+
+STATS_DTYPE = np.dtype([
+    ("time", "<f8"),
+    ("timestamp", "<f8"),
+    ("center", "<f4"),
+    ("minimum", "<f4"),
+    ("maximum", "<f4"),
+    ("mean", "<f4"),
+    ("minX", "<u2"),
+    ("minY", "<u2"),
+    ("maxX", "<u2"),
+    ("maxY", "<u2")])
+TEMPERATURE_FIELDS: tuple[str, ...] = ("center", "minimum", "maximum", "mean")
+# Downsampled rows and rollups: the start of the bucket, its number of frames and the min/max/mean of every temperature
+DOWNSAMPLED_DTYPE = np.dtype([("time", "<f8"), ("count", "<u4")] + [(f"{field}{kind}", "<f4") for field in TEMPERATURE_FIELDS for kind in ("Min", "Max", "Mean")])
+CHUNK_PATTERN = re.compile(rf"^{STATS_STORE_CHUNK_PREFIX}-(\d+)-(\d+)-(\d+)\.npz$")
+
+def _buckets(times, edges) -> tuple:
+    """
+    Returns the start index of every run of rows falling into the same bucket, and the bucket of each run.
+    """
+    index = np.clip(np.searchsorted(edges, times, side="right") - 1, 0, len(edges) - 2)
+    starts = np.flatnonzero(np.r_[True, index[1:] != index[:-1]])
+    return starts, index[starts]
+
+def _aggregate(rows, starts, bucketTimes):
+    """
+    Combines runs of raw rows, or of downsampled rows (rollups), into one downsampled row per run.
+    """
+    isRaw = rows.dtype == STATS_DTYPE
+    out = np.empty(len(starts), dtype=DOWNSAMPLED_DTYPE)
+    out["time"] = bucketTimes
+    counts = np.diff(np.r_[starts, len(rows)]) if isRaw else np.add.reduceat(rows["count"], starts, dtype=np.uint64)
+    out["count"] = counts
+    for field in TEMPERATURE_FIELDS:
+        if isRaw:
+            minimums = maximums = rows[field]
+            sums = np.add.reduceat(rows[field], starts, dtype=np.float64)
+        else:
+            minimums, maximums = rows[f"{field}Min"], rows[f"{field}Max"]
+            sums = np.add.reduceat(rows[f"{field}Mean"]*rows["count"], starts, dtype=np.float64)
+        out[f"{field}Min"] = np.minimum.reduceat(minimums, starts)
+        out[f"{field}Max"] = np.maximum.reduceat(maximums, starts)
+        out[f"{field}Mean"] = sums/counts
+    return out
+
+def rollup(rows, seconds: float = STATS_STORE_ROLLUP_SECONDS):
+    """
+    Downsamples raw rows (sorted by time) into buckets of the given number of seconds, aligned to the epoch.
+    """
+    if len(rows) == 0:
+        return np.empty(0, dtype=DOWNSAMPLED_DTYPE)
+    bins = np.floor(rows["time"]/seconds)
+    starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+    return _aggregate(rows, starts, bins[starts]*seconds)
+
+class StatsStore:
+    """
+    Append-only, columnar store of per-frame statistics with range queries and min/max/mean downsampling.
+
+    append() only writes one row into the in-memory ring buffer; the disk is only touched by the bulk flushes,
+    which copy the rows out of the ring and queue them for a background thread, so appending never waits on the disk.
+    A store opened read-only must already exist and can only be queried: no flush thread is started.
+    """
+    def __init__(self,
+                 path: str,
+                 chunkRows: int = STATS_STORE_CHUNK_ROWS,
+                 flushInterval: float = STATS_STORE_FLUSH_INTERVAL,
+                 rollupSeconds: float = STATS_STORE_ROLLUP_SECONDS,
+                 readOnly: bool = False):
+        self.path: str = path
+        self.chunkRows: int = chunkRows
+        self.flushInterval: float = flushInterval
+        self.rollupSeconds: float = rollupSeconds
+        self.readOnly: bool = readOnly
+        self.lastError: str = None
+        if self.readOnly == True:
+            if not os.path.isdir(self.path):
+                raise FileNotFoundError(f"There is no statistics store at '{self.path}'.")
+        else:
+            os.makedirs(self.path, exist_ok=True)
+
+        self._ring = np.zeros(self.chunkRows, dtype=STATS_DTYPE)
+        # Rows appended and rows handed to a flush
+        self._count: int = 0
+        self._scheduled: int = 0
+        self._lastFlush: float = time.monotonic()
+        self._lock = threading.Lock()
+        # Chunks queued for the flush thread that are not on disk yet, oldest first
+        self._pending: list[np.ndarray] = []
+        self._queue: queue.Queue = queue.Queue()
+        self._flushThread: threading.Thread = None
+        if self.readOnly == False:
+            self._flushThread = threading.Thread(target=self._run, name="stats-flush", daemon=True)
+            self._flushThread.start()
+        # Monotonic capture timestamps -> wall clock
+        self._clockOffset: float = time.time() - time.monotonic()
+
+        # (first time, last time, rows, file name) of every chunk on disk
+        self._chunks: list[tuple[float, float, int, str]] = []
+        for name in os.listdir(self.path):
+            match = CHUNK_PATTERN.match(name)
+            if match is not None:
+                self._chunks.append((int(match[1])/1000, int(match[2])/1000, int(match[3]), name))
+        self._chunks.sort()
+
+    @property
+    def rowCount(self) -> int:
+        """
+        The number of rows on disk and in memory.
+        """
+        with self._lock:
+            return sum(chunk[2] for chunk in self._chunks) + sum(len(rows) for rows in self._pending) + self._count - self._scheduled
+
+    def append(self, stats: FrameStats, timestamp: float = None):
+        """
+        Appends the statistics of a frame captured at the given monotonic timestamp (now if None).
+        """
+        if self.readOnly == True:
+            raise ValueError(f"The statistics store at '{self.path}' is open read-only.")
+        if timestamp is None:
+            timestamp = time.monotonic()
+        self._ring[self._count % len(self._ring)] = (
+            timestamp + self._clockOffset, timestamp,
+            stats.center, stats.minimum, stats.maximum, stats.mean,
+            stats.minLoc[0], stats.minLoc[1], stats.maxLoc[0], stats.maxLoc[1])
+        self._count += 1
+
+        if self._count - self._scheduled >= self.chunkRows or timestamp - self._lastFlush >= self.flushInterval:
+            self.flush(wait=False)
+
+    def flush(self, wait: bool = True):
+        """
+        Hands the rows not yet on disk to the flush thread as a new chunk. Waits until every queued chunk is written if wait is set.
+        """
+        self._lastFlush = time.monotonic()
+        start, end = self._scheduled, self._count
+        if end > start:
+            rows = self._ring.take(np.arange(start, end) % len(self._ring))
+            with self._lock:
+                self._pending.append(rows)
+                self._scheduled = end
+            self._queue.put(rows)
+        if wait == True:
+            self._queue.join()
+
+    def _run(self):
+        """
+        Flush thread: writes queued chunks until it gets None.
+        """
+        while True:
+            rows = self._queue.get()
+            if rows is not None:
+                self._writeChunk(rows)
+            self._queue.task_done()
+            if rows is None:
+                break
+
+    def _writeChunk(self, rows):
+        """
+        Writes rows to a chunk file. Runs on the flush thread.
+        """
+        first, last = float(rows["time"][0]), float(rows["time"][-1])
+        name = f"{STATS_STORE_CHUNK_PREFIX}-{math.floor(first*1000)}-{math.ceil(last*1000)}-{len(rows)}.npz"
+        path = os.path.join(self.path, name)
+        isWritten = False
+        try:
+            # Written under a temporary name so a chunk is either complete or not there at all
+            with open(f"{path}.tmp", "wb") as f:
+                np.savez_compressed(f, rollup=rollup(rows, self.rollupSeconds), **{column: rows[column] for column in STATS_DTYPE.names})
+            os.replace(f"{path}.tmp", path)
+            isWritten = True
+        except OSError as e:
+            self.lastError = str(e)
+
+        # Failed rows are lost
+        with self._lock:
+            self._pending.pop(0)
+            if isWritten == True:
+                self._chunks.append((first, last, len(rows), name))
+
+    def close(self):
+        """
+        Writes out the rows still in memory and stops the flush thread.
+        """
+        if self._flushThread is not None and self._flushThread.is_alive():
+            self.flush(wait=True)
+            self._queue.put(None)
+            self._flushThread.join()
+
+    def _contents(self) -> tuple[list, np.ndarray]:
+        """
+        Returns the chunks on disk and a copy of the rows not on disk yet, taken at the same moment so a chunk being
+        written out is in exactly one of them.
+        """
+        with self._lock:
+            chunks = list(self._chunks)
+            pending = list(self._pending)
+            start, end = self._scheduled, self._count
+        return chunks, np.concatenate(pending + [self._ring.take(np.arange(start, end) % len(self._ring))])
+
+    @staticmethod
+    def _bounds(chunks: list, memory) -> tuple[float, float]:
+        firsts = [chunk[0] for chunk in chunks] + ([float(memory["time"][0])] if len(memory) > 0 else [])
+        lasts = [chunk[1] for chunk in chunks] + ([float(memory["time"][-1])] if len(memory) > 0 else [])
+        if len(firsts) == 0:
+            return None
+        return min(firsts), max(lasts)
+
+    def timeRange(self) -> tuple[float, float]:
+        """
+        Returns the wall clock times of the first and last rows, or None if the store is empty.
+        """
+        return self._bounds(*self._contents())
+
+    def query(self, start: float = None, end: float = None, buckets: int = 0):
+        """
+        Returns the rows between the wall clock times start and end (seconds since the epoch, None for the first/last row).
+
+        With buckets = 0 the raw STATS_DTYPE rows are returned. Otherwise the range is split into that many buckets of
+        equal width and one DOWNSAMPLED_DTYPE row (frame count and min/max/mean of every temperature) is returned per
+        bucket holding any frames. Buckets at least one rollup wide are computed from the rollups alone; their width and
+        the start of the range are then rounded to whole rollups, so every rollup falls into exactly one bucket.
+        """
+        chunks, memory = self._contents()
+        bounds = self._bounds(chunks, memory)
+        if bounds is None:
+            return np.empty(0, dtype=STATS_DTYPE if buckets == 0 else DOWNSAMPLED_DTYPE)
+        start = bounds[0] if start is None else start
+        end = bounds[1] if end is None else end
+        width = (end - start)/buckets if buckets > 0 else 0
+        useRollups = buckets > 0 and width >= self.rollupSeconds
+        if useRollups == True:
+            width = np.ceil(width/self.rollupSeconds)*self.rollupSeconds
+            start = np.floor(start/self.rollupSeconds)*self.rollupSeconds
+
+        parts = []
+        for first, last, count, name in chunks:
+            if last < start or first > end:
+                continue
+            with np.load(os.path.join(self.path, name)) as chunk:
+                if useRollups == True:
+                    parts.append(chunk["rollup"])
+                else:
+                    rows = np.empty(len(chunk["time"]), dtype=STATS_DTYPE)
+                    for column in STATS_DTYPE.names:
+                        rows[column] = chunk[column]
+                    parts.append(rows)
+        parts.append(rollup(memory, self.rollupSeconds) if useRollups == True else memory)
+
+        rows = np.concatenate(parts)
+        # Chunks are in time order unless the clock was set back
+        if np.any(np.diff(rows["time"]) < 0):
+            rows = rows[np.argsort(rows["time"], kind="stable")]
+        rows = rows[np.searchsorted(rows["time"], start, side="left"):np.searchsorted(rows["time"], end, side="right")]
+        if buckets == 0:
+            return rows
+        if len(rows) == 0:
+            return np.empty(0, dtype=DOWNSAMPLED_DTYPE)
+
+        edges = start + width*np.arange(buckets + 1)
+        starts, indexes = _buckets(rows["time"], edges)
+        return _aggregate(rows, starts, edges[indexes])
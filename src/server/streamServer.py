@@ -0,0 +1,286 @@
+"""
+Headless streaming server.
+
+Endpoints:
+- /            a minimal viewer page
+- /stream.mjpg MJPEG stream of the rendered heatmap
+- /stats.json  the latest frame statistics
+- /stats       WebSocket, one JSON text message per frame with the frame statistics
+- /raw         WebSocket (if enabled), one binary message per frame: RAW_HEADER followed by the uint16 thermal plane
+
+Every frame is encoded once in publish() and the same bytes are handed to every client. Each client has
+its own small queue; when a client cannot keep up its oldest queued frame is dropped, so slow clients
+never back-pressure the capture loop.
+"""
+import asyncio
+import base64
+import collections
+import dataclasses
+import hashlib
+import json
+import struct
+import threading
+import cv2
+
+from defaults.values import *
+from processing.frameStats import FrameStats
+
+WEBSOCKET_GUID: bytes = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MJPEG_BOUNDARY: str = "frame"
+# frame number, monotonic capture timestamp, width, height
+RAW_HEADER = struct.Struct("<IdHH")
+
+VIEWER_PAGE: str = """<!DOCTYPE html>
+<html><head><title>Thermal Camera</title></head>
+<body style="background:#111;color:#eee;font-family:monospace">
+<img src="/stream.mjpg"><pre id="stats"></pre>
+<script>
+const ws = new WebSocket(`ws://${location.host}/stats`);
+ws.onmessage = (e) => { document.getElementById("stats").textContent = JSON.stringify(JSON.parse(e.data), null, 2); };
+</script>
+</body></html>
+"""
+
+class StreamClient:
+    """
+    A connected client and its queue of pending (already encoded) messages.
+    """
+    def __init__(self, kind: str, queueSize: int):
+        self.kind: str = kind
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queueSize)
+        self.sent: int = 0
+        self.dropped: int = 0
+
+    def offer(self, payload: bytes):
+        """
+        Queues a message, dropping the oldest pending one if the client is behind.
+        """
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(payload)
+
+class StreamServer:
+    """
+    Serves the rendered heatmap, frame statistics and optionally raw thermal frames over HTTP/WebSocket.
+    The server runs its own asyncio event loop on a background thread; publish() can be called from any thread.
+    """
+    def __init__(self,
+                 host: str = SERVER_HOST,
+                 port: int = SERVER_PORT,
+                 serveRaw: bool = SERVE_RAW,
+                 jpegQuality: int = STREAM_JPEG_QUALITY,
+                 clientQueueSize: int = STREAM_CLIENT_QUEUE_SIZE):
+        self.host: str = host
+        self.port: int = port
+        self.serveRaw: bool = serveRaw
+        self.jpegQuality: int = jpegQuality
+        self.clientQueueSize: int = clientQueueSize
+        self.framesPublished: int = 0
+
+        self._clients: set[StreamClient] = set()
+        self._clientKinds: collections.Counter = collections.Counter()
+        # Statistics of the newest frame (stats, frame number, timestamp), only serialized when /stats.json is requested
+        self._latest: tuple = None
+        self._loop: asyncio.AbstractEventLoop = None
+        self._server = None
+        self._thread: threading.Thread = None
+        self._started = threading.Event()
+
+    def _hasClients(self, kind: str) -> bool:
+        # Read from the publishing thread, so only look at the counter the loop thread keeps up to date
+        return self._clientKinds[kind] > 0
+
+    @staticmethod
+    def _statsPayload(stats: FrameStats, frame: int, timestamp: float) -> bytes:
+        statsDict = dataclasses.asdict(stats)
+        statsDict["frame"] = frame
+        statsDict["timestamp"] = timestamp
+        return json.dumps(statsDict, default=float).encode()
+
+    ### LIFECYCLE
+    def start(self):
+        """
+        Starts the server thread and waits until it is listening.
+        """
+        self._thread = threading.Thread(target=self._run, name="stream-server", daemon=True)
+        self._thread.start()
+        self._started.wait()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started.set()
+        self._loop.run_forever()
+
+        # Shut down cleanly once stop() ends the loop: stop listening, then end the client connections
+        self._server.close()
+        tasks = asyncio.all_tasks(self._loop)
+        for task in tasks:
+            task.cancel()
+        self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        self._loop.close()
+
+    def stop(self):
+        """
+        Stops the server and disconnects all clients.
+        """
+        if self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=2)
+        self._loop = None
+
+    ### PUBLISHING
+    def publish(self, heatmap, stats: FrameStats, thermal=None, timestamp: float = 0):
+        """
+        Encodes a frame once and hands it to every connected client. Never blocks on clients.
+        Encoding is skipped for outputs nobody is connected to.
+        """
+        if self._loop is None:
+            return
+        self.framesPublished += 1
+        self._latest = (stats, self.framesPublished, timestamp)
+
+        hasRawClients = self.serveRaw == True and thermal is not None and self._hasClients("raw")
+        if self._hasClients("stats") == False and self._hasClients("mjpeg") == False and hasRawClients == False:
+            return
+
+        payloads = {}
+        if self._hasClients("stats"):
+            payloads["stats"] = self._statsPayload(stats, self.framesPublished, timestamp)
+        if self._hasClients("mjpeg"):
+            ret, jpeg = cv2.imencode(".jpg", heatmap, [cv2.IMWRITE_JPEG_QUALITY, self.jpegQuality])
+            if ret == True:
+                payloads["mjpeg"] = (
+                    f"--{MJPEG_BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n".encode()
+                    + jpeg.tobytes() + b"\r\n")
+        if hasRawClients == True:
+            height, width = thermal.shape
+            payloads["raw"] = RAW_HEADER.pack(self.framesPublished, timestamp, width, height) + thermal.tobytes()
+
+        self._loop.call_soon_threadsafe(self._broadcast, payloads)
+
+    def _broadcast(self, payloads: dict):
+        for client in self._clients:
+            payload = payloads.get(client.kind)
+            if payload is not None:
+                client.offer(payload)
+
+    ### HTTP
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            requestLine = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if line == "":
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if len(requestLine) < 2 or requestLine[0] != "GET":
+                await self._respond(writer, "405 Method Not Allowed", "text/plain", b"Method not allowed")
+                return
+
+            path = requestLine[1].split("?")[0]
+            match path:
+                case "/":
+                    await self._respond(writer, "200 OK", "text/html", VIEWER_PAGE.encode())
+                case "/stats.json":
+                    latest = self._latest
+                    await self._respond(writer, "200 OK", "application/json", self._statsPayload(*latest) if latest is not None else b"{}")
+                case "/stream.mjpg":
+                    await self._serveMjpeg(writer)
+                case "/stats":
+                    await self._serveWebSocket(reader, writer, headers, "stats", opcode=0x1)
+                case "/raw" if self.serveRaw == True:
+                    await self._serveWebSocket(reader, writer, headers, "raw", opcode=0x2)
+                case _:
+                    await self._respond(writer, "404 Not Found", "text/plain", b"Not found")
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # Client went away, or the server is shutting down
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: str, contentType: str, body: bytes):
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {contentType}\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+        await writer.drain()
+
+    async def _stream(self, writer: asyncio.StreamWriter, client: StreamClient, frame):
+        """
+        Sends a client's queued messages until it disconnects.
+        """
+        self._clients.add(client)
+        self._clientKinds[client.kind] += 1
+        try:
+            while True:
+                payload = await client.queue.get()
+                writer.write(frame(payload))
+                await writer.drain()
+                client.sent += 1
+        finally:
+            self._clients.discard(client)
+            self._clientKinds[client.kind] -= 1
+
+    async def _serveMjpeg(self, writer: asyncio.StreamWriter):
+        writer.write(f"HTTP/1.1 200 OK\r\nContent-Type: multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}\r\nCache-Control: no-cache\r\nConnection: close\r\n\r\n".encode())
+        await writer.drain()
+        await self._stream(writer, StreamClient("mjpeg", self.clientQueueSize), lambda payload: payload)
+
+    ### WEBSOCKET
+    async def _serveWebSocket(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, headers: dict, kind: str, opcode: int):
+        key = headers.get("sec-websocket-key")
+        if key is None or headers.get("upgrade", "").lower() != "websocket":
+            await self._respond(writer, "400 Bad Request", "text/plain", b"WebSocket upgrade required")
+            return
+        accept = base64.b64encode(hashlib.sha1(key.encode() + WEBSOCKET_GUID).digest()).decode()
+        writer.write(f"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Accept: {accept}\r\n\r\n".encode())
+        await writer.drain()
+
+        # Stream until either side goes away, the reader only exists to notice a close from the client
+        sender = asyncio.ensure_future(self._stream(writer, StreamClient(kind, self.clientQueueSize), lambda payload: self._webSocketFrame(opcode, payload)))
+        receiver = asyncio.ensure_future(self._readWebSocket(reader))
+        done, pending = await asyncio.wait((sender, receiver), return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+
+    @staticmethod
+    def _webSocketFrame(opcode: int, payload: bytes) -> bytes:
+        """
+        Builds an unmasked, unfragmented server-to-client WebSocket frame.
+        """
+        length = len(payload)
+        if length < 126:
+            header = struct.pack("!BB", 0x80 | opcode, length)
+        elif length < 65536:
+            header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+        return header + payload
+
+    async def _readWebSocket(self, reader: asyncio.StreamReader):
+        """
+        Reads and discards client frames until a close frame or disconnect.
+        """
+        while True:
+            first, second = await reader.readexactly(2)
+            length = second & 0x7F
+            if length == 126:
+                length = struct.unpack("!H", await reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack("!Q", await reader.readexactly(8))[0]
+            if second & 0x80:
+                await reader.readexactly(4)
+            await reader.readexactly(length)
+            if first & 0x0F == 0x8:
+                return
+
+    @property
+    def clientStats(self) -> list[dict]:
+        """
+        Returns the sent/dropped counters of the connected clients.
+        """
+        return [{"kind": client.kind, "sent": client.sent, "dropped": client.dropped} for client in list(self._clients)]
@@ -0,0 +1,124 @@
+import cv2
+from typing import Callable
+
+class DisplaySink:
+    """
+    Base class for where rendered frames end up. Wraps the OpenCV HighGUI calls used by the controllers.
+    """
+    def __init__(self, windowTitle: str):
+        self.windowTitle: str = windowTitle
+        self.framesShown: int = 0
+
+    def open(self, width: int, height: int):
+        """
+        Creates the output surface with the given size.
+        """
+        pass
+
+    def resize(self, width: int, height: int):
+        """
+        Resizes the output surface.
+        """
+        pass
+
+    def setFullscreen(self, isFullscreen: bool, width: int, height: int):
+        """
+        Switches between fullscreen and windowed mode.
+        """
+        pass
+
+    def show(self, img):
+        """
+        Presents a rendered frame.
+        """
+        self.framesShown += 1
+
+    def setMouseCallback(self, callback: Callable[[int, int, int, int], None]):
+        """
+        Calls callback(event, x, y, flags) for every mouse event, x and y being image coordinates.
+        """
+        pass
+
+    def waitKey(self, delay: int = 1) -> int:
+        """
+        Polls for a key press. Returns -1 when no key was pressed.
+        """
+        return -1
+
+    def close(self):
+        """
+        Destroys the output surface.
+        """
+        pass
+
+class WindowDisplaySink(DisplaySink):
+    """
+    Displays frames in an OpenCV window.
+    """
+    def open(self, width: int, height: int):
+        cv2.namedWindow(self.windowTitle, cv2.WINDOW_GUI_NORMAL)
+        cv2.resizeWindow(self.windowTitle, width, height)
+
+    def resize(self, width: int, height: int):
+        cv2.resizeWindow(self.windowTitle, width, height)
+
+    def setFullscreen(self, isFullscreen: bool, width: int, height: int):
+        if isFullscreen == True:
+            cv2.namedWindow(self.windowTitle, cv2.WND_PROP_FULLSCREEN)
+            cv2.setWindowProperty(self.windowTitle, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+        else:
+            cv2.namedWindow(self.windowTitle, cv2.WINDOW_GUI_NORMAL)
+            cv2.setWindowProperty(self.windowTitle, cv2.WND_PROP_AUTOSIZE, cv2.WINDOW_GUI_NORMAL)
+            cv2.resizeWindow(self.windowTitle, width, height)
+
+    def show(self, img):
+        super().show(img)
+        cv2.imshow(self.windowTitle, img)
+
+    def setMouseCallback(self, callback: Callable[[int, int, int, int], None]):
+        cv2.setMouseCallback(self.windowTitle, lambda event, x, y, flags, param: callback(event, x, y, flags))
+
+    def waitKey(self, delay: int = 1) -> int:
+        return cv2.waitKey(delay)
+
+    def close(self):
+        cv2.destroyWindow(self.windowTitle)
+
+class HeadlessDisplaySink(DisplaySink):
+    """
+    Discards frames instead of displaying them, for machines without a display.
+
+    The last frame is kept for inspection and key presses and mouse moves can be scripted with pressKey()/moveMouse().
+    """
+    def __init__(self, windowTitle: str, keepLastFrame: bool = True):
+        super().__init__(windowTitle)
+        self.keepLastFrame: bool = keepLastFrame
+        self.lastFrame = None
+        self._keys: list[int] = []
+        self._mouseCallback: Callable[[int, int, int, int], None] = None
+
+    def pressKey(self, key: str | int):
+        """
+        Queues a key press to be returned by the next waitKey() call.
+        """
+        self._keys.append(ord(key) if isinstance(key, str) else key)
+
+    def moveMouse(self, x: int, y: int, event: int = cv2.EVENT_MOUSEMOVE):
+        """
+        Passes a mouse event at the image coordinates (x, y) to the mouse callback.
+        """
+        if self._mouseCallback is not None:
+            self._mouseCallback(event, x, y, 0)
+
+    def setMouseCallback(self, callback: Callable[[int, int, int, int], None]):
+        self._mouseCallback = callback
+
+    def show(self, img):
+        super().show(img)
+        if self.keepLastFrame == True:
+            self.lastFrame = img
+
+    def waitKey(self, delay: int = 1) -> int:
+        if len(self._keys) > 0:
+            return self._keys.pop(0)
+        return -1
@@ -0,0 +1,523 @@
+import os
+import time
+from abc import ABC, abstractmethod
+import threading
+import cv2
+import numpy as np
+
+from defaults.values import *
+from defaults.keybinds import *
+from recording.rawRecording import RawRecordingReader
+from helpers.bufferPool import BufferPool
+
+class FrameSource(ABC):
+    """
+    Base class for anything that produces raw TC001/TS001 frames.
+
+    A raw frame holds the YUY2 preview image stacked on top of the uint16 thermal plane (256x384x2 bytes for the TS001).
+    Sources mimic the cv2.VideoCapture interface (isOpened/read/release) so the controller loop does not care where frames come from.
+    """
+    def __init__(self, width: int = SENSOR_WIDTH, height: int = SENSOR_HEIGHT, fps: int = DEVICE_FPS):
+        self._width: int = width
+        self._height: int = height
+        self._fps: int = fps
+
+    @property
+    def width(self) -> int:
+        return self._width
+
+    @property
+    def height(self) -> int:
+        return self._height
+
+    @property
+    def fps(self) -> float:
+        """
+        The frame rate of the source (the recorded one for recordings).
+        """
+        return self._fps
+
+    @property
+    def frameBytes(self) -> int:
+        """
+        The size in bytes of a single raw frame (image plane + thermal plane).
+        """
+        return self._width*self._height*2*2
+
+    def open(self) -> bool:
+        """
+        Opens the source. Returns whether the source is ready to be read from.
+        """
+        return self.isOpened()
+
+    @abstractmethod
+    def isOpened(self) -> bool:
+        """
+        Returns whether more frames can be read from the source.
+        """
+
+    @abstractmethod
+    def read(self):
+        """
+        Reads the next raw frame. Returns a (ret, frame) tuple like cv2.VideoCapture.read().
+        """
+
+    def release(self):
+        """
+        Releases any resources held by the source.
+        """
+        pass
+
+    def holdFrame(self):
+        """
+        Keeps the buffer of the frame last read from being reused until releaseFrame() is called with the returned handle,
+        for frames handed over to other threads. Returns None for sources that never reuse their buffers.
+        """
+        return None
+
+    def releaseFrame(self, handle):
+        """
+        Lets the source reuse the buffer of a frame held with holdFrame().
+        """
+        pass
+
+    @property
+    def status(self) -> str:
+        """
+        A line describing where the source is (e.g. the playback position), drawn under the image. None for no line.
+        """
+        return None
+
+    def handleKey(self, keyPress: int) -> bool:
+        """
+        Acts on a key press meant for the source (e.g. playback controls). Returns whether the key was used.
+        """
+        return False
+
+class CameraFrameSource(FrameSource):
+    """
+    Reads raw frames from a UVC thermal camera through OpenCV.
+    """
+    def __init__(self, deviceIndex: int = VIDEO_DEVICE_INDEX, width: int = SENSOR_WIDTH, height: int = SENSOR_HEIGHT, fps: int = DEVICE_FPS, bufferSlots: int = CAPTURE_BUFFER_SLOTS):
+        super().__init__(width=width, height=height, fps=fps)
+        self._deviceIndex: int = deviceIndex
+        self._cap = None
+
+        # Capture buffers are reused round-robin, skipping the ones still held by the pipeline (see holdFrame())
+        self._buffers: BufferPool = BufferPool(bufferSlots)
+        self._frameShape: tuple = None
+
+    def open(self) -> bool:
+        self._cap = cv2.VideoCapture(self._deviceIndex)
+
+        """
+        disable automatic YUY2 -> RGB conversion in OpenCV
+        """
+        self._cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+        return self.isOpened()
+
+    def isOpened(self) -> bool:
+        return self._cap is not None and self._cap.isOpened()
+
+    def read(self):
+        self._buffers.advance()
+        # The frame layout is only known after the first read
+        if self._frameShape is None:
+            ret, frame = self._cap.read()
+            if ret == True:
+                self._frameShape = (frame.shape, frame.dtype)
+            return ret, frame
+        return self._cap.read(self._buffers.get("frame", *self._frameShape))
+
+    def release(self):
+        if self._cap is not None:
+            self._cap.release()
+
+    def holdFrame(self) -> int:
+        return self._buffers.hold()
+
+    def releaseFrame(self, handle: int):
+        if handle is not None:
+            self._buffers.release(handle)
+
+class FileFrameSource(FrameSource):
+    """
+    Replays a raw dump file, i.e. raw camera frames written back to back with no header.
+    """
+    def __init__(self, path: str, width: int = SENSOR_WIDTH, height: int = SENSOR_HEIGHT, fps: int = DEVICE_FPS, loop: bool = FILE_SOURCE_LOOP, realtime: bool = False):
+        super().__init__(width=width, height=height, fps=fps)
+        self._path: str = path
+        self._loop: bool = loop
+        self._realtime: bool = realtime
+        self._file = None
+        self._isOpened: bool = False
+        self._lastReadTime: float = 0
+
+    @property
+    def frameCount(self) -> int:
+        """
+        The number of complete frames in the dump file.
+        """
+        return os.path.getsize(self._path) // self.frameBytes
+
+    def open(self) -> bool:
+        self._file = open(self._path, "rb")
+        self._isOpened = self.frameCount > 0
+        return self._isOpened
+
+    def isOpened(self) -> bool:
+        return self._isOpened
+
+    def read(self):
+        data = self._file.read(self.frameBytes)
+        if len(data) < self.frameBytes:
+            if not self._loop:
+                self._isOpened = False
+                return False, None
+            self._file.seek(0)
+            data = self._file.read(self.frameBytes)
+
+        # Pace playback at the device framerate if asked to
+        if self._realtime:
+            delay = (1/self._fps) - (time.monotonic() - self._lastReadTime)
+            if delay > 0:
+                time.sleep(delay)
+            self._lastReadTime = time.monotonic()
+
+        # Match the Windows capture layout of [1][<number of bytes>]
+        return True, np.frombuffer(data, dtype=np.uint8).reshape((1, self.frameBytes))
+
+    def release(self):
+        if self._file is not None:
+            self._file.close()
+        self._isOpened = False
+
+class SyntheticFrameSource(FrameSource):
+    """
+    Generates deterministic synthetic frames: a warm gradient background with a hot spot orbiting the center and a fixed cold spot.
+
+    The same seed and frame index always produce the same frame, so runs are reproducible across machines.
+    """
+    def __init__(self,
+                 width: int = SENSOR_WIDTH,
+                 height: int = SENSOR_HEIGHT,
+                 fps: int = DEVICE_FPS,
+                 frameCount: int = MAX_FRAMES,
+                 seed: int = SYNTHETIC_SEED,
+                 ambientTemp: float = SYNTHETIC_AMBIENT_TEMP,
+                 hotspotTemp: float = SYNTHETIC_HOTSPOT_TEMP,
+                 noise: float = SYNTHETIC_NOISE):
+        super().__init__(width=width, height=height, fps=fps)
+        self._frameCount: int = frameCount
+        self._seed: int = seed
+        self._ambientTemp: float = ambientTemp
+        self._hotspotTemp: float = hotspotTemp
+        self._noise: float = noise
+        self._frameIndex: int = 0
+        self._isOpened: bool = False
+
+        # Precompute the static parts of the scene
+        self._rows, self._cols = np.mgrid[0:self._height, 0:self._width].astype(np.float32)
+        self._background = (self._ambientTemp + 3*(self._cols/self._width) - 1.5).astype(np.float32)
+        self._background -= 8*np.exp(-(((self._cols - self._width*0.8)**2) + ((self._rows - self._height*0.75)**2))/(2*8**2))
+
+    def open(self) -> bool:
+        self._frameIndex = 0
+        self._isOpened = True
+        return self._isOpened
+
+    def isOpened(self) -> bool:
+        return self._isOpened
+
+    def generateTemperatures(self, index: int):
+        """
+        Generates the temperature field (in C) of the given frame index.
+        """
+        # Hot spot orbiting the center once every 10 seconds
+        angle = 2*np.pi*index/(self._fps*10)
+        cx = self._width/2 + (self._width/4)*np.cos(angle)
+        cy = self._height/2 + (self._height/4)*np.sin(angle)
+        hotspot = (self._hotspotTemp - self._ambientTemp)*np.exp(-(((self._cols - cx)**2) + ((self._rows - cy)**2))/(2*6**2))
+
+        rng = np.random.default_rng((self._seed, index))
+        noise = rng.standard_normal((self._height, self._width), dtype=np.float32)*self._noise
+        return self._background + hotspot + noise
+
+    def generateFrame(self, index: int):
+        """
+        Generates the raw frame (YUY2 image plane + uint16 thermal plane) of the given frame index.
+        """
+        temps = self.generateTemperatures(index)
+
+        # Thermal plane is the inverse of the conversion in ThermalCameraController.normalizeTemperature()
+        thermal = np.clip((temps + 273.15)*64, 0, 65535).astype(np.uint16)
+
+        # Image plane is a grayscale YUY2 preview (Y = relative temperature, U/V = neutral)
+        lo, hi = temps.min(), temps.max()
+        image = np.empty((self._height, self._width, 2), dtype=np.uint8)
+        image[..., 0] = (16 + 219*(temps - lo)/max(hi - lo, 1e-6)).astype(np.uint8)
+        image[..., 1] = 128
+
+        # Match the Windows capture layout of [1][<number of bytes>]
+        return np.concatenate((image.reshape(-1), thermal.view(np.uint8).reshape(-1))).reshape((1, self.frameBytes))
+
+    def read(self):
+        if self._frameCount > 0 and self._frameIndex >= self._frameCount:
+            self._isOpened = False
+            return False, None
+
+        frame = self.generateFrame(self._frameIndex)
+        self._frameIndex += 1
+        return True, frame
+
+    def release(self):
+        self._isOpened = False
+
+class RecordingFrameSource(FrameSource):
+    """
+    Plays back a raw recording (.tcraw, see recording.rawRecording) as raw camera frames, so recorded data goes through
+    the same statistics and rendering as live data.
+
+    Frames are paced by their recorded timestamps at a variable speed; when decoding falls behind (e.g. at high speeds)
+    frames are skipped to keep time. Playback can be paused, stepped a frame at a time and seeked to any frame or time,
+    see handleKey(). While paused the current frame is repeated at the recording's frame rate, so the window stays live.
+    Playback controls may be used from another thread than read() (e.g. the UI thread while capture runs on its own),
+    the playback position is guarded by a lock.
+    With realtime off every frame is returned in order as fast as it is read (e.g. for batch processing).
+    """
+    def __init__(self, path: str, loop: bool = FILE_SOURCE_LOOP, speed: float = PLAYBACK_SPEED, start: float = 0, bufferSlots: int = CAPTURE_BUFFER_SLOTS, realtime: bool = True):
+        self._reader: RawRecordingReader = RawRecordingReader(path)
+        super().__init__(width=self._reader.width, height=self._reader.height, fps=self._reader.fps)
+        if self._reader.frameCount == 0:
+            self._reader.release()
+            raise ValueError(f"'{path}' holds no frames.")
+        self._path: str = path
+        self._loop: bool = loop
+        self._start: float = start
+        self.speed: float = speed
+        self._realtime: bool = realtime
+        self.isPaused: bool = False
+        self._isOpened: bool = False
+
+        # Frame last returned, the one the next read() returns (None to follow the playback clock) and the clock
+        self._index: int = -1
+        self._pending: int = None
+        self._clockTime: float = 0
+        self._clockPosition: float = 0
+        self._lock = threading.RLock()
+
+        # Frames are assembled into buffers reused round-robin, skipping the ones still held by the pipeline (see holdFrame())
+        self._buffers: BufferPool = BufferPool(bufferSlots)
+
+    @property
+    def hasImage(self) -> bool:
+        """
+        Whether the recording holds the YUY2 image plane.
+        """
+        return self._reader.hasImage
+
+    @property
+    def frameCount(self) -> int:
+        return self._reader.frameCount
+
+    @property
+    def position(self) -> float:
+        """
+        Timestamp (seconds from the first frame) of the frame last returned.
+        """
+        return float(self._reader.timestamps[max(self._index, 0)])
+
+    def open(self) -> bool:
+        self._isOpened = True
+        self.seek(self._start)
+        return self._isOpened
+
+    def isOpened(self) -> bool:
+        return self._isOpened
+
+    def _restartClock(self, position: float):
+        self._clockTime = time.monotonic()
+        self._clockPosition = position
+
+    def seekFrame(self, index: int):
+        """
+        Makes frame index (clamped to the recording) the next frame returned.
+        """
+        with self._lock:
+            self._pending = min(max(index, 0), self.frameCount - 1)
+            self._restartClock(float(self._reader.timestamps[self._pending]))
+
+    def seek(self, timestamp: float):
+        """
+        Makes the frame shown at timestamp (seconds from the first frame) the next frame returned.
+        """
+        self.seekFrame(self._reader.frameAt(timestamp))
+
+    def step(self, frames: int = 1):
+        """
+        Pauses playback and moves by a number of frames (negative to go back).
+        """
+        with self._lock:
+            self.isPaused = True
+            self.seekFrame((self._pending if self._pending is not None else self._index) + frames)
+
+    def setPaused(self, isPaused: bool):
+        with self._lock:
+            self.isPaused = isPaused
+            self._restartClock(self.position)
+
+    def setSpeed(self, speed: float):
+        """
+        Changes the playback speed (1 is real time), keeping the current position.
+        """
+        with self._lock:
+            self._restartClock(self.position)
+            self.speed = speed
+
+    def _nextIndex(self) -> int:
+        """
+        Returns the frame due next, waiting until it is due. Returns frameCount past the end.
+        The lock is not held while waiting, and a seek made meanwhile takes over.
+        """
+        while True:
+            with self._lock:
+                if self._pending is not None:
+                    index, self._pending = self._pending, None
+                    return index
+                if self.isPaused == True:
+                    # Repeat the current frame at the recording's frame rate
+                    index = self._index
+                    delay = 1/self._fps
+                else:
+                    index = self._index + 1
+                    if index >= self.frameCount or self._realtime == False:
+                        return index
+
+                    # Skip the frames that are already overdue, otherwise wait for the next one
+                    position = self._clockPosition + (time.monotonic() - self._clockTime)*self.speed
+                    due = self._reader.frameAt(position)
+                    if due > index:
+                        return due
+                    delay = (float(self._reader.timestamps[index]) - position)/self.speed
+                    if delay <= 0:
+                        return index
+
+            time.sleep(delay)
+            with self._lock:
+                if self._pending is None:
+                    return index
+
+    def read(self):
+        index = self._nextIndex()
+        if index >= self.frameCount:
+            if self._loop == False:
+                self._isOpened = False
+                return False, None
+            self.seekFrame(0)
+            index = self._nextIndex()
+
+        thermal, image, _ = self._reader.readFrame(index)
+        with self._lock:
+            self._index = index
+
+        # Assemble the raw frame: YUY2 image plane on top of the thermal plane
+        self._buffers.advance()
+        allocations = self._buffers.allocations
+        frame = self._buffers.get("frame", (1, self.frameBytes))
+        data = frame.reshape(-1)
+        half = self.frameBytes // 2
+        data[half:].view(np.uint16)[:] = thermal.reshape(-1)
+        if image is not None:
+            data[:half] = image.reshape(-1)
+        elif self._buffers.allocations != allocations:
+            # Recordings without the image plane get a neutral gray one
+            gray = data[:half].reshape((self._height, self._width, 2))
+            gray[..., 0] = 16
+            gray[..., 1] = 128
+        return True, frame
+
+    def release(self):
+        self._reader.release()
+        self._isOpened = False
+
+    def holdFrame(self) -> int:
+        return self._buffers.hold()
+
+    def releaseFrame(self, handle: int):
+        if handle is not None:
+            self._buffers.release(handle)
+
+    @property
+    def status(self) -> str:
+        position = self.position
+        duration = self._reader.duration
+        state = "Paused" if self.isPaused == True else f"x{self.speed:g}"
+        return f"{state}  {int(position // 60):02d}:{position % 60:05.2f} / {int(duration // 60):02d}:{duration % 60:05.2f}  Frame {self._index + 1}/{self.frameCount}"
+
+    def handleKey(self, keyPress: int) -> bool:
+        if keyPress == ord(KEY_PLAYBACK_PAUSE):
+            self.setPaused(not self.isPaused)
+        elif keyPress == ord(KEY_PLAYBACK_STEP_BACK):
+            self.step(-1)
+        elif keyPress == ord(KEY_PLAYBACK_STEP_FORWARD):
+            self.step(1)
+        elif keyPress == ord(KEY_PLAYBACK_SEEK_BACK):
+            self.seek(self.position - PLAYBACK_SEEK_SECONDS)
+        elif keyPress == ord(KEY_PLAYBACK_SEEK_FORWARD):
+            self.seek(self.position + PLAYBACK_SEEK_SECONDS)
+        elif keyPress == ord(KEY_PLAYBACK_SLOWER):
+            self.setSpeed(max([s for s in PLAYBACK_SPEEDS if s < self.speed], default=PLAYBACK_SPEEDS[0]))
+        elif keyPress == ord(KEY_PLAYBACK_FASTER):
+            self.setSpeed(min([s for s in PLAYBACK_SPEEDS if s > self.speed], default=PLAYBACK_SPEEDS[-1]))
+        elif keyPress == ord(KEY_PLAYBACK_RESTART):
+            self.seekFrame(0)
+        else:
+            return False
+        return True
+
+def writeRawDump(path: str, source: FrameSource, frameCount: int) -> int:
+    """
+    Writes up to frameCount raw frames from the given source to a dump file readable by FileFrameSource.
+    Returns the number of frames written.
+    """
+    written = 0
+    if not source.open():
+        return written
+    with open(path, "wb") as f:
+        while written < frameCount and source.isOpened():
+            ret, frame = source.read()
+            if ret == False:
+                break
+            f.write(np.ascontiguousarray(frame).tobytes())
+            written += 1
+    source.release()
+    return written
+
+def createFrameSource(sourceType: str = FRAME_SOURCE,
+                      deviceIndex: int = VIDEO_DEVICE_INDEX,
+                      path: str = None,
+                      width: int = SENSOR_WIDTH,
+                      height: int = SENSOR_HEIGHT,
+                      fps: int = DEVICE_FPS,
+                      frameCount: int = MAX_FRAMES,
+                      loop: bool = FILE_SOURCE_LOOP,
+                      seed: int = SYNTHETIC_SEED,
+                      speed: float = PLAYBACK_SPEED,
+                      start: float = 0) -> FrameSource:
+    """
+    Creates a frame source from its type name (see FRAME_SOURCES).
+    """
+    # Plain names in match/case are capture patterns, so the constants are compared explicitly
+    if sourceType == FRAME_SOURCE_CAMERA:
+        return CameraFrameSource(deviceIndex=deviceIndex, width=width, height=height, fps=fps)
+    if sourceType == FRAME_SOURCE_FILE:
+        if path is None:
+            raise ValueError("A file path is required for the file frame source.")
+        return FileFrameSource(path=path, width=width, height=height, fps=fps, loop=loop)
+    if sourceType == FRAME_SOURCE_SYNTHETIC:
+        return SyntheticFrameSource(width=width, height=height, fps=fps, frameCount=frameCount, seed=seed)
+    if sourceType == FRAME_SOURCE_RECORDING:
+        if path is None:
+            raise ValueError("A recording path is required for the recording frame source.")
+        return RecordingFrameSource(path=path, loop=loop, speed=speed, start=start)
+    raise ValueError(f"Unknown frame source '{sourceType}'. Expected one of {FRAME_SOURCES}.")
@@ -0,0 +1,67 @@
+'''
+Queries the per-frame statistics persisted with `main.py --stats-store`.
+
+Prints (or writes to CSV) the statistics of a time range, downsampled to a number of buckets with the
+frame count and min/max/mean of every temperature per bucket, ready for plotting.
+
+Example:
+    python src/statsQuery.py stats/ --last 7d --buckets 500 --out week.csv
+    python src/statsQuery.py stats/ --last 10m --buckets 0
+'''
+
+import csv
+import sys
+import time
+from argparse import ArgumentParser
+
+from defaults.values import *
+from recording.statsStore import StatsStore
+
+DURATION_UNITS: dict[str, int] = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+def parseDuration(value: str) -> float:
+    """
+    Parses a duration like 90, 90s, 15m, 12h, 7d or 2w into seconds.
+    """
+    if value[-1] in DURATION_UNITS:
+        return float(value[:-1])*DURATION_UNITS[value[-1]]
+    return float(value)
+
+def main():
+    parser = ArgumentParser(description="Query the per-frame statistics store.")
+    parser.add_argument("path", type=str, help="Statistics store directory.")
+    parser.add_argument("--start", type=float, default=None, help="Start of the range (seconds since the epoch). Default is the first row.")
+    parser.add_argument("--end", type=float, default=None, help="End of the range (seconds since the epoch). Default is the last row.")
+    parser.add_argument("--last", type=str, default=None, help="Only the last duration of the store, e.g. 15m, 12h or 7d.")
+    parser.add_argument("--buckets", type=int, default=STATS_STORE_QUERY_BUCKETS, help=f"Downsample into this many buckets, 0 for every frame. Default is {STATS_STORE_QUERY_BUCKETS}.")
+    parser.add_argument("--out", type=str, default=None, help="Write the rows to this CSV file instead of printing them.")
+    args = parser.parse_args()
+
+    try:
+        store = StatsStore(args.path, readOnly=True)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+    bounds = store.timeRange()
+    if bounds is None:
+        print(f"No statistics in '{args.path}'.")
+        return
+    start, end = args.start, args.end
+    if args.last is not None:
+        start = (end if end is not None else bounds[1]) - parseDuration(args.last)
+
+    began = time.perf_counter()
+    rows = store.query(start, end, args.buckets)
+    seconds = time.perf_counter() - began
+
+    f = open(args.out, "w", newline="") if args.out is not None else sys.stdout
+    try:
+        writer = csv.writer(f)
+        writer.writerow(rows.dtype.names)
+        writer.writerows(rows.tolist())
+    finally:
+        if f is not sys.stdout:
+            f.close()
+    print(f"{len(rows)} rows of {store.rowCount} ({time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(bounds[0]))} - {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(bounds[1]))}) in {round(seconds*1000, 1)} ms", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,28 @@
 import cv2
 import numpy as np
 import argparse
-from helpers.deviceHelper import getDevices
+from helpers.deviceHelper import discoverDevices, findThermalDevice
 
 # Initialize argument parsing
 parser = argparse.ArgumentParser()
-parser.add_argument("--device", type=int, default=0, help=f"VideoDevice index. Currently selectable: {getDevices()}")
+parser.add_argument("--device", type=int, default=None, help="VideoDevice index. Default is the first detected thermal camera, or 0.")
+parser.add_argument("--list-devices", action="store_true", help="List the detected video devices and exit.")
+parser.add_argument("--refresh-devices", action="store_true", help="Probe the video devices again instead of using the cached list.")
 args = parser.parse_args()
 
+# Devices are only probed when actually needed
+if args.list_devices:
+	for device in discoverDevices(refresh=args.refresh_devices):
+		print(f"{device.index}: {device.width}x{device.height}{' (thermal camera)' if device.isThermal else ''}")
+	raise SystemExit(0)
+
 # Check if device specified
-if args.device:
+if args.device is not None:
 	dev = args.device
 else:
-	dev = 0
+	dev = findThermalDevice(refresh=args.refresh_devices)
+	if dev is None:
+		dev = 0
 
 # Initialize video
 cap = cv2.VideoCapture(dev)